@@ -0,0 +1,78 @@
+"""
+Feed benchmarks.
+
+Run with `./scripts/benchmark benchmarks/bench_feeds.py`.
+"""
+import mock
+
+from django.db import connection
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+
+from bulbs.content import TagCache
+from bulbs.content.filters import Published
+from bulbs.content.models import Content, Tag
+from bulbs.feeds.serializers import GlanceContentSerializer
+from bulbs.utils.test import BaseIndexableTestCase, make_content
+
+from example.testcontent.models import TestContentObj
+from .utils import count_requests, report, timed
+
+
+@override_settings(BETTY_IMAGE_URL="//images.onionstatic.com/onion")
+class GlanceSerializerBenchmarkTestCase(BaseIndexableTestCase):
+
+    page_size = 500
+
+    def setUp(self):
+        super(GlanceSerializerBenchmarkTestCase, self).setUp()
+        tags = [Tag.objects.create(name="Tag {}".format(i)) for i in range(50)]
+        content = make_content(
+            TestContentObj,
+            published=timezone.now() - timezone.timedelta(hours=1),
+            thumbnail_override=53338,
+            _quantity=self.page_size
+        )
+        for i, c in enumerate(content):
+            c.tags.add(*tags[i % 40:i % 40 + 3])
+            c.save()
+        Content.search_objects.refresh()
+        self.request = RequestFactory().get("/feeds/glance.json", SERVER_NAME="www.theonion.com")
+
+    def test_serialize_page(self):
+        client = Content.search_objects.client
+        search = Content.search_objects.search().sort("-last_modified").filter(Published())
+        context = {"request": self.request}
+
+        implementations = [
+            ("per item (search)", lambda page: [
+                GlanceContentSerializer(context=context).to_representation(obj) for obj in page
+            ]),
+            ("many=True (search)", lambda page: GlanceContentSerializer(
+                page, many=True, context=context).data),
+            ("per item (database)", lambda page: [
+                GlanceContentSerializer(context=context).to_representation(obj)
+                for obj in Content.objects.filter(pk__in=[o.pk for o in page])
+            ]),
+            ("many=True (database)", lambda page: GlanceContentSerializer(
+                Content.objects.filter(pk__in=[o.pk for o in page]), many=True,
+                context=context).data),
+        ]
+        page = list(search.extra(size=self.page_size))
+        self.assertEqual(len(page), self.page_size)
+
+        for name, serialize in implementations:
+            def run():
+                # Cold tag counts, as in a freshly started worker
+                with mock.patch.dict(TagCache._cache, clear=True):
+                    serialize(page)
+
+            with CaptureQueriesContext(connection) as queries:
+                requests = count_requests(client, run)
+            report(
+                name,
+                timed(run, repeat=3),
+                es_requests=requests,
+                queries=len(queries)
+            )
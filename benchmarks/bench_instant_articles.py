@@ -0,0 +1,111 @@
+"""
+Instant Article benchmarks.
+
+Run with `./scripts/benchmark benchmarks/bench_instant_articles.py`.
+"""
+import os.path
+import unittest
+
+from bs4 import BeautifulSoup
+
+from django.template import loader
+from django.test import SimpleTestCase
+
+from bulbs.instant_articles.parser import PARSERS, parse_body
+from bulbs.instant_articles.renderer import InstantArticleRenderer
+from .utils import peak_memory, report, timed
+
+
+FIXTURES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.realpath(__file__))),
+    "tests", "instant_articles", "test_data", "input"
+)
+
+
+def read_fixtures():
+    fixtures = []
+    for filename in sorted(os.listdir(FIXTURES_DIR)):
+        with open(os.path.join(FIXTURES_DIR, filename)) as f:
+            fixtures.append(f.read())
+    return fixtures
+
+
+def parse_children_exhaustively(parent):
+    """The previous parser, trying every parser function on every tag."""
+    components = []
+    for tag in parent.children:
+        for parser in PARSERS:
+            matched = parser(tag)
+            if matched:
+                components.append(matched)
+                break
+        else:
+            if hasattr(tag, "contents"):
+                components += parse_children_exhaustively(tag)
+    return components
+
+
+class ParseBodyBenchmarkTestCase(unittest.TestCase):
+
+    rounds = 20
+
+    def test_parse_body(self):
+        fixtures = read_fixtures()
+        docs = len(fixtures) * self.rounds
+
+        implementations = [
+            ("exhaustive (html.parser)",
+             lambda html: parse_children_exhaustively(BeautifulSoup(html, "html.parser"))),
+            ("parse_body (lxml)", parse_body),
+        ]
+        for name, parse in implementations:
+            def run():
+                for _ in range(self.rounds):
+                    for html in fixtures:
+                        parse(html)
+
+            seconds = timed(run, repeat=3)
+            report(
+                name,
+                seconds,
+                docs_per_sec=int(docs / seconds),
+                peak_kib=peak_memory(run)
+            )
+
+
+class LegacyRenderer(InstantArticleRenderer):
+    """The previous renderer, looking up and compiling a template for every embed."""
+
+    def generate_body(self, intermediate):
+        body = []
+        for item in intermediate:
+            for key, values in item.items():
+                body.append(self.render_item(key, values).strip())
+        return '\n'.join(body)
+
+    def render(self, template, body):
+        return loader.render_to_string(template, body)
+
+
+class GenerateBodyBenchmarkTestCase(SimpleTestCase):
+
+    embeds = 50
+
+    def test_generate_body(self):
+        # A photo essay style body: a paragraph between every embed.
+        intermediate = []
+        for i in range(self.embeds):
+            intermediate.append({"text": {"raw": "<p>Paragraph {}</p>".format(i)}})
+            intermediate.append({"youtube": {"video_id": "video{}".format(i)}})
+            intermediate.append({"instagram": {"instagram_id": "photo{}".format(i)}})
+
+        for renderer in (LegacyRenderer(), InstantArticleRenderer()):
+            self.assertEqual(
+                renderer.generate_body(intermediate),
+                LegacyRenderer().generate_body(intermediate)
+            )
+            report(
+                renderer.__class__.__name__,
+                timed(lambda: renderer.generate_body(intermediate)),
+                embeds=self.embeds * 2
+            )
@@ -0,0 +1,48 @@
+"""
+Reading list benchmarks.
+
+Run with `./scripts/benchmark benchmarks/bench_reading_list.py`.
+"""
+from django.utils import timezone
+
+from bulbs.content.models import Content
+from bulbs.content.search import randomize_es
+from bulbs.reading_list.slicers import PrefetchingSearchSlicer, SearchSlicer
+from bulbs.utils.test import BaseIndexableTestCase, make_content
+
+from example.testcontent.models import TestReadingListObj
+from .utils import count_requests, report, timed
+
+
+class FirstSlotSlicerBenchmarkTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(FirstSlotSlicerBenchmarkTestCase, self).setUp()
+        make_content(TestReadingListObj, published=self.now, _quantity=100)
+        make_content(
+            TestReadingListObj,
+            published=self.now - timezone.timedelta(hours=1),
+            tunic_campaign_id=1,
+            _quantity=20
+        )
+        Content.search_objects.refresh()
+
+    def test_first_slot_slicer(self):
+        client = Content.search_objects.client
+
+        for slicer_class in (SearchSlicer, PrefetchingSearchSlicer):
+            def iterate():
+                # `FirstSlotSlicer`, built with each slicer implementation.
+                reading_list = slicer_class(limit=30)
+                reading_list.register_queryset(Content.search_objects.search())
+                reading_list.register_queryset(
+                    randomize_es(Content.search_objects.sponsored()),
+                    validator=lambda index: bool(index == 0)
+                )
+                self.assertEqual(len(list(reading_list)), 30)
+
+            report(
+                slicer_class.__name__,
+                timed(iterate),
+                requests=count_requests(client, iterate)
+            )
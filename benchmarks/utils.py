@@ -0,0 +1,51 @@
+"""Helpers shared by the benchmark suite."""
+import time
+
+import mock
+
+try:
+    import tracemalloc
+except ImportError:
+    # Python 2
+    tracemalloc = None
+
+
+def timed(func, repeat=5):
+    """Returns the best wall clock time, in seconds, of `repeat` calls to `func`."""
+    best = None
+    for _ in range(repeat):
+        start = time.time()
+        func()
+        elapsed = time.time() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+
+def count_requests(client, func):
+    """Returns the number of HTTP requests `func` sends through an Elasticsearch client."""
+    transport = client.transport
+    with mock.patch.object(
+            transport, "perform_request", wraps=transport.perform_request) as perform_request:
+        func()
+    return perform_request.call_count
+
+
+def peak_memory(func):
+    """Returns the peak memory, in KiB, allocated while calling `func` (Python 3 only)."""
+    if tracemalloc is None:
+        return None
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak // 1024
+
+
+def report(name, seconds, **stats):
+    line = "{:<40} {:>10.2f} ms".format(name, seconds * 1000)
+    for key, value in sorted(stats.items()):
+        line += "  {}={}".format(key, value)
+    print(line)
@@ -19,3 +19,25 @@ class TagCache(object):
             cnt = Content.search_objects.search(tags=[slug]).count()
             cls._cache[slug] = cnt
         return cnt
+
+    @classmethod
+    def count_many(cls, slugs):
+        """get the number of objects for each of several slugs, counting the slugs that aren't
+        cached yet in a single query
+
+        :param slugs: cache keys
+        :return: `dict` of slug to `int`
+        """
+        from .models import Content
+        missing = list(set(slug for slug in slugs if slug not in cls._cache))
+        if missing:
+            search = Content.search_objects.search(tags=missing).extra(size=0)
+            search.aggs.bucket("tags", "nested", path="tags").bucket(
+                "included", "filter", {"terms": {"tags.slug": missing}}
+            ).bucket("slugs", "terms", field="tags.slug", size=len(missing))
+            buckets = search.execute().aggregations.tags.included.slugs.buckets
+            # A tag is only ever added to a content once, so nested documents count content
+            counts = dict((bucket["key"], bucket["doc_count"]) for bucket in buckets)
+            for slug in missing:
+                cls._cache[slug] = counts.get(slug, 0)
+        return dict((slug, cls._cache[slug]) for slug in slugs)
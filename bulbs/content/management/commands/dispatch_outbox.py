@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from bulbs.content.models import OutboxEvent
+from bulbs.content.outbox import dispatch_events, get_pending_events
+
+
+class Command(BaseCommand):
+
+    help = "Dispatch pending outbox events (i.e. Elasticsearch and Instant Article deletes)."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--requeue-dead',
+            dest='requeue_dead',
+            action='store_true',
+            default=False,
+            help='Give dead-lettered events a fresh set of attempts first.'
+        )
+
+    def handle(self, *args, **options):
+        if options['requeue_dead']:
+            requeued = OutboxEvent.objects.filter(dead=True).update(
+                dead=False, attempts=0, available_at=timezone.now())
+            self.stdout.write('Requeued {0} dead-lettered events'.format(requeued))
+
+        total = 0
+        # Failed events are pushed back, so this ends once every pending event was attempted
+        while get_pending_events().exists():
+            total += dispatch_events()
+        self.stdout.write('Dispatched {0} events'.format(total))
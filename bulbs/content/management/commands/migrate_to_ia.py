@@ -1,14 +1,158 @@
-from django.core.management.base import BaseCommand
+import os
+import time
+from collections import deque
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
 from django.utils import timezone
 
 from bulbs.content.models import Content, FeatureType
 from bulbs.content.tasks import post_to_instant_articles_api
+from bulbs.utils.ratelimit import TokenBucket
 
 
 class Command(BaseCommand):
 
+    help = "Post unmigrated published content of Instant Article feature types to Facebook."
+
+    poll_interval = 1
+
     def add_arguments(self, parser):
         parser.add_argument('feature', nargs="+", type=str)
+        parser.add_argument(
+            '--bulk',
+            action='store_true',
+            default=False,
+            help='Queue imports at a limited rate, with a bounded number in flight.'
+        )
+        parser.add_argument(
+            '--rate',
+            default=1.0,
+            help='Imports queued per second in bulk mode.',
+            type=float
+        )
+        parser.add_argument(
+            '--burst',
+            default=None,
+            help='Imports that may be queued at once before the rate applies (default: rate).',
+            type=int
+        )
+        parser.add_argument(
+            '--max-in-flight',
+            dest='max_in_flight',
+            default=5,
+            help='Imports queued but not yet assigned an Instant Article id, in bulk mode.',
+            type=int
+        )
+        parser.add_argument(
+            '--in-flight-timeout',
+            dest='in_flight_timeout',
+            default=300,
+            help='Seconds after which an unfinished import stops counting as in flight.',
+            type=int
+        )
+        parser.add_argument(
+            '--checkpoint',
+            default=None,
+            help='File recording the content id up to which all imports finished, to resume a run.',
+            type=str
+        )
+        parser.add_argument(
+            '--dry-run',
+            dest='dry_run',
+            action='store_true',
+            default=False,
+            help='List the content that would be posted without queueing anything.'
+        )
+
+    def get_content(self, feature_types):
+        # All unmigrated published content belonging to feature types
+        return Content.objects.filter(
+            feature_type__in=feature_types,
+            published__isnull=False,
+            published__lte=timezone.now(),
+            instant_article_id__isnull=True)
+
+    def read_checkpoint(self, path):
+        if path and os.path.exists(path):
+            with open(path) as f:
+                return int(f.read().strip() or 0)
+        return 0
+
+    def write_checkpoint(self, path, pk):
+        if path:
+            with open(path, 'w') as f:
+                f.write(str(pk))
+
+    def get_finished(self, in_flight):
+        return set(Content.objects.filter(
+            pk__in=list(in_flight),
+            instant_article_id__isnull=False
+        ).values_list('pk', flat=True))
+
+    def wait_for_in_flight(self, in_flight, max_in_flight, timeout):
+        """
+        Blocks until fewer than `max_in_flight` imports are unfinished. Returns the imports found
+        finished meanwhile.
+        """
+        completed = set()
+        while True:
+            finished = self.get_finished(in_flight)
+            completed |= finished
+            now = time.time()
+            for pk, queued in list(in_flight.items()):
+                if pk in finished:
+                    del in_flight[pk]
+                elif now - queued >= timeout:
+                    self.stderr.write('Import of content {0} has not finished, moving on'.format(pk))
+                    del in_flight[pk]
+            if len(in_flight) < max_in_flight:
+                return completed
+            time.sleep(self.poll_interval)
+
+    def advance_checkpoint(self, path, queued, completed):
+        """Records the last of the leading `queued` imports that are all `completed`."""
+        checkpoint = None
+        while queued and queued[0] in completed:
+            checkpoint = queued.popleft()
+            completed.discard(checkpoint)
+        if checkpoint is not None:
+            self.write_checkpoint(path, checkpoint)
+
+    def handle_bulk(self, content, options):
+        checkpoint = self.read_checkpoint(options['checkpoint'])
+        pks = list(content.filter(pk__gt=checkpoint).order_by('pk').values_list('pk', flat=True))
+        total = len(pks)
+        if checkpoint:
+            self.stdout.write('Resuming after content {0}'.format(checkpoint))
+
+        bucket = TokenBucket(options['rate'], options['burst'])
+        in_flight = {}
+        # Queued imports in order, and those found finished. The checkpoint only moves past
+        # finished imports, so a resume queues the failed and timed out ones again.
+        queued = deque()
+        completed = set()
+        for count, pk in enumerate(pks, 1):
+            if options['dry_run']:
+                self.stdout.write('Would post content {0}'.format(pk))
+                continue
+
+            completed |= self.wait_for_in_flight(
+                in_flight, options['max_in_flight'], options['in_flight_timeout'])
+            self.advance_checkpoint(options['checkpoint'], queued, completed)
+            bucket.wait()
+            post_to_instant_articles_api.delay(pk)
+            in_flight[pk] = time.time()
+            queued.append(pk)
+
+            if count % 10 == 0 or count == total:
+                self.stdout.write('Queued {0}/{1}'.format(count, total))
+
+        completed |= self.get_finished(in_flight)
+        self.advance_checkpoint(options['checkpoint'], queued, completed)
+
+        self.stdout.write('{0} {1} content for Instant Articles'.format(
+            'Found' if options['dry_run'] else 'Queued', total))
 
     def handle(self, *args, **options):
         feature_types = FeatureType.objects.filter(instant_article=True)
@@ -17,13 +161,15 @@ class Command(BaseCommand):
         if feature:
             feature_types = feature_types.filter(slug=feature)
 
+        if options['bulk'] or options['dry_run']:
+            if options['rate'] <= 0:
+                raise CommandError('--rate must be positive')
+            # Imports only finish once posted, so every slot would wait out its timeout
+            if not options['dry_run'] and not getattr(settings, 'FACEBOOK_POST_TO_IA', False):
+                raise CommandError('FACEBOOK_POST_TO_IA is disabled, nothing would be imported')
+            self.handle_bulk(self.get_content(feature_types), options)
+            return
+
         for ft in feature_types:
-                # All unmigrated published content belonging to feature type
-                content = Content.objects.filter(
-                    feature_type=ft,
-                    published__isnull=False,
-                    published__lte=timezone.now(),
-                    instant_article_id__isnull=True)
-
-                for c in content:
-                    post_to_instant_articles_api.delay(c.id)
+            for c in self.get_content([ft]):
+                post_to_instant_articles_api.delay(c.id)
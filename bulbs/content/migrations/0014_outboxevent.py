@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+import django.utils.timezone
+import json_field.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0013_content_hide_from_rss'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OutboxEvent',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('action', models.CharField(max_length=32, choices=[('es_delete', 'Elasticsearch delete'), ('ia_delete', 'Instant Article delete')])),
+                ('payload', json_field.fields.JSONField(default={}, help_text='Enter a valid JSON object')),
+                ('attempts', models.IntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('last_error', models.TextField(default='', blank=True)),
+                ('dead', models.BooleanField(default=False)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'ordering': ('id',),
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='outboxevent',
+            index_together=set([('dead', 'available_at')]),
+        ),
+    ]
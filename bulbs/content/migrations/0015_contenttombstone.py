@@ -0,0 +1,22 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('content', '0014_outboxevent'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ContentTombstone',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('content_id', models.IntegerField(unique=True)),
+                ('last_modified', models.DateTimeField(db_index=True)),
+            ],
+        ),
+    ]
@@ -3,7 +3,6 @@ that we want any piece of content to have."""
 
 import logging
 import uuid
-import requests
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
@@ -18,15 +17,17 @@ from djbetty import ImageField
 from djes.models import Indexable, IndexableManager
 from elasticsearch import TransportError
 from elasticsearch_dsl import field
+from json_field import JSONField
 from polymorphic import PolymorphicModel, PolymorphicManager
 
 from bulbs.content import TagCache
 from bulbs.content.tasks import (
     index_content_contributions, index_content_report_content_proxy,
-    index_feature_type_content, post_to_instant_articles_api
+    index_feature_type_content, post_to_instant_articles_api, precompute_instant_article,
+    schedule_outbox_dispatch
 )
+from bulbs.instant_articles.utils import bump_revision as bump_instant_article_revision
 from bulbs.utils.methods import datetime_to_epoch_seconds, get_template_choices
-from bulbs.utils import vault
 from .managers import ContentManager
 from .tasks import update_feature_type_rates
 
@@ -35,6 +36,9 @@ logger = logging.getLogger(__name__)
 
 TEMPLATE_CHOICES = get_template_choices()
 
+# Content class -> names of its image fields, see `Content.get_image_field_names`
+_image_field_names = {}
+
 
 class ElasticsearchImageField(field.Integer):
 
@@ -280,16 +284,28 @@ class Content(PolymorphicModel, Indexable):
         not the thumbnail override field.
         """
         # loop through image fields and grab the first non-none one
-        for model_field in self._meta.fields:
-            if isinstance(model_field, ImageField):
-                if model_field.name is not 'thumbnail_override':
-                    field_value = getattr(self, model_field.name)
-                    if field_value.id is not None:
-                        return field_value
+        for name in self.get_image_field_names():
+            field_value = getattr(self, name)
+            if field_value.id is not None:
+                return field_value
 
         # no non-none images, return None
         return None
 
+    @classmethod
+    def get_image_field_names(cls):
+        """gets the names of the image fields other than the thumbnail override, in field order
+
+        :return: `list` of `str`
+        """
+        names = _image_field_names.get(cls)
+        if names is None:
+            names = _image_field_names[cls] = [
+                model_field.name for model_field in cls._meta.fields
+                if isinstance(model_field, ImageField) and model_field.name != 'thumbnail_override'
+            ]
+        return names
+
     @property
     def primary_image(self):
         image = getattr(self, "image", None)
@@ -354,15 +370,19 @@ class Content(PolymorphicModel, Indexable):
                 return True
         return False
 
-    def ordered_tags(self):
+    def ordered_tags(self, tag_counts=None):
         """gets the related tags
 
+        :param tag_counts: `dict` of tag slug to count, as from `TagCache.count_many`, to use
+            instead of looking up each tag's count
         :return: `list` of `Tag` instances
         """
         tags = list(self.tags.all())
+        if tag_counts is None:
+            tag_counts = dict((tag.slug, tag.count()) for tag in tags)
         return sorted(
             tags,
-            key=lambda tag: ((type(tag) != Tag) * 100000) + tag.count(),
+            key=lambda tag: ((type(tag) != Tag) * 100000) + tag_counts[tag.slug],
             reverse=True
         )
 
@@ -392,8 +412,12 @@ class Content(PolymorphicModel, Indexable):
                 kwargs = {}
             kwargs["index"] = False
         content = super(Content, self).save(*args, **kwargs)
+        if not self.is_indexed:
+            ContentTombstone.objects.record(self.id)
         index_content_contributions.delay(self.id)
         index_content_report_content_proxy.delay(self.id)
+        bump_instant_article_revision(self.id)
+        precompute_instant_article.delay(self.id)
         post_to_instant_articles_api.delay(self.id)
         return content
 
@@ -606,22 +630,85 @@ class ObfuscatedUrlInfo(Model):
         super(ObfuscatedUrlInfo, self).save(*args, **kwargs)
 
 
+class OutboxEvent(models.Model):
+
+    """
+    An external side effect of a database change (i.e. removing deleted content from
+    Elasticsearch), written in the same transaction as the change and dispatched by a worker.
+    Events that keep failing are dead-lettered.
+    """
+
+    ES_DELETE = "es_delete"
+    IA_DELETE = "ia_delete"
+    ACTION_CHOICES = (
+        (ES_DELETE, "Elasticsearch delete"),
+        (IA_DELETE, "Instant Article delete"),
+    )
+
+    action = models.CharField(max_length=32, choices=ACTION_CHOICES)
+    payload = JSONField(default={})
+    attempts = models.IntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    last_error = models.TextField(blank=True, default="")
+    dead = models.BooleanField(default=False)
+    created = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        index_together = (("dead", "available_at"),)
+        ordering = ("id",)
+
+
+class ContentTombstoneManager(models.Manager):
+
+    """
+    provides additional manager methods for `bulbs.content.ContentTombstone` model
+    """
+
+    def record(self, content_id):
+        """records that content was deleted or trashed just now
+
+        :param content_id: id of the content
+        """
+        now = timezone.now()
+        # Elasticsearch dates have millisecond precision, so tombstones sort alongside them
+        now = now.replace(microsecond=now.microsecond // 1000 * 1000)
+        tombstone, _ = self.update_or_create(content_id=content_id, defaults={"last_modified": now})
+        return tombstone
+
+
+class ContentTombstone(models.Model):
+
+    """
+    marks content removed from the index (deleted or trashed), for the changes feed
+    """
+
+    content_id = models.IntegerField(unique=True)
+    last_modified = models.DateTimeField(db_index=True)
+
+    objects = ContentTombstoneManager()
+
+
 ##
 # signal functions
 
 
 def content_deleted(sender, instance=None, **kwargs):
-    """removes content from the ES index when deleted from DB
+    """queues removal of content from the ES index when deleted from DB
     """
+    ContentTombstone.objects.record(instance.id)
     if getattr(instance, "_index", True):
         cls = instance.get_real_instance_class()
-        index = cls.search_objects.mapping.index
-        doc_type = cls.search_objects.mapping.doc_type
-
-        cls.search_objects.client.delete(index, doc_type, instance.id, ignore=[404])
+        OutboxEvent.objects.create(action=OutboxEvent.ES_DELETE, payload={
+            "index": cls.search_objects.mapping.index,
+            "doc_type": cls.search_objects.mapping.doc_type,
+            "id": instance.id,
+        })
+        schedule_outbox_dispatch()
 
 
 def delete_from_instant_article_api(sender, instance=None, **kwargs):
+    """queues removal of content from Instant Articles when deleted from DB
+    """
     if getattr(settings, 'FACEBOOK_POST_TO_IA', False):
         if getattr(instance, 'instant_article_id', None):
             fb_api_url = getattr(settings, 'FACEBOOK_API_BASE_URL', None)
@@ -635,38 +722,33 @@ def delete_from_instant_article_api(sender, instance=None, **kwargs):
                                                              fb_token_path))
                 return
 
-            fb_access_token = vault.read(fb_token_path).get('authtoken')
-            if fb_access_token is None:
-                logger.error('Missing FB Auth Token in Vault.\n')
-                return
+            OutboxEvent.objects.create(action=OutboxEvent.IA_DELETE, payload={
+                "content_id": instance.id,
+                "instant_article_id": instance.instant_article_id,
+            })
+            schedule_outbox_dispatch()
 
-            delete = requests.delete('{0}/{1}?access_token={2}'.format(
-                fb_api_url,
-                instance.instant_article_id,
-                fb_access_token
-            ))
 
-            if not delete.ok:
-                logger.error('''
-                    Error in deleting Instant Article.\n
-                    Content ID: {0}\n
-                    IA ID: {1}\n
-                    Status Code: {2}
-                    Request: {3}'''.format(instance.id,
-                                           instance.instant_article_id,
-                                           delete.status_code,
-                                           delete.__dict__))
-            else:
-                status = delete.json().get('success')
-                if bool(status) is not True:
-                    logger.error('''
-                        Error in deleting Instant Article.\n
-                        Content ID: {0}\n
-                        IA ID: {1}\n
-                        Error: {2}'''.format(instance.id, instance.instant_article_id, delete.json()))
+def content_authors_changed(sender, instance=None, action=None, reverse=False, pk_set=None,
+                            **kwargs):
+    """moves content to a new Instant Article revision when its authors change
+    """
+    if not reverse:
+        if action in ("post_add", "post_remove", "post_clear"):
+            bump_instant_article_revision(instance.id)
+        return
+    # Changed from the author's side
+    if action == "pre_clear":
+        pk_set = instance.content_set.values_list("id", flat=True)
+    elif action not in ("post_add", "post_remove"):
+        return
+    for content_id in pk_set or []:
+        bump_instant_article_revision(content_id)
+
 
 ##
 # signal hooks
 
 models.signals.pre_delete.connect(content_deleted, Content)
 models.signals.pre_delete.connect(delete_from_instant_article_api, Content)
+models.signals.m2m_changed.connect(content_authors_changed, Content.authors.through)
@@ -0,0 +1,184 @@
+"""
+Dispatching of `OutboxEvent`s.
+
+Deleting content writes its Elasticsearch and Instant Article deletes to the outbox instead of
+making the requests inline. `dispatch_events` sends a batch of pending events: all Elasticsearch
+deletes in a single bulk request, then the Instant Article deletes. Successful events are
+removed; failed events are retried with exponential backoff and dead-lettered after
+`CONTENT_OUTBOX_MAX_ATTEMPTS` attempts.
+
+Dispatches may overlap (the `dispatch_outbox` command, the scheduled task and retries), so each
+one first claims its batch by pushing the events' `available_at` back, which hides them from the
+others. Events claimed by a dispatch that dies are picked up again after
+`CONTENT_OUTBOX_CLAIM_TIMEOUT` seconds.
+
+A dispatch that claimed events queues the next one for as long as live events remain. Events
+are written (and their dispatch queued) before the deleting transaction commits, so a dispatch
+may run before they are visible; sweep the outbox periodically to pick those up, with the
+`dispatch_outbox` command from cron or the task from Celery beat::
+
+    CELERYBEAT_SCHEDULE = {
+        "dispatch-content-outbox": {
+            "task": "bulbs.content.tasks.dispatch_outbox",
+            "schedule": timedelta(minutes=1),
+        },
+    }
+"""
+import logging
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+
+from elasticsearch import TransportError
+from requests import RequestException
+
+from bulbs.utils import http, vault
+from .models import Content, OutboxEvent
+from .tasks import dispatch_outbox as dispatch_outbox_task, schedule_outbox_dispatch
+
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MAX_ATTEMPTS = 5
+# Seconds before the first retry, doubled for every attempt after that
+DEFAULT_RETRY_BACKOFF = 30
+DEFAULT_CLAIM_TIMEOUT = 300
+
+
+def get_pending_events(now=None):
+    return OutboxEvent.objects.filter(dead=False, available_at__lte=now or timezone.now())
+
+
+def claim_pending_events(batch_size):
+    """Claims a batch of pending events with one conditional UPDATE, returning the events
+    claimed."""
+    now = timezone.now()
+    ids = list(get_pending_events(now).order_by("id").values_list("id", flat=True)[:batch_size])
+    if not ids:
+        return []
+
+    # Events claimed meanwhile by another dispatch no longer match `available_at__lte`, and
+    # the claim time tells this dispatch's events apart
+    timeout = getattr(settings, 'CONTENT_OUTBOX_CLAIM_TIMEOUT', DEFAULT_CLAIM_TIMEOUT)
+    claimed_until = now + timezone.timedelta(seconds=timeout)
+    get_pending_events(now).filter(id__in=ids).update(available_at=claimed_until)
+    return list(OutboxEvent.objects.filter(
+        id__in=ids,
+        available_at=claimed_until
+    ).order_by("id"))
+
+
+def dispatch_es_deletes(events):
+    """Deletes documents in one bulk request. Returns errors keyed by event id."""
+    if not events:
+        return {}
+
+    body = []
+    for event in events:
+        body.append({"delete": {
+            "_index": event.payload["index"],
+            "_type": event.payload["doc_type"],
+            "_id": event.payload["id"],
+        }})
+    try:
+        response = Content.search_objects.client.bulk(body=body)
+    except TransportError as e:
+        return dict((event.id, str(e)) for event in events)
+
+    errors = {}
+    for event, item in zip(events, response["items"]):
+        result = item["delete"]
+        # Documents that are already gone are as good as deleted
+        if result.get("status") not in (200, 404):
+            errors[event.id] = str(result.get("error", result.get("status")))
+    return errors
+
+
+def dispatch_ia_delete(event):
+    """Deletes an Instant Article. Returns an error message on failure."""
+    fb_api_url = getattr(settings, 'FACEBOOK_API_BASE_URL', None)
+    fb_token_path = getattr(settings, 'FACEBOOK_TOKEN_VAULT_PATH', None)
+    if not fb_api_url or not fb_token_path:
+        return 'Missing FACEBOOK_API_BASE_URL or FACEBOOK_TOKEN_VAULT_PATH setting'
+
+    fb_access_token = vault.read(fb_token_path).get('authtoken')
+    if fb_access_token is None:
+        return 'Missing FB Auth Token in Vault'
+
+    try:
+        delete = http.delete('facebook', '{0}/{1}?access_token={2}'.format(
+            fb_api_url,
+            event.payload["instant_article_id"],
+            fb_access_token
+        ))
+    except RequestException as e:
+        return str(e)
+
+    if not delete.ok:
+        return 'Status Code: {0} Response: {1}'.format(delete.status_code, delete.text)
+    if bool(delete.json().get('success')) is not True:
+        return 'Error: {0}'.format(delete.json())
+
+
+def record_failure(event, error):
+    event.attempts += 1
+    event.last_error = error
+    max_attempts = getattr(settings, 'CONTENT_OUTBOX_MAX_ATTEMPTS', DEFAULT_MAX_ATTEMPTS)
+    if event.attempts >= max_attempts:
+        event.dead = True
+        logger.error('Dead-lettered outbox event %s (%s) after %s attempts: %s',
+                     event.id, event.action, event.attempts, error)
+    else:
+        backoff = getattr(settings, 'CONTENT_OUTBOX_RETRY_BACKOFF', DEFAULT_RETRY_BACKOFF)
+        event.available_at = timezone.now() + timezone.timedelta(
+            seconds=backoff * (2 ** (event.attempts - 1)))
+        logger.warning('Outbox event %s (%s) failed, attempt %s: %s',
+                       event.id, event.action, event.attempts, error)
+    event.save(update_fields=["attempts", "last_error", "dead", "available_at"])
+
+
+def dispatch_events(batch_size=None):
+    """Dispatch a batch of pending outbox events. Returns the number of events dispatched."""
+    batch_size = batch_size or getattr(settings, 'CONTENT_OUTBOX_BATCH_SIZE', DEFAULT_BATCH_SIZE)
+    events = claim_pending_events(batch_size)
+    if not events:
+        return 0
+
+    errors = dispatch_es_deletes([e for e in events if e.action == OutboxEvent.ES_DELETE])
+    for event in events:
+        if event.action == OutboxEvent.IA_DELETE:
+            try:
+                error = dispatch_ia_delete(event)
+            except Exception as e:
+                # i.e. Vault errors or a non-JSON response, which must not hold up the batch
+                error = 'Error: {0!r}'.format(e)
+            if error:
+                errors[event.id] = error
+
+    OutboxEvent.objects.filter(
+        id__in=[event.id for event in events if event.id not in errors]
+    ).delete()
+    for event in events:
+        if event.id in errors:
+            record_failure(event, errors[event.id])
+
+    schedule_next_dispatch()
+    return len(events) - len(errors)
+
+
+def schedule_next_dispatch():
+    """
+    Queues a dispatch for when the next live event is due: events pending now, failed events
+    backing off, and events claimed by a dispatch that may die.
+    """
+    next_at = OutboxEvent.objects.filter(dead=False).aggregate(
+        next_at=Min("available_at"))["next_at"]
+    if next_at is None:
+        return
+    countdown = (next_at - timezone.now()).total_seconds()
+    if countdown > 0:
+        dispatch_outbox_task.apply_async(countdown=countdown)
+    else:
+        schedule_outbox_dispatch()
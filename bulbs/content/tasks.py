@@ -1,20 +1,24 @@
-import time
-
 from django.conf import settings
-from django.template.loader import render_to_string
-from django.template.base import TemplateDoesNotExist
+from django.core.cache import cache
 from django.core.exceptions import ObjectDoesNotExist
 
-from bulbs.utils import vault
-from bulbs.instant_articles.renderer import InstantArticleRenderer
-from bulbs.instant_articles.transform import transform
+from bulbs.utils import http, vault
+from bulbs.instant_articles.utils import render_instant_article
 
-import requests
 import logging
 from celery import shared_task
 
 logger = logging.getLogger(__name__)
 
+# Import status checks back off exponentially, from 1s up to a minute between checks
+DEFAULT_IMPORT_STATUS_BACKOFF = 1
+DEFAULT_IMPORT_STATUS_MAX_BACKOFF = 60
+DEFAULT_IMPORT_STATUS_MAX_ATTEMPTS = 10
+
+OUTBOX_DISPATCH_LOCK_KEY = "content-outbox-dispatch-lock"
+# Seconds between a change and the dispatch of its outbox events, so events are batched
+DEFAULT_OUTBOX_DISPATCH_DELAY = 5
+
 
 @shared_task(default_retry_delay=5)
 def index(content_type_id, pk, refresh=False):
@@ -26,9 +30,10 @@ def index(content_type_id, pk, refresh=False):
 
 @shared_task(default_retry_delay=5)
 def index_content_contributions(content_pk):
+    from bulbs.contributions.ledger import update_pay
     from bulbs.contributions.models import Contribution
-    for contribution in Contribution.objects.filter(content__pk=content_pk):
-        contribution.save()
+    # Content changes (i.e. its feature type) can change the pay stored with the documents
+    update_pay(Contribution.objects.filter(content__pk=content_pk))
 
 
 @shared_task(default_retry_delay=5)
@@ -51,32 +56,25 @@ def index_feature_type_content(featuretype_pk):
 
 @shared_task(default_retry_delay=5)
 def update_feature_type_rates(featuretype_pk):
-    from bulbs.contributions.models import ContributorRole, FeatureTypeRate, FEATURETYPE
-
-    roles = ContributorRole.objects.filter(payment_type=FEATURETYPE)
-
-    for role in roles:
-        existing_rates = FeatureTypeRate.objects.filter(
-            feature_type_id=featuretype_pk,
-            role_id=role.pk)
+    from bulbs.contributions.models import ContributorRole, FEATURETYPE
+    from bulbs.contributions.utils import create_feature_type_rates
+    from .models import FeatureType
 
-        if existing_rates.count() == 0:
-            FeatureTypeRate.objects.create(
-                rate=0,
-                feature_type_id=featuretype_pk,
-                role_id=role.pk)
+    create_feature_type_rates(
+        roles=ContributorRole.objects.filter(payment_type=FEATURETYPE),
+        feature_types=FeatureType.objects.filter(pk=featuretype_pk)
+    )
 
 
 def post_article(content, body, fb_page_id, fb_api_url, fb_token_path, fb_dev_mode, fb_publish):
-    from .models import Content
-
     fb_access_token = vault.read(fb_token_path).get('authtoken')
     if fb_access_token is None:
         logger.error('Missing FB Auth Token in Vault.\n')
         return
 
     # Post article to instant article API
-    post = requests.post(
+    post = http.post(
+        'facebook',
         '{0}/{1}/instant_articles'.format(fb_api_url, fb_page_id),
         data={
             'access_token': fb_access_token,
@@ -97,31 +95,80 @@ def post_article(content, body, fb_page_id, fb_api_url, fb_token_path, fb_dev_mo
                                             post.__dict__))
         return
 
-    # Poll for status of article
-    response = ""
-    while response != "SUCCESS":
-        time.sleep(1)
+    # Facebook imports the article asynchronously, check back on it later
+    check_instant_article_import.apply_async(
+        args=(content.id, post.json().get('id')),
+        countdown=get_import_status_countdown(0))
 
-        status = requests.get('{0}/{1}?access_token={2}'.format(
-            fb_api_url,
-            post.json().get('id'),
-            fb_access_token
-        ))
 
-        # log errors
-        if not status.ok or status.json().get('status') == "ERROR":
-            logger.error('''
-                Error in getting status of Instant Article.\n
-                Content ID: {0}\n
-                IA ID: {1}\n
-                Status Code: {2}
-                Request: {3}'''.format(content.id,
-                                       content.instant_article_id,
-                                       status.status_code,
-                                       status.__dict__))
-            return
+def get_import_status_countdown(attempt):
+    """Exponential backoff between import status checks, in seconds."""
+    backoff = getattr(settings, 'FACEBOOK_IMPORT_STATUS_BACKOFF', DEFAULT_IMPORT_STATUS_BACKOFF)
+    max_backoff = getattr(
+        settings, 'FACEBOOK_IMPORT_STATUS_MAX_BACKOFF', DEFAULT_IMPORT_STATUS_MAX_BACKOFF)
+    return min(backoff * (2 ** attempt), max_backoff)
+
+
+@shared_task(default_retry_delay=5)
+def check_instant_article_import(content_pk, import_status_id, attempt=0):
+    """Check the status of an Instant Article import, rescheduling itself until it is done."""
+    fb_api_url = getattr(settings, 'FACEBOOK_API_BASE_URL', None)
+    fb_token_path = getattr(settings, 'FACEBOOK_TOKEN_VAULT_PATH', None)
+    fb_access_token = vault.read(fb_token_path).get('authtoken')
+    if fb_access_token is None:
+        logger.error('Missing FB Auth Token in Vault.\n')
+        return
+
+    status = http.get('facebook', '{0}/{1}?access_token={2}'.format(
+        fb_api_url,
+        import_status_id,
+        fb_access_token
+    ))
+
+    # log errors
+    if not status.ok or status.json().get('status') == "ERROR":
+        logger.error('''
+            Error in getting status of Instant Article.\n
+            Content ID: {0}\n
+            Import Status ID: {1}\n
+            Status Code: {2}
+            Request: {3}'''.format(content_pk,
+                                   import_status_id,
+                                   status.status_code,
+                                   status.__dict__))
+        return
+
+    if status.json().get('status') == "SUCCESS":
+        set_instant_article_id.delay(content_pk)
+        return
+
+    max_attempts = getattr(
+        settings, 'FACEBOOK_IMPORT_STATUS_MAX_ATTEMPTS', DEFAULT_IMPORT_STATUS_MAX_ATTEMPTS)
+    if attempt + 1 >= max_attempts:
+        logger.error('''
+            Gave up waiting for Instant Article import.\n
+            Content ID: {0}\n
+            Import Status ID: {1}\n
+            Attempts: {2}'''.format(content_pk, import_status_id, attempt + 1))
+        return
+
+    check_instant_article_import.apply_async(
+        args=(content_pk, import_status_id, attempt + 1),
+        countdown=get_import_status_countdown(attempt + 1))
 
-        response = status.json().get('status')
+
+@shared_task(default_retry_delay=5)
+def set_instant_article_id(content_pk):
+    """Look up the id Facebook assigned to an imported Instant Article by its canonical URL."""
+    from .models import Content
+    content = Content.objects.get(pk=content_pk)
+
+    fb_api_url = getattr(settings, 'FACEBOOK_API_BASE_URL', None)
+    fb_token_path = getattr(settings, 'FACEBOOK_TOKEN_VAULT_PATH', None)
+    fb_access_token = vault.read(fb_token_path).get('authtoken')
+    if fb_access_token is None:
+        logger.error('Missing FB Auth Token in Vault.\n')
+        return
 
     # build URL
     base = getattr(settings, 'WWW_URL')
@@ -129,7 +176,7 @@ def post_article(content, body, fb_page_id, fb_api_url, fb_token_path, fb_dev_mo
         base = "http://" + base
 
     canonical_url = "{0}{1}".format(base, content.get_absolute_url())
-    canon = requests.get('{0}?id={1}&fields=instant_article&access_token={2}'.format(
+    canon = http.get('facebook', '{0}?id={1}&fields=instant_article&access_token={2}'.format(
         fb_api_url,
         canonical_url,
         fb_access_token))
@@ -155,7 +202,7 @@ def delete_article(content, fb_api_url, fb_token_path):
         logger.error('Missing FB Auth Token in Vault.\n')
         return
 
-    delete = requests.delete('{0}/{1}?access_token={2}'.format(
+    delete = http.delete('facebook', '{0}/{1}?access_token={2}'.format(
         fb_api_url,
         content.instant_article_id,
         fb_access_token
@@ -183,6 +230,16 @@ def delete_article(content, fb_api_url, fb_token_path):
                                      delete.json()))
 
 
+@shared_task(default_retry_delay=5)
+def precompute_instant_article(content_pk):
+    """Render and cache the Instant Article page of published, IA approved content."""
+    from .models import Content
+    content = Content.objects.get(pk=content_pk)
+    feature_type = getattr(content, 'feature_type', None)
+    if feature_type and feature_type.instant_article and content.is_published:
+        render_instant_article(content)
+
+
 @shared_task(default_retry_delay=5, time_limit=300)
 def post_to_instant_articles_api(content_pk):
     from .models import Content
@@ -209,21 +266,7 @@ def post_to_instant_articles_api(content_pk):
     feature_type = getattr(content, 'feature_type', None)
     if feature_type and feature_type.instant_article and content.is_published:
         # render page source
-        context = {
-            'content': content,
-            'absolute_uri': getattr(settings, 'WWW_URL'),
-            'transformed_body': transform(
-                getattr(content, 'body', ''),
-                InstantArticleRenderer())
-        }
-        try:
-            source = render_to_string(
-                'instant_article/_instant_article.html', context
-            )
-        except TemplateDoesNotExist:
-            source = render_to_string(
-                'instant_article/base_instant_article.html', context
-            )
+        source = render_instant_article(content)
 
         if should_post:
             post_article(
@@ -242,3 +285,18 @@ def post_to_instant_articles_api(content_pk):
                 content,
                 fb_api_url,
                 fb_token_path)
+
+
+def schedule_outbox_dispatch():
+    """Queue a dispatch of pending outbox events, unless one is already queued."""
+    delay = getattr(settings, 'CONTENT_OUTBOX_DISPATCH_DELAY', DEFAULT_OUTBOX_DISPATCH_DELAY)
+    if cache.add(OUTBOX_DISPATCH_LOCK_KEY, True, delay * 2):
+        dispatch_outbox.apply_async(countdown=delay)
+
+
+@shared_task(default_retry_delay=5)
+def dispatch_outbox():
+    from .outbox import dispatch_events
+    # Released up front, so events written during the dispatch queue the next one
+    cache.delete(OUTBOX_DISPATCH_LOCK_KEY)
+    dispatch_events()
@@ -4,17 +4,34 @@ from django.utils import timezone
 from rest_framework import serializers
 
 from .models import Contribution, LineItem
+from .pay import PayCalculator
+from .serializers import PayCalculatorListSerializer
 
 
 contributor_cls = get_user_model()
 
 
+class ContributionCSVListSerializer(PayCalculatorListSerializer):
+    """Loads a batch of contributions, with everything their rows read, in one query."""
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        contributions = Contribution.objects.select_related(
+            "content__feature_type", "contributor__freelanceprofile"
+        ).in_bulk([item.pk for item in items])
+        return super(ContributionCSVListSerializer, self).to_representation(
+            [contributions[item.pk] for item in items if item.pk in contributions]
+        )
+
+
 class ContributionCSVSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Contribution
+        list_serializer_class = ContributionCSVListSerializer
 
     def to_representation(self, obj):
+        calculator = self.context.get("pay_calculator") or PayCalculator([obj], stored=True)
         full_name = obj.contributor.get_full_name()
         data = {
             'id': obj.content.id,
@@ -23,7 +40,7 @@ class ContributionCSVSerializer(serializers.ModelSerializer):
             'title': obj.content.title,
             'feature_type': obj.content.feature_type,
             'publish_date': timezone.localtime(obj.content.published),
-            'rate': obj.get_pay,
+            'rate': calculator.get_pay(obj),
             'payroll_name': full_name
         }
         profile = getattr(obj.contributor, 'freelanceprofile', None)
@@ -1,12 +1,28 @@
-"""Module to generate and send a report to contributors containing a log of their contributions."""
+"""
+Module to generate and send a report to contributors containing a log of their contributions.
+
+`EmailReport` sends the reports of a whole period in one pass: every contribution and line item
+of the period is loaded at once and priced with one `PayCalculator`, the emails are rendered in a
+thread pool and sent in batches of `CONTRIBUTIONS["EMAIL"]["BATCH_SIZE"]` over one connection.
+Contributors whose email failed are returned, so that the report can be sent again to just them:
+
+    failed = EmailReport(month=5).send_mass_contributor_emails()
+    EmailReport(month=5, contributor_ids=failed).send_mass_contributor_emails()
+"""
+from collections import defaultdict
+from multiprocessing.pool import ThreadPool
 import logging
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.core.mail import EmailMultiAlternatives
+from django.core.mail import EmailMultiAlternatives, get_connection
 from django.template import loader
 from django.utils import timezone
 
+from bulbs.content.models import Content, FeatureType
+from .models import Contribution, LineItem
+from .pay import PayCalculator
+
 logger = logging.getLogger(__name__)
 
 User = get_user_model()
@@ -17,6 +33,8 @@ CONTRIBUTION_SETTINGS = getattr(settings, "CONTRIBUTIONS", {})
 EMAIL_SETTINGS = CONTRIBUTION_SETTINGS.get("EMAIL", {})
 DEFAULT_SUBJECT = "Contribution Report."
 TEMPLATE = "reporting/__contribution_report.html"
+DEFAULT_BATCH_SIZE = 50
+DEFAULT_THREADS = 4
 
 
 class ContributorReport(object):
@@ -29,15 +47,24 @@ class ContributorReport(object):
         self.month = kwargs.get("month", self.now.month)
         self.year = kwargs.get("year", self.now.year)
 
-        self._contributions = None
-        self._line_items = None
+        # Contributions, line items and calculator can be given when loaded for many reports.
+        self._contributions = kwargs.get("contributions")
+        self._line_items = kwargs.get("line_items")
+        self._calculator = kwargs.get("calculator")
         self._deadline = kwargs.get("deadline")
         self._start = kwargs.get("start")
         self._end = kwargs.get("end")
 
-        self._total = 0
+        self._pays = None
+        self._total = None
 
     def send(self):
+        mail = self.get_message()
+        if mail is not None:
+            mail.send()
+
+    def get_message(self):
+        """Returns the report email, or `None` if the report should not be sent."""
         if self.is_valid():
             mail = EmailMultiAlternatives(
                 subject=EMAIL_SETTINGS.get("SUBJECT", DEFAULT_SUBJECT),
@@ -50,18 +77,13 @@ class ContributorReport(object):
                 mail.to = [self.contributor.email]
             else:
                 mail.to = EMAIL_SETTINGS.get("TO")
-            mail.send()
-        else:
-            logger.error("""No email sent for {}""".format(self.contributor.get_full_name()))
+            return mail
+        logger.error("""No email sent for {}""".format(self.contributor.get_full_name()))
 
     def get_body(self):
-        contribution_types = {}
-        for contribution in self.contributions:
-            contribution_types[contribution] = contribution.content._meta.concrete_model.__name__
         context = {
-            "content_type": contribution.content._meta.concrete_model.__name__,
             "contributor": self.contributor,
-            "contributions": contribution_types,
+            "contributions": self.pays,
             "deadline": self.deadline,
             "line_items": self.line_items,
             "total": self.total
@@ -95,15 +117,31 @@ class ContributorReport(object):
             )
         return self._line_items
 
+    @property
+    def calculator(self):
+        if self._calculator is None:
+            self._calculator = PayCalculator(self.contributions, stored=True)
+        return self._calculator
+
+    @property
+    def pays(self):
+        """`(contribution, pay)` pairs of the contributions."""
+        if self._pays is None:
+            self._pays = [
+                (contribution, self.calculator.get_pay(contribution))
+                for contribution in self.contributions
+            ]
+        return self._pays
+
     @property
     def total(self):
-        if self._total == 0 and self.contributions:
-            self._total += sum(
-                [contribution.pay for contribution in self.contributions if contribution.pay]
-            )
-            self._total += sum(
-                [line_item.amount for line_item in self.line_items if line_item.amount]
-            )
+        if self._total is None:
+            self._total = 0
+            if self.pays:
+                self._total += sum([pay for _, pay in self.pays if pay])
+                self._total += sum(
+                    [line_item.amount for line_item in self.line_items if line_item.amount]
+                )
         return self._total
 
     @property
@@ -145,6 +183,8 @@ class EmailReport(object):
         self._deadline = kwargs.get("deadline")
         self._start = kwargs.get("start")
         self._end = kwargs.get("end")
+        # Restricts the report to these contributors, e.g. to resume a partially failed report.
+        self.contributor_ids = kwargs.get("contributor_ids")
 
     def send_contributor_email(self, contributor):
         """Send an EmailMessage object for a given contributor."""
@@ -158,20 +198,153 @@ class EmailReport(object):
         ).send()
 
     def send_mass_contributor_emails(self):
-        """Send report email to all relevant contributors."""
+        """Send report email to all relevant contributors.
+
+        :return: ids of the contributors whose email could not be rendered or sent
+        """
         # If the report configuration is not active we only send to the debugging user.
-        for contributor in self.contributors:
-            if contributor.email not in EMAIL_SETTINGS.get("EXCLUDED", []):
-                self.send_contributor_email(contributor)
+        reports = self.get_reports()
+        messages, failed = self.get_messages(reports)
+        failed.extend(self.send_messages(messages))
+        if failed:
+            logger.error("Contribution report failed for {} contributor(s).".format(len(failed)))
+        return failed
+
+    def get_reports(self):
+        """Returns the report of every contributor, loading the contributions and line items of
+        all of them at once."""
+        contributors = list(self.contributors.exclude(
+            email__in=EMAIL_SETTINGS.get("EXCLUDED", [])
+        ).select_related("freelanceprofile").order_by("pk"))
+        contributor_ids = [contributor.pk for contributor in contributors]
+
+        contributions = Contribution.objects.filter(
+            contributor__in=contributor_ids,
+            content__published__gte=self.start,
+            content__published__lt=self.end
+        ).order_by("content__published", "pk")
+        calculator = PayCalculator(contributions, stored=True)
+        contributions = list(contributions)
+        self.load_content(contributions)
+
+        line_items = LineItem.objects.filter(
+            contributor__in=contributor_ids,
+            payment_date__range=(self.start, self.end)
+        )
+
+        grouped_contributions = defaultdict(list)
+        for contribution in contributions:
+            grouped_contributions[contribution.contributor_id].append(contribution)
+        grouped_line_items = defaultdict(list)
+        for line_item in line_items:
+            grouped_line_items[line_item.contributor_id].append(line_item)
+
+        reports = []
+        for contributor in contributors:
+            report = ContributorReport(
+                contributor,
+                month=self.month,
+                year=self.year,
+                deadline=self._deadline,
+                start=self.start,
+                end=self.end,
+                contributions=grouped_contributions[contributor.pk],
+                line_items=grouped_line_items[contributor.pk],
+                calculator=calculator
+            )
+            # Totals load the calculator's rate tables, which must happen in this thread.
+            report.total
+            reports.append(report)
+        return reports
+
+    def load_content(self, contributions):
+        """Sets the content, with its feature type, of `contributions` with one query per
+        content type, so that rendering doesn't query."""
+        content = Content.objects.in_bulk(
+            list(set(contribution.content_id for contribution in contributions))
+        )
+        feature_types = FeatureType.objects.in_bulk(
+            list(set(item.feature_type_id for item in content.values() if item.feature_type_id))
+        )
+        for item in content.values():
+            item.feature_type = feature_types.get(item.feature_type_id)
+        for contribution in contributions:
+            contribution.content = content[contribution.content_id]
+
+    def get_messages(self, reports):
+        """Renders the emails of `reports` in a thread pool.
+
+        :return: `(contributor, message)` pairs, and the ids of contributors whose email could not
+        be rendered
+        """
+        pool = ThreadPool(EMAIL_SETTINGS.get("THREADS", DEFAULT_THREADS))
+        try:
+            results = pool.map(render_report, reports)
+        finally:
+            pool.close()
+            pool.join()
+
+        messages = []
+        failed = []
+        for report, (message, error) in zip(reports, results):
+            if error:
+                failed.append(report.contributor.pk)
+            elif message is not None:
+                messages.append((report.contributor, message))
+        return messages, failed
+
+    def send_messages(self, messages):
+        """Sends `(contributor, message)` pairs in batches over one connection.
+
+        Messages are handed to the connection one at a time, so a failure only fails the messages
+        that were not sent, and a connection that fails to open fails the rest of its batch.
+
+        :return: ids of the contributors whose email could not be sent
+        """
+        if not messages:
+            return []
+        batch_size = EMAIL_SETTINGS.get("BATCH_SIZE", DEFAULT_BATCH_SIZE)
+        failed = []
+        sent = 0
+        connection = get_connection()
+        try:
+            for start in range(0, len(messages), batch_size):
+                batch = messages[start:start + batch_size]
+                for position, (contributor, message) in enumerate(batch):
+                    try:
+                        # Does nothing while the connection is open
+                        connection.open()
+                    except Exception:
+                        logger.exception("Failed to connect to send contribution reports.")
+                        failed.extend(unsent.pk for unsent, _ in batch[position:])
+                        break
+                    try:
+                        connection.send_messages([message])
+                    except Exception:
+                        logger.exception(
+                            "Failed to send the contribution report of {}".format(contributor.pk)
+                        )
+                        failed.append(contributor.pk)
+                        # The next message opens a new connection
+                        connection.close()
+                    else:
+                        sent += 1
+                logger.info("Sent {} of {} contribution reports.".format(sent, len(messages)))
+        finally:
+            connection.close()
+        return failed
 
     def get_contributors(self):
         """Return a list of contributors with contributions between the start/end dates."""
-        return User.objects.filter(
+        contributors = User.objects.filter(
             freelanceprofile__is_freelance=True
         ).filter(
             contributions__content__published__gte=self.start,
             contributions__content__published__lt=self.end
-        ).distinct()
+        )
+        if self.contributor_ids is not None:
+            contributors = contributors.filter(pk__in=self.contributor_ids)
+        return contributors.distinct()
 
     @property
     def contributors(self):
@@ -199,6 +372,17 @@ class EmailReport(object):
         return self._end
 
 
+def render_report(report):
+    """Returns the email message of a report, or `None`, and whether rendering it failed."""
+    try:
+        return report.get_message(), False
+    except Exception:
+        logger.exception(
+            "Failed to render the contribution report of {}".format(report.contributor.pk)
+        )
+        return None, True
+
+
 def send_byline_email(content, removed_bylines):
     context = {
         "content": content,
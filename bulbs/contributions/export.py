@@ -0,0 +1,97 @@
+"""
+Streaming CSV export of reports.
+
+Reports are read in batches of `CONTRIBUTION_REPORT_BATCH_SIZE` items: searches through the
+Elasticsearch scroll API, in their sort order, and querysets by primary key. Each batch is
+serialized with `many=True`, so list serializers can load what its rows need in bulk, and every
+row goes through the same `csv.writer`. Memory use stays constant however long the report is.
+"""
+import csv
+
+from django.conf import settings
+from django.db.models.query import QuerySet
+
+from djes.search import ShallowResponse
+from elasticsearch_dsl.connections import connections
+from rest_framework_csv.misc import Echo
+import six
+
+
+DEFAULT_BATCH_SIZE = 500
+
+SCROLL_TIMEOUT = "5m"
+
+
+def get_batch_size():
+    return getattr(settings, "CONTRIBUTION_REPORT_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+def scroll_batches(search, batch_size):
+    """Yields the results of a search in batches, following one scroll."""
+    es = connections.get_connection(search._using)
+    response_class = getattr(search, "response_class", ShallowResponse)
+    body = search.extra(size=batch_size).to_dict()
+    body.pop("from", None)
+
+    response = es.search(
+        index=search._index,
+        doc_type=search._doc_type,
+        body=body,
+        scroll=SCROLL_TIMEOUT,
+        **search._params
+    )
+    scroll_id = response.get("_scroll_id")
+    try:
+        while response["hits"]["hits"]:
+            yield list(response_class(response, callbacks=search._doc_type_map))
+            scroll_id = response.get("_scroll_id", scroll_id)
+            response = es.scroll(scroll_id=scroll_id, scroll=SCROLL_TIMEOUT)
+    finally:
+        if scroll_id:
+            es.clear_scroll(scroll_id=scroll_id, ignore=(404,))
+
+
+def queryset_batches(queryset, batch_size):
+    """Yields the objects of a queryset in batches, in primary key order."""
+    queryset = queryset.order_by("pk")
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        batch = list(batch[:batch_size])
+        if not batch:
+            return
+        yield batch
+        last_pk = batch[-1].pk
+
+
+def iter_batches(queryset, batch_size=None):
+    batch_size = batch_size or get_batch_size()
+    if isinstance(queryset, QuerySet):
+        return queryset_batches(queryset, batch_size)
+    return scroll_batches(queryset, batch_size)
+
+
+def iter_csv(queryset, serializer, context, header_fields, batch_size=None):
+    """
+    Yields the lines of a CSV report.
+
+    :param queryset: a `QuerySet` or search of the report items
+    :param serializer: serializer class of a report row
+    :param context: serializer context
+    :param header_fields: `OrderedDict` of row fields to column titles
+    :param batch_size: number of items loaded and serialized at once
+    """
+    csv_writer = csv.writer(Echo())
+
+    # Header row
+    if queryset.count():
+        yield csv_writer.writerow(list(header_fields.values()))
+
+    # Data rows
+    for batch in iter_batches(queryset, batch_size):
+        for items in serializer(batch, many=True, context=context).data:
+            # Sort by `header_fields` ordering
+            yield csv_writer.writerow([
+                elem.encode('utf-8') if isinstance(elem, six.text_type) and six.PY2 else elem
+                for elem in (items[column] for column in header_fields)
+            ])
@@ -0,0 +1,102 @@
+"""
+Batch hydration of contribution search results.
+
+Contribution documents only index the id (and a few display fields) of their content and
+contributor, which `ContentField` and `ContributorField` turn back into database instances. On
+their own, they query once per hit. `HydratedSearch` results instead load the instances for a
+whole page of hits first, with one `in_bulk` query per model, which the fields then read from:
+
+    for contribution in Contribution.search_objects.search():
+        contribution.content  # loaded with the rest of the page
+"""
+from collections import defaultdict
+from contextlib import contextmanager
+import threading
+
+from djes.apps import indexable_registry
+from djes.search import LazySearch, ShallowResponse
+from elasticsearch_dsl import field
+
+
+_local = threading.local()
+
+
+class HydratedObjectField(field.Object):
+    """An object field for a related instance, read back from the instances loaded for the page
+    of hits being parsed."""
+
+    def get_model(self):
+        raise NotImplementedError()
+
+    def load(self, pk):
+        """Loads the instance outside of a page of hits, i.e. from a single document."""
+        raise NotImplementedError()
+
+    def to_python(self, data):
+        instances = getattr(_local, "instances", None)
+        if instances is not None:
+            loaded = instances.get(self.get_model(), {})
+            if data["id"] in loaded:
+                return loaded[data["id"]]
+        return self.load(data["id"])
+
+
+def get_hydrated_fields(doc_type):
+    model = indexable_registry.all_models.get(doc_type)
+    if model is None:
+        return {}
+    properties = model.search_objects.mapping.properties.properties
+    return dict(
+        (name, properties[name]) for name in properties
+        if isinstance(properties[name], HydratedObjectField)
+    )
+
+
+@contextmanager
+def hydrate(hits):
+    """Loads the instances referenced by the hydrated fields of `hits` while parsing them."""
+    fields = {}
+    ids = defaultdict(set)
+    for hit in hits:
+        doc_type = hit.get("_type")
+        if doc_type not in fields:
+            fields[doc_type] = get_hydrated_fields(doc_type)
+        source = hit.get("_source", {})
+        for name, hydrated_field in fields[doc_type].items():
+            value = source.get(name)
+            if value and "id" in value:
+                ids[hydrated_field.get_model()].add(value["id"])
+
+    previous = getattr(_local, "instances", None)
+    _local.instances = dict(
+        (model, model.objects.in_bulk(list(pks))) for model, pks in ids.items()
+    )
+    try:
+        yield
+    finally:
+        _local.instances = previous
+
+
+class HydratedResponse(ShallowResponse):
+
+    @property
+    def hits(self):
+        if not hasattr(self, "_hits"):
+            with hydrate(self._d_["hits"]["hits"]):
+                return super(HydratedResponse, self).hits
+        return super(HydratedResponse, self).hits
+
+
+class HydratedSearch(LazySearch):
+    """A `LazySearch` whose pages are parsed with `hydrate`."""
+
+    response_class = HydratedResponse
+
+    def execute(self):
+        if hasattr(self, "_executed"):
+            return self._executed
+        response = super(HydratedSearch, self).execute()
+        if type(response) is ShallowResponse:
+            # Hits are only parsed on access, so the page can still be hydrated
+            self._executed = self.response_class(response.to_dict(), callbacks=self._doc_type_map)
+        return self._executed
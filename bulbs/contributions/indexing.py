@@ -0,0 +1,71 @@
+"""
+Bulk indexing for the contributions app.
+
+`bulk_index` reindexes a queryset in chunks of `CONTRIBUTION_INDEX_CHUNK_SIZE` objects: each chunk
+is loaded with the relations its documents read (see `SELECT_RELATED`) and sent to Elasticsearch
+with one bulk request.
+"""
+from django.conf import settings
+from elasticsearch.helpers import BulkIndexError
+from elasticsearch_dsl.connections import connections
+
+from .models import Contribution, ContributionOverride, ManualRate
+
+
+DEFAULT_CHUNK_SIZE = 500
+
+# Relations read by the documents of each model
+SELECT_RELATED = {
+    Contribution: ("role", "contributor__freelanceprofile", "content__feature_type"),
+    ContributionOverride: ("contribution__contributor__freelanceprofile",),
+    ManualRate: ("contribution__contributor__freelanceprofile",),
+}
+
+
+def get_chunk_size():
+    return getattr(settings, "CONTRIBUTION_INDEX_CHUNK_SIZE", DEFAULT_CHUNK_SIZE)
+
+
+def index_instances(instances):
+    """Indexes model instances with one bulk request."""
+    if not instances:
+        return
+    body = []
+    for instance in instances:
+        body.append({"index": {
+            "_index": instance.mapping.index,
+            "_type": instance.mapping.doc_type,
+            "_id": instance.pk,
+        }})
+        body.append(instance.to_dict())
+    response = connections.get_connection("default").bulk(body=body)
+    if response.get("errors"):
+        errors = [
+            item["index"] for item in response["items"] if "error" in item.get("index", {})
+        ]
+        raise BulkIndexError("{} document(s) failed to index.".format(len(errors)), errors)
+
+
+def get_chunk_pks(queryset, chunk_size=None):
+    """Splits the primary keys of a queryset into chunks."""
+    chunk_size = chunk_size or get_chunk_size()
+    pks = list(queryset.order_by("pk").values_list("pk", flat=True).distinct())
+    return [pks[start:start + chunk_size] for start in range(0, len(pks), chunk_size)]
+
+
+def index_chunk(model, pks):
+    """Indexes the `model` objects with the primary keys `pks` with one query and one bulk
+    request."""
+    queryset = model._default_manager.filter(pk__in=pks)
+    if model in SELECT_RELATED:
+        queryset = queryset.select_related(*SELECT_RELATED[model])
+    instances = list(queryset)
+    index_instances(instances)
+    return len(instances)
+
+
+def bulk_index(queryset, chunk_size=None):
+    """Indexes the objects of a queryset in chunks, returning the number of objects indexed."""
+    return sum(
+        index_chunk(queryset.model, pks) for pks in get_chunk_pks(queryset, chunk_size)
+    )
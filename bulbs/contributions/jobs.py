@@ -0,0 +1,136 @@
+"""
+Background generation of CSV reports.
+
+A `ReportJob` records a report and the query parameters it is filtered with, as they would be
+passed to the report's viewset. `run_job` (run by the `generate_report` task) rebuilds the
+viewset with those filters and writes its CSV to file storage as it is generated, recording the
+rows written so far. Jobs for the same report and filters created within
+`CONTRIBUTION_REPORT_JOB_WINDOW` seconds of each other share one job.
+"""
+import hashlib
+import json
+import tempfile
+
+from django.conf import settings
+from django.core.files import File
+from django.http import HttpRequest, QueryDict
+from django.utils import timezone
+from django.utils.encoding import force_bytes
+import six
+from six.moves.urllib.parse import urlencode
+
+from .export import get_batch_size, iter_csv
+from .models import ReportJob
+from .renderers import CSVStreamingRenderer
+
+
+DEFAULT_WINDOW = 10 * 60
+
+# Query parameters that change how a report is returned, not what is in it
+IGNORED_PARAMS = ("format", "gzip", "page", "page_size")
+
+
+def get_window():
+    return getattr(settings, "CONTRIBUTION_REPORT_JOB_WINDOW", DEFAULT_WINDOW)
+
+
+def normalize_filters(filters):
+    """Returns filters as sorted lists of strings per parameter, without ignored parameters."""
+    normalized = {}
+    for name, value in filters.items():
+        if name in IGNORED_PARAMS:
+            continue
+        values = value if isinstance(value, (list, tuple)) else [value]
+        normalized[name] = sorted(six.text_type(v) for v in values if v is not None)
+    return normalized
+
+
+def hash_filters(report, filters):
+    return hashlib.sha1(force_bytes(json.dumps([report, filters], sort_keys=True))).hexdigest()
+
+
+def get_or_create_job(report, filters, user=None):
+    """
+    Returns a job for `report` filtered with `filters`, and whether it was created. Failed jobs
+    are never reused.
+    """
+    filters = normalize_filters(filters)
+    filters_hash = hash_filters(report, filters)
+    since = timezone.now() - timezone.timedelta(seconds=get_window())
+    job = ReportJob.objects.filter(
+        report=report, filters_hash=filters_hash, created__gte=since
+    ).exclude(status=ReportJob.FAILED).order_by("-created").first()
+    if job is not None:
+        return job, False
+
+    job = ReportJob.objects.create(
+        report=report, filters=filters, filters_hash=filters_hash, created_by=user
+    )
+    from .tasks import generate_report
+    generate_report.delay(job.pk)
+    return job, True
+
+
+def get_report_view(job):
+    """Returns the report viewset of a job, set up as if requested with the job's filters."""
+    from .views import REPORT_VIEWSETS
+    request = HttpRequest()
+    request.method = "GET"
+    request.GET = QueryDict(urlencode(dict(job.filters, format=["csv"]), doseq=True))
+
+    view = REPORT_VIEWSETS[job.report]()
+    view.action = "list"
+    view.args = ()
+    view.kwargs = {}
+    view.format_kwarg = None
+    view.request = view.initialize_request(request)
+    return view
+
+
+def get_renderer(view):
+    for renderer_class in view.renderer_classes:
+        if issubclass(renderer_class, CSVStreamingRenderer):
+            return renderer_class()
+
+
+def run_job(job_pk):
+    """Generates the CSV of a job and saves it to file storage."""
+    job = ReportJob.objects.get(pk=job_pk)
+    ReportJob.objects.filter(pk=job.pk).update(status=ReportJob.RUNNING)
+    try:
+        view = get_report_view(job)
+        queryset = view.get_queryset()
+        ReportJob.objects.filter(pk=job.pk).update(total=queryset.count())
+
+        batch_size = get_batch_size()
+        lines = iter_csv(
+            queryset,
+            view.get_serializer_class(),
+            view.get_serializer_context(),
+            get_renderer(view).header_fields,
+            batch_size=batch_size
+        )
+        with tempfile.TemporaryFile() as output:
+            rows = -1  # Not counting the header
+            for line in lines:
+                output.write(force_bytes(line))
+                rows += 1
+                if rows and rows % batch_size == 0:
+                    ReportJob.objects.filter(pk=job.pk).update(rows=rows)
+
+            output.seek(0)
+            job.file.save(
+                "{}-{}.csv".format(view.csv_filename, job.pk), File(output), save=False
+            )
+    except Exception as exc:
+        ReportJob.objects.filter(pk=job.pk).update(
+            status=ReportJob.FAILED, error=repr(exc), finished=timezone.now()
+        )
+        raise
+
+    ReportJob.objects.filter(pk=job.pk).update(
+        status=ReportJob.COMPLETE,
+        rows=max(rows, 0),
+        file=job.file.name,
+        finished=timezone.now()
+    )
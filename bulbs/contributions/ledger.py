@@ -0,0 +1,70 @@
+"""
+Stored contribution pay.
+
+Every contribution stores its pay in `Contribution.stored_pay`, along with the `rate_version` of
+its role at the time in `pay_version`. Changes that may affect every contribution of a role (its
+payment type, flat rate or hourly rate) bump the role's `rate_version` as they are saved, which
+marks the stored pay of its contributions as stale until `update_pay` recomputes it in the
+background. Narrower changes (overrides, manual rates, feature type rates) clear the
+`pay_version` of the affected contributions instead, so they are priced live until recomputed.
+Minutes worked and content feature types recompute the affected contributions directly.
+
+`update_pay` works in batches of `CONTRIBUTION_PAY_BATCH_SIZE` contributions: each batch is
+priced with one `PayCalculator`, written with one UPDATE and reindexed with one bulk request (see
+`bulbs.contributions.indexing`).
+"""
+from django.conf import settings
+from django.db.models import Case, F, FloatField, IntegerField, Value, When
+
+from .indexing import SELECT_RELATED, get_chunk_pks, index_instances
+from .models import Contribution, ContributorRole
+from .pay import PayCalculator
+
+
+DEFAULT_BATCH_SIZE = 500
+
+
+def get_batch_size():
+    return getattr(settings, "CONTRIBUTION_PAY_BATCH_SIZE", DEFAULT_BATCH_SIZE)
+
+
+def bump_rate_version(role_pk):
+    ContributorRole.objects.filter(pk=role_pk).update(rate_version=F("rate_version") + 1)
+
+
+def invalidate_pay(contributions):
+    """Marks the stored pay of a queryset of contributions as stale, with one UPDATE."""
+    contributions.update(pay_version=None)
+
+
+def update_batch(pks):
+    # Role versions are loaded before pricing, so a rate change made meanwhile leaves the batch
+    # stale rather than stamped as current
+    contributions = list(Contribution.objects.filter(pk__in=pks).select_related(
+        *SELECT_RELATED[Contribution]
+    ))
+    if not contributions:
+        return
+
+    calculator = PayCalculator(contributions)
+    for contribution in contributions:
+        contribution.stored_pay = calculator.get_pay(contribution)
+        contribution.pay_version = contribution.role.rate_version
+
+    Contribution.objects.filter(pk__in=pks).update(
+        stored_pay=Case(*[
+            When(pk=contribution.pk, then=Value(contribution.stored_pay))
+            for contribution in contributions
+        ], output_field=FloatField()),
+        pay_version=Case(*[
+            When(pk=contribution.pk, then=Value(contribution.pay_version))
+            for contribution in contributions
+        ], output_field=IntegerField())
+    )
+    index_instances(contributions)
+
+
+def update_pay(contributions, batch_size=None):
+    """Recomputes, stores and reindexes the pay of a queryset of contributions."""
+    for pks in get_chunk_pks(contributions, batch_size or get_batch_size()):
+        update_batch(pks)
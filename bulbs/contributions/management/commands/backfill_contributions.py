@@ -4,7 +4,8 @@ from django.core.management.base import BaseCommand
 from django.utils import timezone
 
 from bulbs.content.models import Content
-from bulbs.contributions.models import ContributorRole
+from bulbs.contributions.indexing import get_chunk_pks
+from bulbs.contributions.utils import create_author_contributions
 
 
 def valid_date(s):
@@ -18,8 +19,6 @@ def valid_date(s):
 class Command(BaseCommand):
 
     help = "add missing contributions from authors of the previous month."
-    default_role = ContributorRole.objects.first()
-    count = 0
 
     def add_arguments(self, parser):
         parser.add_argument(
@@ -36,6 +35,13 @@ class Command(BaseCommand):
             required=False,
             type=valid_date
         )
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            default=None,
+            help='Content checked for missing contributions at a time.',
+            type=int
+        )
 
     def get_date_range(self):
         now = timezone.now()
@@ -49,27 +55,14 @@ class Command(BaseCommand):
     def get_content_list(self, start, end):
         return Content.objects.filter(published__range=(start, end))
 
-    def process_content_contributions(self, content):
-        for author in content.authors.all():
-            contribution_qs = content.contributions.filter(contributor=author)
-            if not contribution_qs.exists():
-                content.contributions.create(
-                    contributor=author,
-                    role=self.default_role
-                )
-                self.count += 1
-
     def handle(self, *args, **kwargs):
-        if not self.default_role:
-            self.stdout.write('No role available for backfill')
-            return
-
         default_start, default_end = self.get_date_range()
         start = kwargs['start'] if kwargs['start'] else default_start
         end = kwargs['end'] if kwargs['end'] else default_end
         content_qs = self.get_content_list(start, end)
-        for content in content_qs.all():
-            self.process_content_contributions(content)
+        count = 0
+        for content_ids in get_chunk_pks(content_qs, kwargs.get('batch_size')):
+            count += create_author_contributions(content_ids)
         self.stdout.write(
-            '{0} contributions created between {1} - {2}'.format(self.count, start, end)
+            '{0} contributions created between {1} - {2}'.format(count, start, end)
         )
@@ -3,15 +3,45 @@ from django.core.management.base import BaseCommand
 
 from djes.models import Indexable
 
+from bulbs.contributions.indexing import bulk_index, get_chunk_pks
+from bulbs.contributions.tasks import index_app_chunk
+
 
 class Command(BaseCommand):
 
-    def handle(self, *args, **kwargs):
-        app = apps.get_app('contributions')
-        if not app:
-            return
+    help = "Index every indexable object of the contributions app, with bulk requests."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--chunk-size',
+            dest='chunk_size',
+            default=None,
+            help='Objects loaded and indexed per bulk request.',
+            type=int
+        )
+        parser.add_argument(
+            '--parallel',
+            action='store_true',
+            default=False,
+            help='Queue each chunk as a task for the Celery workers, instead of indexing here.'
+        )
+
+    def handle(self, *args, **options):
+        app = apps.get_app_config('contributions')
 
-        for model in apps.get_models(app):
-            if issubclass(model, Indexable):
-                for instance in model.objects.all():
-                    instance.index()
+        for model in app.get_models():
+            if not issubclass(model, Indexable):
+                continue
+            queryset = model._default_manager.all()
+            if options['parallel']:
+                chunks = get_chunk_pks(queryset, options['chunk_size'])
+                for pks in chunks:
+                    index_app_chunk.delay(
+                        "{}.{}".format(model._meta.app_label, model._meta.model_name), pks
+                    )
+                self.stdout.write('Queued {0} chunks of {1}'.format(
+                    len(chunks), model._meta.object_name
+                ))
+            else:
+                count = bulk_index(queryset, options['chunk_size'])
+                self.stdout.write('Indexed {0} {1}'.format(count, model._meta.object_name))
@@ -0,0 +1,35 @@
+from django.core.management.base import BaseCommand
+from django.db.models import F, Q
+
+from bulbs.contributions.ledger import update_pay
+from bulbs.contributions.models import Contribution
+
+
+class Command(BaseCommand):
+
+    help = "Store the pay of contributions whose stored pay is missing or stale."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            default=False,
+            help='Recompute the pay of every contribution.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            dest='batch_size',
+            default=None,
+            help='Contributions priced, stored and indexed at a time.',
+            type=int
+        )
+
+    def handle(self, *args, **options):
+        contributions = Contribution.objects.all()
+        if not options['all']:
+            contributions = contributions.filter(
+                Q(pay_version__isnull=True) | ~Q(pay_version=F('role__rate_version'))
+            )
+        count = contributions.count()
+        update_pay(contributions, batch_size=options['batch_size'])
+        self.stdout.write('Updated pay for {0} contributions'.format(count))
@@ -0,0 +1,29 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contributions', '0008_auto_20160517_1413'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='contributorrole',
+            name='rate_version',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='contribution',
+            name='stored_pay',
+            field=models.FloatField(null=True, editable=False, blank=True),
+        ),
+        migrations.AddField(
+            model_name='contribution',
+            name='pay_version',
+            field=models.IntegerField(null=True, editable=False, blank=True),
+        ),
+    ]
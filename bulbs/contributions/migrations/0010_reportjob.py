@@ -0,0 +1,42 @@
+# -*- coding: utf-8 -*-
+from __future__ import unicode_literals
+
+from django.db import migrations, models
+from django.conf import settings
+import django.db.models.deletion
+import json_field.fields
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('contributions', '0009_contribution_stored_pay'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportJob',
+            fields=[
+                ('id', models.AutoField(verbose_name='ID', serialize=False, auto_created=True, primary_key=True)),
+                ('report', models.CharField(max_length=32, choices=[('contribution', 'Contributions'), ('content', 'Content'), ('freelance', 'Freelance'), ('line-item', 'Line items')])),
+                ('filters', json_field.fields.JSONField(default={}, help_text='Enter a valid JSON object', blank=True)),
+                ('filters_hash', models.CharField(max_length=40, editable=False)),
+                ('status', models.CharField(default='pending', max_length=16, choices=[('pending', 'Pending'), ('running', 'Running'), ('complete', 'Complete'), ('failed', 'Failed')])),
+                ('rows', models.IntegerField(default=0)),
+                ('total', models.IntegerField(null=True, blank=True)),
+                ('file', models.FileField(null=True, upload_to='contributions/reports', blank=True)),
+                ('error', models.TextField(default='', blank=True)),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('finished', models.DateTimeField(null=True, blank=True)),
+                ('created_by', models.ForeignKey(on_delete=django.db.models.deletion.SET_NULL, blank=True, to=settings.AUTH_USER_MODEL, null=True)),
+            ],
+            options={
+                'ordering': ('-created',),
+            },
+        ),
+        migrations.AlterIndexTogether(
+            name='reportjob',
+            index_together=set([('filters_hash', 'created')]),
+        ),
+    ]
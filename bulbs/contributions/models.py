@@ -4,8 +4,10 @@ from django.db import models
 
 from elasticsearch_dsl import field
 from djes.models import Indexable, IndexableManager
+from json_field import JSONField
 
 from bulbs.content.models import Content, FeatureType
+from .hydration import HydratedObjectField, HydratedSearch
 
 
 FLAT_RATE = 0
@@ -28,6 +30,13 @@ def calculate_hourly_pay(rate, minutes_worked):
     return ((float(rate) / 60) * minutes_worked)
 
 
+def get_stored_pay(stored_pay, payment_type):
+    """Returns stored pay as it was computed: hourly pay is a float, any other pay an int."""
+    if stored_pay is None or payment_type == HOURLY:
+        return stored_pay
+    return int(stored_pay)
+
+
 class SlugObjectField(field.Object):
 
     def __init__(self, *args, **kwargs):
@@ -35,7 +44,7 @@ class SlugObjectField(field.Object):
         self.properties['slug'] = field.construct_field('string', index='not_analyzed')
 
 
-class ContentField(field.Object):
+class ContentField(HydratedObjectField):
 
     def __init__(self, *args, **kwargs):
         super(ContentField, self).__init__(*args, **kwargs)
@@ -58,11 +67,14 @@ class ContentField(field.Object):
 
         return doc
 
-    def to_python(self, data):
-        return Content.objects.get(id=data['id'])
+    def get_model(self):
+        return Content
+
+    def load(self, pk):
+        return Content.objects.get(id=pk)
 
 
-class ContributorField(field.Object):
+class ContributorField(HydratedObjectField):
 
     def __init__(self, *args, **kwargs):
         super(ContributorField, self).__init__(*args, **kwargs)
@@ -82,11 +94,11 @@ class ContributorField(field.Object):
             data['payroll_name'] = getattr(profile, 'payroll_name', '')
         return data
 
-    def to_python(self, data):
-        user_cls = get_user_model()
-        user = user_cls.objects.filter(id=data['id'])
-        if user.exists():
-            return user.first()
+    def get_model(self):
+        return get_user_model()
+
+    def load(self, pk):
+        return get_user_model().objects.filter(id=pk).first()
 
 
 class ContributionField(field.Object):
@@ -160,22 +172,49 @@ class ContributorRole(Indexable):
     name = models.CharField(max_length=255)
     description = models.TextField(null=True, blank=True)
     payment_type = models.IntegerField(choices=ROLE_PAYMENT_TYPES, default=MANUAL)
+    # Bumped whenever a change may affect the pay of every contribution with this role
+    rate_version = models.IntegerField(default=0)
 
     def __unicode__(self):
         return self.name
 
     def save(self, *args, **kwargs):
         created = bool(self.pk is None)
+        previous = None
+        if not created:
+            previous = ContributorRole.objects.filter(pk=self.pk).values_list(
+                "payment_type", "rate_version"
+            ).first()
+        if previous is not None and "update_fields" not in kwargs:
+            # `rate_version` is only bumped in place (see `bulbs.contributions.ledger`), so an
+            # instance loaded before a bump must not write the older version back
+            self.rate_version = previous[1]
+            kwargs["update_fields"] = [
+                field.name for field in self._meta.concrete_fields
+                if not field.primary_key and field.name != "rate_version"
+            ]
         super(ContributorRole, self).save(*args, **kwargs)
         self.create_feature_type_rates(created)
+        self.update_rates(previous is not None and previous[0] != self.payment_type)
 
     def create_feature_type_rates(self, created=False):
         """
         If the role is being created we want to populate a rate for all existing feature_types.
         """
         if created:
-            for feature_type in FeatureType.objects.all():
-                FeatureTypeRate.objects.create(role=self, feature_type=feature_type, rate=0)
+            from .utils import create_feature_type_rates
+            create_feature_type_rates(roles=ContributorRole.objects.filter(pk=self.pk))
+
+    def update_rates(self, payment_type_changed=False):
+        """
+        If the payment type changed, the stored pay of every contribution with this role is stale.
+        """
+        if payment_type_changed:
+            from .ledger import bump_rate_version
+            from .tasks import update_role_rates
+            bump_rate_version(self.pk)
+            self.rate_version += 1
+            update_role_rates.delay(self.pk)
 
     def get_rate(self):
         if self.payment_type == FLAT_RATE:
@@ -189,6 +228,16 @@ class ContributorRole(Indexable):
         return None
 
 
+class ContributionManager(IndexableManager):
+
+    def search(self):
+        """Searches contributions, loading the content and contributors of each page of results
+        in bulk."""
+        return HydratedSearch().using(self.client).index(self.mapping.index).doc_type(
+            **{self.mapping.doc_type: self.from_es}
+        )
+
+
 class Contribution(Indexable):
     role = models.ForeignKey(ContributorRole)
     contributor = models.ForeignKey(settings.AUTH_USER_MODEL, related_name="contributions")
@@ -197,8 +246,11 @@ class Contribution(Indexable):
     minutes_worked = models.IntegerField(null=True)
     force_payment = models.BooleanField(default=False)
     payment_date = models.DateTimeField(null=True, blank=True)
+    # Pay as of the role's `rate_version` in `pay_version`, see `bulbs.contributions.ledger`
+    stored_pay = models.FloatField(null=True, blank=True, editable=False)
+    pay_version = models.IntegerField(null=True, blank=True, editable=False)
 
-    search_objects = IndexableManager()
+    search_objects = ContributionManager()
 
     class Mapping:
 
@@ -208,10 +260,12 @@ class Contribution(Indexable):
 
         class Meta:
             dynamic = False
-            excludes = ('content', 'contributor')
+            excludes = ('content', 'contributor', 'stored_pay', 'pay_version')
 
     @property
     def pay(self):
+        if self.pay_version is not None and self.pay_version == self.role.rate_version:
+            return get_stored_pay(self.stored_pay, self.role.payment_type)
         return self.get_pay
 
     @property
@@ -222,9 +276,20 @@ class Contribution(Indexable):
     def get_override(self):
         return self._get_override()
 
+    def save(self, *args, **kwargs):
+        # Store the current pay, which indexing then reads back through `pay`
+        self.stored_pay = self._get_pay()
+        self.pay_version = self.role.rate_version
+        super(Contribution, self).save(*args, **kwargs)
+
     def delete(self):
-        self.delete_index()
-        return super(Contribution, self).delete()
+        pk = self.pk
+        result = super(Contribution, self).delete()
+        # Removed last: deleting its overrides and manual rates updates the document
+        self.pk = pk
+        self.delete_index(ignore=[404])
+        self.pk = None
+        return result
 
     def get_rate(self):
         payment_type = self.role.payment_type
@@ -243,43 +308,12 @@ class Contribution(Indexable):
             return self.role.hourly_rates.filter().first()
 
     def _get_override(self):
-        # Get contribution specific overrides first.
-        if self.role.payment_type in [0, 1] and self.override_contribution.exists():
-            return self.override_contribution.first().rate
-
-        override_profile = self.contributor.overrides.filter(role=self.role).first()
-        if not override_profile:
-            return None
-
-        elif self.role.payment_type == 0 and override_profile.override_flatrate.exists():
-            return override_profile.override_flatrate.first().rate
-
-        elif (self.role.payment_type == 1):
-            override = override_profile.override_feature_type.filter(
-                feature_type=self.content.feature_type
-            ).first()
-            if override:
-                return override.rate
-
-        elif self.role.payment_type == 2 and override_profile.override_hourly.exists():
-            minutes_worked = float(getattr(self, 'minutes_worked', 0))
-            return calculate_hourly_pay(
-                override_profile.override_hourly.first().rate, minutes_worked
-            )
+        from .pay import PayCalculator
+        return PayCalculator([self]).get_override(self)
 
     def _get_pay(self):
-        override = self.get_override
-        if override:
-            return override
-        rate = self.get_rate()
-        if isinstance(rate, HourlyRate):
-            minutes_worked = getattr(self, 'minutes_worked', 0)
-            if minutes_worked is None:
-                minutes_worked = 0
-            return calculate_hourly_pay(rate.rate, float(minutes_worked))
-        if rate:
-            return rate.rate
-        return None
+        from .pay import PayCalculator
+        return PayCalculator([self]).get_pay(self)
 
 
 class OverrideProfile(Indexable):
@@ -369,9 +403,58 @@ class FreelanceProfile(Indexable):
         if end:
             qs = qs.filter(payment_date__lte=end)
 
+        from .pay import PayCalculator
+        calculator = PayCalculator(qs, stored=True)
         pay = 0
         for contribution in qs.all():
-            contribution_pay = contribution.get_pay
+            contribution_pay = calculator.get_pay(contribution)
             if contribution_pay:
                 pay += contribution_pay
         return pay
+
+
+class ReportJob(models.Model):
+    """
+    A CSV report generated in the background from a set of reporting filters, see
+    `bulbs.contributions.jobs`.
+    """
+
+    CONTRIBUTION = "contribution"
+    CONTENT = "content"
+    FREELANCE = "freelance"
+    LINE_ITEM = "line-item"
+    REPORT_CHOICES = (
+        (CONTRIBUTION, "Contributions"),
+        (CONTENT, "Content"),
+        (FREELANCE, "Freelance"),
+        (LINE_ITEM, "Line items"),
+    )
+
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETE = "complete"
+    FAILED = "failed"
+    STATUS_CHOICES = (
+        (PENDING, "Pending"),
+        (RUNNING, "Running"),
+        (COMPLETE, "Complete"),
+        (FAILED, "Failed"),
+    )
+
+    report = models.CharField(max_length=32, choices=REPORT_CHOICES)
+    filters = JSONField(default={}, blank=True)
+    filters_hash = models.CharField(max_length=40, editable=False)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=PENDING)
+    rows = models.IntegerField(default=0)
+    total = models.IntegerField(null=True, blank=True)
+    file = models.FileField(upload_to="contributions/reports", null=True, blank=True)
+    error = models.TextField(blank=True, default="")
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL
+    )
+    created = models.DateTimeField(auto_now_add=True)
+    finished = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        index_together = (("filters_hash", "created"),)
+        ordering = ("-created",)
@@ -0,0 +1,223 @@
+"""
+Bulk pay calculation for contributions.
+
+`PayCalculator` loads the rate tables it needs once, indexed by role, contributor, feature type
+and contribution, so pay for any number of contributions costs a fixed number of queries:
+
+    calculator = PayCalculator(contributions)
+    total = sum(calculator.get_pay(contribution) or 0 for contribution in contributions)
+
+Tables are scoped to the given contributions. A `QuerySet` scopes them with subqueries; any
+other iterable (including Elasticsearch results) with the ids of its contributions.
+
+With `stored=True`, pay stored by `bulbs.contributions.ledger` is used where it is current, and
+only the remaining contributions are priced from the rate tables.
+"""
+from django.db.models import F
+from django.db.models.query import QuerySet
+
+from bulbs.content.models import Content
+from .models import (
+    Contribution, ContributionOverride, ContributorRole, FeatureTypeOverride, FeatureTypeRate, FlatRate,
+    FlatRateOverride, HourlyOverride, HourlyRate, ManualRate, OverrideProfile,
+    FEATURETYPE, FLAT_RATE, HOURLY, MANUAL, calculate_hourly_pay, get_stored_pay
+)
+
+
+def get_related_id(obj, name):
+    """Returns the id of `obj.<name>`, for database instances and search results alike."""
+    related_id = getattr(obj, "{}_id".format(name), None)
+    if related_id is None:
+        related_id = getattr(getattr(obj, name, None), "id", None)
+    return related_id
+
+
+def latest(rows):
+    """Maps the key of each `(key, value)` row to the first value seen, i.e. the latest one of
+    rows ordered newest first."""
+    values = {}
+    for key, value in rows:
+        values.setdefault(key, value)
+    return values
+
+
+class PayCalculator(object):
+
+    def __init__(self, contributions, stored=False):
+        self.stored = stored
+        self._queryset = None
+        self._ids = None
+        if isinstance(contributions, QuerySet):
+            self._queryset = contributions.order_by()
+        else:
+            contributions = list(contributions)
+            self._ids = {
+                "pk": set(contribution.pk for contribution in contributions),
+            }
+            for name in ("role", "contributor", "content"):
+                self._ids[name] = set(
+                    get_related_id(contribution, name) for contribution in contributions
+                )
+        self._tables = {}
+
+    def scope(self, name):
+        """The `name` ids of the contributions, as a set or a subquery."""
+        if self._queryset is not None:
+            return self._queryset.values(name)
+        return self._ids[name]
+
+    def table(self, name):
+        if name not in self._tables:
+            self._tables[name] = getattr(self, "load_{}".format(name))()
+        return self._tables[name]
+
+    def load_stored_pay(self):
+        rows = Contribution.objects.filter(
+            pk__in=self.scope("pk"),
+            pay_version=F("role__rate_version")
+        ).values_list("pk", "stored_pay", "role__payment_type")
+        return dict(
+            (pk, get_stored_pay(stored_pay, payment_type))
+            for pk, stored_pay, payment_type in rows
+        )
+
+    # Role tables
+
+    def load_payment_types(self):
+        return dict(ContributorRole.objects.filter(
+            pk__in=self.scope("role")
+        ).values_list("pk", "payment_type"))
+
+    def load_flat_rates(self):
+        return latest(FlatRate.objects.filter(
+            role__in=self.scope("role")
+        ).order_by("-updated_on", "-pk").values_list("role_id", "rate"))
+
+    def load_hourly_rates(self):
+        return latest(HourlyRate.objects.filter(
+            role__in=self.scope("role")
+        ).order_by("-updated_on", "-pk").values_list("role_id", "rate"))
+
+    def load_feature_type_rates(self):
+        rows = FeatureTypeRate.objects.filter(
+            role__in=self.scope("role")
+        ).values_list("role_id", "feature_type_id", "rate")
+        return dict(((role_id, feature_type_id), rate) for role_id, feature_type_id, rate in rows)
+
+    def load_feature_types(self):
+        return dict(Content.objects.filter(
+            pk__in=self.scope("content")
+        ).values_list("pk", "feature_type_id"))
+
+    # Override profile tables
+
+    def load_profiles(self):
+        rows = OverrideProfile.objects.filter(
+            contributor__in=self.scope("contributor"),
+            role__in=self.scope("role")
+        ).values_list("contributor_id", "role_id", "pk")
+        return dict(((contributor_id, role_id), pk) for contributor_id, role_id, pk in rows)
+
+    def load_flat_overrides(self):
+        return latest(FlatRateOverride.objects.filter(
+            profile__in=list(self.table("profiles").values())
+        ).order_by("-updated_on", "-pk").values_list("profile_id", "rate"))
+
+    def load_hourly_overrides(self):
+        return latest(HourlyOverride.objects.filter(
+            profile__in=list(self.table("profiles").values())
+        ).order_by("-updated_on", "-pk").values_list("profile_id", "rate"))
+
+    def load_feature_type_overrides(self):
+        rows = FeatureTypeOverride.objects.filter(
+            profile__in=list(self.table("profiles").values())
+        ).order_by("-updated_on", "-pk").values_list("profile_id", "feature_type_id", "rate")
+        return latest(
+            ((profile_id, feature_type_id), rate) for profile_id, feature_type_id, rate in rows
+        )
+
+    # Contribution tables
+
+    def load_contribution_overrides(self):
+        return latest(ContributionOverride.objects.filter(
+            contribution__in=self.scope("pk")
+        ).order_by("-updated_on", "-pk").values_list("contribution_id", "rate"))
+
+    def load_manual_rates(self):
+        return latest(ManualRate.objects.filter(
+            contribution__in=self.scope("pk")
+        ).order_by("-updated_on", "-pk").values_list("contribution_id", "rate"))
+
+    # Pay
+
+    def get_payment_type(self, contribution):
+        return self.table("payment_types").get(get_related_id(contribution, "role"))
+
+    def get_feature_type_id(self, contribution):
+        return self.table("feature_types").get(get_related_id(contribution, "content"))
+
+    def get_minutes_worked(self, contribution):
+        return float(getattr(contribution, "minutes_worked", None) or 0)
+
+    def get_override(self, contribution):
+        """Returns the override pay for `contribution`, or None, as `Contribution.get_override`."""
+        role_id = get_related_id(contribution, "role")
+        payment_type = self.get_payment_type(contribution)
+
+        # Get contribution specific overrides first.
+        if payment_type in (FLAT_RATE, FEATURETYPE):
+            override = self.table("contribution_overrides").get(contribution.pk)
+            if override is not None:
+                return override
+
+        profile = self.table("profiles").get(
+            (get_related_id(contribution, "contributor"), role_id)
+        )
+        if profile is None:
+            return None
+
+        if payment_type == FLAT_RATE:
+            return self.table("flat_overrides").get(profile)
+
+        if payment_type == FEATURETYPE:
+            return self.table("feature_type_overrides").get(
+                (profile, self.get_feature_type_id(contribution))
+            )
+
+        if payment_type == HOURLY:
+            rate = self.table("hourly_overrides").get(profile)
+            if rate is not None:
+                return calculate_hourly_pay(rate, self.get_minutes_worked(contribution))
+
+    def get_rate(self, contribution):
+        """Returns the rate amount `Contribution.get_rate` would find, or None."""
+        role_id = get_related_id(contribution, "role")
+        payment_type = self.get_payment_type(contribution)
+
+        if payment_type == MANUAL:
+            return self.table("manual_rates").get(contribution.pk)
+
+        if payment_type == FLAT_RATE:
+            return self.table("flat_rates").get(role_id)
+
+        if payment_type == FEATURETYPE:
+            feature_type_id = self.get_feature_type_id(contribution)
+            if feature_type_id:
+                return self.table("feature_type_rates").get((role_id, feature_type_id))
+
+        if payment_type == HOURLY:
+            return self.table("hourly_rates").get(role_id)
+
+    def get_pay(self, contribution):
+        """Returns the pay for `contribution`, or None, as `Contribution.get_pay`."""
+        if self.stored:
+            stored_pay = self.table("stored_pay")
+            if contribution.pk in stored_pay:
+                return stored_pay[contribution.pk]
+        override = self.get_override(contribution)
+        if override:
+            return override
+        rate = self.get_rate(contribution)
+        if rate is not None and self.get_payment_type(contribution) == HOURLY:
+            return calculate_hourly_pay(rate, self.get_minutes_worked(contribution))
+        return rate
@@ -1,30 +1,8 @@
 from collections import OrderedDict
-import csv
 
 from rest_framework_csv.renderers import CSVRenderer
-from rest_framework_csv.misc import Echo
-import six
 
-import django.db.models.query
-
-from djes.utils.query import batched_queryset
-
-
-# DJES LazySearch iteration is a hot mess, and by default will only iterate through a full page (10
-# items). This works for now, but eventually we need to just fix DJES
-class LazySearchIterator(object):
-
-    def __init__(self, queryset):
-        self.queryset = queryset
-
-    def __iter__(self):
-        return self
-
-    def __next__(self):
-        return self.next()
-
-    def next(self):
-        return next(self.queryset)
+from .export import iter_csv
 
 
 class CSVStreamingRenderer(CSVRenderer):
@@ -34,40 +12,20 @@ class CSVStreamingRenderer(CSVRenderer):
         can iterate over it, rendering and returning each line.
 
         Based on rest_framework_csv.renderers.CSVStreamingRenderer, but can't use that b/c the
-        `tabilize()` call is not iterator-friendly.
+        `tabilize()` call is not iterator-friendly. Items are read and serialized in batches,
+        see `bulbs.contributions.export`.
     """
 
     header_fields = {}
 
     def render(self, data, media_type=None, renderer_context={}):
-
-        queryset = data['queryset']
-        serializer = data['serializer']
-        context = data['context']
-
-        csv_buffer = Echo()
-        csv_writer = csv.writer(csv_buffer)
-
-        # Header row
-        if queryset.count():
-            yield csv_writer.writerow(self.header_fields.values())
-
-        # Need to efficiently page through querysets
-        if isinstance(queryset, django.db.models.query.QuerySet):
-            queryset = batched_queryset(queryset, chunksize=25)
-        else:
-            # This should be build into LazySearch object, but it's not...
-            queryset = LazySearchIterator(queryset)
-
-        # Data rows
-        for item in queryset:
-            items = serializer(item, context=context).data
-            # Sort by `header_fields` ordering
-            ordered = [items[column] for column in self.header_fields]
-            yield csv_writer.writerow([
-                elem.encode('utf-8') if isinstance(elem, six.text_type) and six.PY2 else elem
-                for elem in ordered
-            ])
+        return iter_csv(
+            data['queryset'],
+            data['serializer'],
+            data['context'],
+            self.header_fields,
+            batch_size=data.get('batch_size')
+        )
 
 
 class ContentReportingRenderer(CSVStreamingRenderer):
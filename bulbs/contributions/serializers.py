@@ -3,6 +3,7 @@ import datetime
 import six
 
 from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
 
@@ -11,12 +12,14 @@ from rest_framework.utils import model_meta
 
 from bulbs.content.models import Content, FeatureType
 from bulbs.content.serializers import FeatureTypeField, UserSerializer
+from bulbs.utils.serializers import JSONField
 
 from .models import (
     Contribution, ContributorRole, ContributionOverride, HourlyRate, FlatRate, ManualRate,
-    FeatureTypeRate, FeatureTypeOverride, LineItem, OverrideProfile, Rate,
-    RATE_PAYMENT_TYPES, MANUAL
+    FeatureTypeRate, FeatureTypeOverride, LineItem, OverrideProfile, Rate, ReportJob,
+    RATE_PAYMENT_TYPES, HOURLY, MANUAL
 )
+from .pay import PayCalculator
 
 
 class PaymentTypeField(serializers.Field):
@@ -455,6 +458,23 @@ class ContributionSerializer(serializers.ModelSerializer):
         return contribution
 
 
+class PayCalculatorListSerializer(serializers.ListSerializer):
+    """Computes pay for a whole page with one `PayCalculator`, shared through the context."""
+
+    def get_contributions(self, items):
+        return items
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+        self.child.context["pay_calculator"] = PayCalculator(
+            self.get_contributions(items), stored=True
+        )
+        try:
+            return super(PayCalculatorListSerializer, self).to_representation(items)
+        finally:
+            del self.child.context["pay_calculator"]
+
+
 class ContributionReportingSerializer(serializers.ModelSerializer):
 
     user = serializers.SerializerMethodField()
@@ -466,6 +486,13 @@ class ContributionReportingSerializer(serializers.ModelSerializer):
     class Meta:
         model = Contribution
         fields = ("id", "content", "user", "pay", "role", "rate", "notes")
+        list_serializer_class = PayCalculatorListSerializer
+
+    def get_pay_calculator(self, obj):
+        calculator = self.context.get("pay_calculator")
+        if calculator is None:
+            calculator = PayCalculator([obj], stored=True)
+        return calculator
 
     def get_content(self, obj):
         return OrderedDict([
@@ -496,16 +523,14 @@ class ContributionReportingSerializer(serializers.ModelSerializer):
         return obj.role.name
 
     def get_pay(self, obj):
-        return obj.get_pay
+        return self.get_pay_calculator(obj).get_pay(obj)
 
     def get_rate(self, obj):
-        rate = obj.get_rate()
-        if isinstance(rate, HourlyRate):
-            minutes_worked = getattr(obj, 'minutes_worked', 0)
-            return rate.rate * minutes_worked
-        if rate and hasattr(rate, "rate"):
-            return rate.rate
-        return None
+        calculator = self.get_pay_calculator(obj)
+        rate = calculator.get_rate(obj)
+        if rate is not None and calculator.get_payment_type(obj) == HOURLY:
+            return rate * (obj.minutes_worked or 0)
+        return rate
 
 
 class ContributorRoleField(serializers.Field):
@@ -522,6 +547,12 @@ class ContributorRoleField(serializers.Field):
         return ",".join([contribution.contributor.get_full_name() for contribution in qs])
 
 
+class ContentReportingListSerializer(PayCalculatorListSerializer):
+
+    def get_contributions(self, items):
+        return Contribution.objects.filter(content__in=[item.pk for item in items])
+
+
 class ContentReportingSerializer(serializers.ModelSerializer):
 
     content_type = serializers.SerializerMethodField()
@@ -538,6 +569,7 @@ class ContentReportingSerializer(serializers.ModelSerializer):
             "id", "title", "url", "content_type", "feature_type", "published", "authors",
             "video_id", "value"
         )
+        list_serializer_class = ContentReportingListSerializer
 
     def get_content_value(self, obj):
         try:
@@ -572,9 +604,13 @@ class ContentReportingSerializer(serializers.ModelSerializer):
         #     payment_date__range=(start_date, end_date)
         # )
 
+        contributions = list(contributions)
+        calculator = self.context.get("pay_calculator") or PayCalculator(
+            contributions, stored=True
+        )
         total_cost = 0
         for contribution in contributions:
-            cost = contribution.get_pay
+            cost = calculator.get_pay(contribution)
             if cost:
                 total_cost += cost
         return total_cost
@@ -603,3 +639,29 @@ class ContributorReportSerializer(serializers.Serializer):
 
     deadline = serializers.DateTimeField()
     start = serializers.DateTimeField()
+
+
+class ReportJobSerializer(serializers.ModelSerializer):
+
+    filters = JSONField(required=False, default={})
+    download_url = serializers.SerializerMethodField()
+
+    class Meta:
+        model = ReportJob
+        fields = (
+            "id", "report", "filters", "status", "rows", "total", "error", "created", "finished",
+            "download_url"
+        )
+        read_only_fields = ("status", "rows", "total", "error", "created", "finished")
+
+    def validate_filters(self, value):
+        if not isinstance(value, dict):
+            raise serializers.ValidationError("Filters must be an object of query parameters.")
+        return value
+
+    def get_download_url(self, obj):
+        if obj.status != ReportJob.COMPLETE:
+            return None
+        url = reverse("report-jobs-download", kwargs={"pk": obj.pk})
+        request = self.context.get("request")
+        return request.build_absolute_uri(url) if request else url
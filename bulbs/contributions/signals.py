@@ -1,34 +1,99 @@
 from django.dispatch import receiver
-from django.db.models.signals import m2m_changed, post_save
+from django.db.models.signals import m2m_changed, post_delete, post_save
 
 from bulbs.content.models import Content, FeatureType
 
-from .models import ContributorRole, FeatureTypeRate
-from .tasks import update_role_rates
-from .utils import update_content_contributions
+from .ledger import bump_rate_version, invalidate_pay
+from .models import (
+    Contribution, ContributionOverride, ContributorRole, FeatureTypeOverride, FeatureTypeRate,
+    FlatRate, FlatRateOverride, HourlyOverride, HourlyRate, ManualRate, OverrideProfile
+)
+from .tasks import (
+    update_contribution_pay, update_feature_type_rate_pay, update_override_profile_pay,
+    update_role_rates
+)
+from .utils import clear_default_role, create_author_contributions, create_feature_type_rates
 
 
 @receiver(post_save, sender=FeatureType)
 def update_feature_type_rates(sender, instance, created, *args, **kwargs):
     """
-    Creates a default FeatureTypeRate for each role after the creation of a FeatureTypeRate.
+    Creates a default FeatureTypeRate for each role after the creation of a FeatureType.
     """
     if created:
-        for role in ContributorRole.objects.all():
-            FeatureTypeRate.objects.create(role=role, feature_type=instance, rate=0)
+        create_feature_type_rates(feature_types=FeatureType.objects.filter(pk=instance.pk))
 
 
-@receiver(post_save, sender=ContributorRole)
-def call_update_role_rates(sender, instance, *args, **kwargs):
-    update_role_rates.delay(instance.pk)
+@receiver(post_save, sender=FlatRate)
+@receiver(post_delete, sender=FlatRate)
+@receiver(post_save, sender=HourlyRate)
+@receiver(post_delete, sender=HourlyRate)
+def update_role_rate_pay(sender, instance, *args, **kwargs):
+    # Stale right away, even if the recompute is delayed or lost
+    bump_rate_version(instance.role_id)
+    update_role_rates.delay(instance.role_id)
+
+
+@receiver(post_save, sender=FeatureTypeRate)
+@receiver(post_delete, sender=FeatureTypeRate)
+def update_feature_type_pay(sender, instance, *args, **kwargs):
+    if instance.role_id is not None:
+        invalidate_pay(Contribution.objects.filter(
+            role__pk=instance.role_id,
+            content__feature_type__pk=instance.feature_type_id
+        ))
+        update_feature_type_rate_pay.delay(instance.role_id, instance.feature_type_id)
+
+
+def update_contributor_role_pay(contributor_id, role_id):
+    invalidate_pay(Contribution.objects.filter(contributor__pk=contributor_id, role__pk=role_id))
+    update_override_profile_pay.delay(contributor_id, role_id)
+
+
+@receiver(post_save, sender=OverrideProfile)
+@receiver(post_delete, sender=OverrideProfile)
+def update_profile_pay(sender, instance, *args, **kwargs):
+    update_contributor_role_pay(instance.contributor_id, instance.role_id)
+
+
+@receiver(post_save, sender=FlatRateOverride)
+@receiver(post_delete, sender=FlatRateOverride)
+@receiver(post_save, sender=HourlyOverride)
+@receiver(post_delete, sender=HourlyOverride)
+@receiver(post_save, sender=FeatureTypeOverride)
+@receiver(post_delete, sender=FeatureTypeOverride)
+def update_override_pay(sender, instance, *args, **kwargs):
+    profile = OverrideProfile.objects.filter(
+        pk=instance.profile_id
+    ).values_list("contributor_id", "role_id").first()
+    # Otherwise the profile is being deleted, which updates pay itself
+    if profile is not None:
+        update_contributor_role_pay(*profile)
+
+
+@receiver(post_save, sender=ContributionOverride)
+@receiver(post_delete, sender=ContributionOverride)
+@receiver(post_save, sender=ManualRate)
+@receiver(post_delete, sender=ManualRate)
+def update_rate_contribution_pay(sender, instance, *args, **kwargs):
+    invalidate_pay(Contribution.objects.filter(pk=instance.contribution_id))
+    update_contribution_pay.delay([instance.contribution_id])
 
 
 @receiver(m2m_changed, sender=Content.authors.through)
-def update_contributions(sender, instance, action, model, pk_set, **kwargs):
+def update_contributions(sender, instance, action, reverse, model, pk_set, **kwargs):
     """Creates a contribution for each author added to an article.
     """
-    if action != 'pre_add':
+    if action != 'post_add' or not pk_set:
         return
+    if reverse:
+        # Articles added to an author
+        create_author_contributions(pk_set, [instance.pk])
     else:
-        for author in model.objects.filter(pk__in=pk_set):
-            update_content_contributions(instance, author)
+        create_author_contributions([instance.pk], pk_set)
+
+
+@receiver(post_save, sender=ContributorRole)
+@receiver(post_delete, sender=ContributorRole)
+def reset_default_role(sender, instance, **kwargs):
+    clear_default_role()
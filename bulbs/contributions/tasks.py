@@ -16,15 +16,51 @@ def check_and_update_freelanceprofiles(content_id):
 
 @shared_task(default_retry_delay=5)
 def update_role_rates(contributor_role_pk):
-    for contribution in Contribution.objects.filter(role__pk=contributor_role_pk):
-        contribution.index()
+    from .ledger import update_pay
+    # The role's `rate_version` was bumped when its rates changed
+    update_pay(Contribution.objects.filter(role__pk=contributor_role_pk))
 
 
 @shared_task(default_retry_delay=5)
-def run_contributor_email_report(**kwargs):
+def update_feature_type_rate_pay(contributor_role_pk, featuretype_pk):
+    from .ledger import update_pay
+    update_pay(Contribution.objects.filter(
+        role__pk=contributor_role_pk,
+        content__feature_type__pk=featuretype_pk
+    ))
+
+
+@shared_task(default_retry_delay=5)
+def update_override_profile_pay(contributor_pk, contributor_role_pk):
+    from .ledger import update_pay
+    update_pay(Contribution.objects.filter(
+        contributor__pk=contributor_pk,
+        role__pk=contributor_role_pk
+    ))
+
+
+@shared_task(default_retry_delay=5)
+def update_contribution_pay(contribution_pks):
+    from .ledger import update_pay
+    update_pay(Contribution.objects.filter(pk__in=contribution_pks))
+
+
+@shared_task(default_retry_delay=5)
+def index_app_chunk(model_label, pks):
+    from django.apps import apps
+    from .indexing import index_chunk
+    index_chunk(apps.get_model(model_label), pks)
+
+
+@shared_task(bind=True, default_retry_delay=5)
+def run_contributor_email_report(self, **kwargs):
     from .email import EmailReport
     report = EmailReport(**kwargs)
-    report.send_mass_contributor_emails()
+    failed = report.send_mass_contributor_emails()
+    if failed:
+        # Resume with only the contributors whose email failed
+        kwargs["contributor_ids"] = failed
+        raise self.retry(kwargs=kwargs)
 
 
 @shared_task(default_retry_delay=5)
@@ -34,3 +70,9 @@ def check_and_run_send_byline_email(content_id, new_byline):
     removed_bylines = content.authors.exclude(pk__in=[c.id for c in new_byline])
     if removed_bylines:
         send_byline_email(content, removed_bylines)
+
+
+@shared_task(default_retry_delay=5)
+def generate_report(report_job_pk):
+    from .jobs import run_job
+    run_job(report_job_pk)
@@ -0,0 +1,110 @@
+"""
+Contribution pay totals, aggregated in Elasticsearch.
+
+`get_totals` groups a search of contributions by one of their indexed ids (`contributor.id` or
+`content.id`) and returns, in a single request, the pay and number of contributions of each
+group, broken down by role and by feature type:
+
+    totals = get_totals(Contribution.search_objects.search(), "contributor")
+
+Totals are summed from the indexed `pay` of each contribution (see `bulbs.contributions.ledger`),
+so they are only as current as the index.
+"""
+from django.contrib.auth import get_user_model
+
+from bulbs.content.models import Content
+from .models import ContributorRole
+
+
+def add_pay(agg):
+    """Adds the pay sum to a bucket aggregation, returning it for chaining."""
+    agg.metric("pay", "sum", field="pay")
+    return agg
+
+
+def add_breakdowns(agg):
+    """Breaks the pay of a bucket aggregation down by role and by feature type."""
+    add_pay(agg)
+    # Roles are nested documents, so their pay is summed back on the contributions
+    add_pay(agg.bucket("roles", "nested", path="role").bucket(
+        "ids", "terms", field="role.id", size=0
+    ).bucket("contributions", "reverse_nested"))
+    add_pay(agg.bucket("feature_types", "terms", field="content.feature_type.slug", size=0))
+
+
+def get_contributor_labels(ids):
+    rows = get_user_model().objects.filter(pk__in=ids).values_list(
+        "pk", "username", "first_name", "last_name"
+    )
+    return dict((pk, {
+        "username": username,
+        "first_name": first_name,
+        "last_name": last_name,
+    }) for pk, username, first_name, last_name in rows)
+
+
+def get_content_labels(ids):
+    rows = Content.objects.filter(pk__in=ids).values_list("pk", "title")
+    return dict((pk, {"title": title}) for pk, title in rows)
+
+
+GROUPS = {
+    "contributor": get_contributor_labels,
+    "content": get_content_labels,
+}
+
+
+def get_totals(search, group):
+    """
+    Returns the pay totals of the contributions matched by `search`, grouped by `group`
+    ("contributor" or "content"), in descending order of pay.
+
+    :param search: a search of `Contribution` documents
+    :param group: the indexed object to group contributions by
+    :return: `dict` with the overall "pay" and "contributions", and the groups as "results"
+    """
+    if group not in GROUPS:
+        raise ValueError("Contribution totals are grouped by one of {}.".format(sorted(GROUPS)))
+
+    search = search.extra(size=0)
+    add_breakdowns(search.aggs.bucket(
+        "groups", "terms", field="{}.id".format(group), size=0, order={"pay": "desc"}
+    ))
+    add_pay(search.aggs)
+    response = search.execute()
+    aggregations = response.aggregations
+
+    buckets = aggregations.groups.buckets
+    role_ids = set(
+        role["key"] for bucket in buckets for role in bucket.roles.ids.buckets
+    )
+    role_names = dict(ContributorRole.objects.filter(pk__in=role_ids).values_list("pk", "name"))
+    labels = GROUPS[group](set(bucket["key"] for bucket in buckets))
+
+    results = []
+    for bucket in buckets:
+        row = {
+            "id": bucket["key"],
+            "pay": bucket.pay.value,
+            "contributions": bucket["doc_count"],
+            "roles": [{
+                "id": role["key"],
+                "name": role_names.get(role["key"]),
+                "pay": role.contributions.pay.value,
+                "contributions": role["doc_count"],
+            } for role in bucket.roles.ids.buckets],
+            "feature_types": [{
+                "slug": feature_type["key"],
+                "pay": feature_type.pay.value,
+                "contributions": feature_type["doc_count"],
+            } for feature_type in bucket.feature_types.buckets],
+        }
+        row.update(labels.get(bucket["key"], {}))
+        results.append(row)
+
+    return {
+        "pay": aggregations.pay.value,
+        "contributions": response.hits.total,
+        "count": len(results),
+        "results": results,
+    }
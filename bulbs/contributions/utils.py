@@ -1,12 +1,29 @@
+import hashlib
+from collections import OrderedDict
+
 from django.conf import settings
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Case, IntegerField, Value, When
 
-from .models import Contribution, ContributorRole, FreelanceProfile, FEATURETYPE
+from bulbs.content.models import Content, FeatureType
+from .models import (
+    Contribution, ContributorRole, FeatureTypeOverride, FeatureTypeRate, FlatRate,
+    FlatRateOverride, FreelanceProfile, HourlyOverride, HourlyRate, OverrideProfile, FEATURETYPE
+)
 
 
-def merge_roles(dominant_name, deprecated_name):
+def merge_roles(dominant_name, deprecated_name, dry_run=False):
     """
-    Merges a deprecated role into a dominant role.
+    Merges a deprecated role into a dominant role, in one transaction.
+
+    Rates, contributions and override profiles are re-pointed with one UPDATE per table, then the
+    contributions of the dominant role are repriced and everything moved is reindexed in bulk.
+
+    :param dry_run: only count what would change
+    :return: the number of objects moved (or removed) per kind, or `None` if either role is
+    missing or ambiguous
     """
     dominant_qs = ContributorRole.objects.filter(name=dominant_name)
     if not dominant_qs.exists() or dominant_qs.count() != 1:
@@ -17,49 +34,138 @@ def merge_roles(dominant_name, deprecated_name):
         return
     deprecated = deprecated_qs.first()
 
-    # Update Rates
+    # Rates: the latest flat and hourly rates move unless the dominant role has its own
+    flat_rates = FlatRate.objects.none()
     if not dominant.flat_rates.exists() and deprecated.flat_rates.exists():
-        flat_rate = deprecated.flat_rates.first()
-        flat_rate.role = dominant
-        flat_rate.save()
+        flat_rates = FlatRate.objects.filter(pk=deprecated.flat_rates.first().pk)
 
+    hourly_rates = HourlyRate.objects.none()
     if not dominant.hourly_rates.exists() and deprecated.hourly_rates.exists():
-        hourly_rate = deprecated.hourly_rates.first()
-        hourly_rate.role = dominant
-        hourly_rate.save()
-
-    for ft_rate in deprecated.feature_type_rates.all():
-        dom_ft_rate = dominant.feature_type_rates.filter(feature_type=ft_rate.feature_type)
-
-        if dom_ft_rate.exists() and dom_ft_rate.first().rate == 0:
-            dom_ft_rate.first().delete()
-
-        if not dom_ft_rate.exists():
-            ft_rate.role = dominant
-            ft_rate.save()
-
-    # Update contributions
-    for contribution in deprecated.contribution_set.all():
-        contribution.role = dominant
-        contribution.save()
-
-    # Update overrides
-    for override in deprecated.overrides.all():
-        dom_override_qs = dominant.overrides.filter(contributor=override.contributor)
-        if not dom_override_qs.exists():
-            override.role = dominant
-            override.save()
-        else:
-            dom_override = dom_override_qs.first()
-            for flat_override in override.override_flatrate.all():
-                flat_override.profile = dom_override
-                flat_override.save()
-            for hourly_override in override.override_hourly.all():
-                hourly_override.profile = dom_override
-                hourly_override.save()
-            for feature_type_override in override.override_feature_type.all():
-                feature_type_override.profile = dom_override
-                feature_type_override.save()
+        hourly_rates = HourlyRate.objects.filter(pk=deprecated.hourly_rates.first().pk)
+
+    # Feature type rates move, replacing zero rates of the dominant role
+    deprecated_feature_types = list(
+        deprecated.feature_type_rates.values_list("feature_type_id", flat=True)
+    )
+    replaced_feature_type_rates = dominant.feature_type_rates.filter(
+        feature_type__in=deprecated_feature_types, rate=0
+    )
+    kept_feature_types = list(dominant.feature_type_rates.filter(
+        feature_type__in=deprecated_feature_types
+    ).exclude(rate=0).values_list("feature_type_id", flat=True))
+    feature_type_rates = deprecated.feature_type_rates.exclude(feature_type__in=kept_feature_types)
+
+    # Override profiles move, unless the contributor has one for the dominant role, which then
+    # takes the overrides of the deprecated one
+    dominant_profiles = dict(dominant.overrides.values_list("contributor_id", "pk"))
+    merged_profiles = dict(
+        (pk, dominant_profiles[contributor_id])
+        for pk, contributor_id in deprecated.overrides.values_list("pk", "contributor_id")
+        if contributor_id in dominant_profiles
+    )
+    profiles = deprecated.overrides.exclude(pk__in=list(merged_profiles))
+    overrides = [
+        model.objects.filter(profile__in=list(merged_profiles))
+        for model in (FlatRateOverride, HourlyOverride, FeatureTypeOverride)
+    ]
+
+    contributions = deprecated.contribution_set.all()
+
+    moved = [
+        ("flat_rates", list(flat_rates.values_list("pk", flat=True))),
+        ("hourly_rates", list(hourly_rates.values_list("pk", flat=True))),
+        ("feature_type_rates", list(feature_type_rates.values_list("pk", flat=True))),
+        ("overrides", list(profiles.values_list("pk", flat=True))),
+    ] + [
+        (override_qs.model._meta.model_name, list(override_qs.values_list("pk", flat=True)))
+        for override_qs in overrides
+    ]
+    summary = OrderedDict((name, len(pks)) for name, pks in moved)
+    summary["replaced_feature_type_rates"] = replaced_feature_type_rates.count()
+    summary["contributions"] = contributions.count()
+    if dry_run:
+        return summary
+
+    with transaction.atomic():
+        replaced_feature_type_rates.delete()
+        flat_rates.update(role=dominant)
+        hourly_rates.update(role=dominant)
+        feature_type_rates.update(role=dominant)
+        profiles.update(role=dominant)
+        for override_qs in overrides:
+            if not merged_profiles:
+                break
+            override_qs.update(profile=Case(*[
+                When(profile=deprecated_pk, then=Value(dominant_pk))
+                for deprecated_pk, dominant_pk in merged_profiles.items()
+            ], output_field=IntegerField()))
+        contributions.update(role=dominant)
+
+        # Updates skip the signals that would reprice and reindex
+        from .ledger import bump_rate_version, update_pay
+        bump_rate_version(dominant.pk)
+        update_pay(Contribution.objects.filter(role=dominant))
+
+    from .indexing import bulk_index
+    models = (
+        FlatRate, HourlyRate, FeatureTypeRate, OverrideProfile,
+        FlatRateOverride, HourlyOverride, FeatureTypeOverride
+    )
+    for model, (_, pks) in zip(models, moved):
+        bulk_index(model.objects.filter(pk__in=pks))
+    return summary
+
+
+def create_feature_type_rates(roles=None, feature_types=None):
+    """
+    Creates the missing zero `FeatureTypeRate` of every pair of `roles` and `feature_types`
+    (querysets, all of them by default) with one `bulk_create`, skipping the pairs that already
+    have a rate. Returns the number of rates created.
+    """
+    if roles is None:
+        roles = ContributorRole.objects.all()
+    if feature_types is None:
+        feature_types = FeatureType.objects.all()
+    role_ids = set(roles.values_list("pk", flat=True))
+    feature_type_ids = set(feature_types.values_list("pk", flat=True))
+    rates = FeatureTypeRate.objects.filter(role__in=role_ids, feature_type__in=feature_type_ids)
+
+    def get_missing():
+        existing = set(rates.values_list("role_id", "feature_type_id"))
+        return [
+            (role_id, feature_type_id)
+            for role_id in role_ids for feature_type_id in feature_type_ids
+            if (role_id, feature_type_id) not in existing
+        ]
+
+    def create(missing):
+        with transaction.atomic():
+            FeatureTypeRate.objects.bulk_create([
+                FeatureTypeRate(role_id=role_id, feature_type_id=feature_type_id, rate=0)
+                for role_id, feature_type_id in missing
+            ])
+
+    missing = get_missing()
+    if not missing:
+        return 0
+    try:
+        create(missing)
+    except IntegrityError:
+        # Some of the rates were created concurrently: skip those as well
+        missing = get_missing()
+        if not missing:
+            return 0
+        create(missing)
+
+    # `bulk_create` skips the signals that would reprice and index
+    from .indexing import bulk_index
+    from .ledger import update_pay
+    bulk_index(rates)
+    update_pay(Contribution.objects.filter(
+        role__in=set(role_id for role_id, _ in missing),
+        content__feature_type__in=set(feature_type_id for _, feature_type_id in missing)
+    ))
+    return len(missing)
 
 
 def get_forced_payment_contributions(start_date, end_date, qs=None):
@@ -78,14 +184,90 @@ def get_forced_payment_contributions(start_date, end_date, qs=None):
     return include, exclude
 
 
-def update_content_contributions(content, author):
-    if not Contribution.objects.filter(content=content, contributor=author).exists():
-        role_name = getattr(settings, 'DEFAULT_CONTRIBUTOR_ROLE', 'default')
-        role, created = ContributorRole.objects.get_or_create(name=role_name)
-        if created:
-            role.payment_type = FEATURETYPE
-            role.save()
-        Contribution.objects.create(content=content, contributor=author, role=role)
+DEFAULT_ROLE_CACHE_KEY = "contributions-default-role-{}"
+DEFAULT_ROLE_CACHE_TIMEOUT = 60
+
+
+def get_default_role_cache_key():
+    role_name = getattr(settings, 'DEFAULT_CONTRIBUTOR_ROLE', 'default')
+    return DEFAULT_ROLE_CACHE_KEY.format(hashlib.md5(role_name.encode("utf-8")).hexdigest())
+
+
+def get_default_role():
+    """Returns the role of contributions created for authors, creating it if needed."""
+    role_name = getattr(settings, 'DEFAULT_CONTRIBUTOR_ROLE', 'default')
+    role, created = ContributorRole.objects.get_or_create(name=role_name)
+    if created:
+        role.payment_type = FEATURETYPE
+        role.save()
+    cache.set(get_default_role_cache_key(), role.pk, DEFAULT_ROLE_CACHE_TIMEOUT)
+    return role
+
+
+def get_default_role_id():
+    """
+    Returns the id of the default role, kept briefly in the shared cache; saving or deleting
+    any role clears it for every process.
+    """
+    role_id = cache.get(get_default_role_cache_key())
+    if role_id is None:
+        role_id = get_default_role().pk
+    return role_id
+
+
+def clear_default_role(*args, **kwargs):
+    cache.delete(get_default_role_cache_key())
+
+
+def get_missing_author_contributions(content_ids, author_ids=None):
+    """
+    Returns the `(content id, author id)` pairs of the given content whose author has no
+    contribution to it, with one anti-join query.
+    """
+    through = Content.authors.through
+    content_field = Content.authors.field.m2m_field_name()
+    author_field = Content.authors.field.m2m_reverse_field_name()
+    qn = connection.ops.quote_name
+
+    pairs = through.objects.filter(**{"{}__in".format(content_field): list(content_ids)})
+    if author_ids is not None:
+        pairs = pairs.filter(**{"{}__in".format(author_field): list(author_ids)})
+    pairs = pairs.extra(where=[
+        "NOT EXISTS (SELECT 1 FROM {contribution} WHERE {contribution}.{content} = {through}.{m2m_content} "
+        "AND {contribution}.{contributor} = {through}.{m2m_author})".format(
+            contribution=qn(Contribution._meta.db_table),
+            content=qn(Contribution._meta.get_field("content").column),
+            contributor=qn(Contribution._meta.get_field("contributor").column),
+            through=qn(through._meta.db_table),
+            m2m_content=qn(through._meta.get_field(content_field).column),
+            m2m_author=qn(through._meta.get_field(author_field).column),
+        )
+    ])
+    return list(pairs.values_list(content_field, author_field).distinct())
+
+
+def create_author_contributions(content_ids, author_ids=None):
+    """
+    Creates a contribution with the default role for each author of the given content without
+    one, then stores their pay and indexes them in bulk. Returns the number created.
+    """
+    pairs = get_missing_author_contributions(content_ids, author_ids)
+    if not pairs:
+        return 0
+    role_id = get_default_role_id()
+    Contribution.objects.bulk_create([
+        Contribution(content_id=content_id, contributor_id=author_id, role_id=role_id)
+        for content_id, author_id in pairs
+    ])
+
+    # `bulk_create` skips `Contribution.save`, which would store their pay and index them
+    from .ledger import update_pay
+    update_pay(Contribution.objects.filter(
+        content__in=set(content_id for content_id, _ in pairs),
+        contributor__in=set(author_id for _, author_id in pairs),
+        pay_version__isnull=True
+    ))
+    return len(pairs)
 
 
 def import_payroll_names(lookup_string):
@@ -1,12 +1,19 @@
 """API Views and ViewSets"""
 
 import datetime
+import os
 
-from django.http import StreamingHttpResponse
+from django.http import Http404, StreamingHttpResponse
+from django.middleware.gzip import re_accepts_gzip
 from django.utils import dateparse, timezone
+from django.utils.cache import patch_vary_headers
+from django.utils.encoding import force_bytes
+from django.utils.text import compress_sequence
 
 from elasticsearch_dsl import filter as es_filter
-from rest_framework import viewsets, routers, mixins
+from rest_framework import viewsets, routers, mixins, status
+from rest_framework.decorators import detail_route
+from rest_framework.response import Response
 from rest_framework.settings import api_settings
 from rest_framework_nested import routers as nested_routers
 
@@ -15,7 +22,7 @@ from bulbs.content.filters import FeatureTypes, Tags
 from .filters import ESPublishedFilterBackend, StartEndFilterBackend
 from .models import (
     ContributorRole, Contribution, FeatureTypeRate, FlatRate, FreelanceProfile, HourlyRate,
-    LineItem, OverrideProfile, ReportContent, MANUAL
+    LineItem, OverrideProfile, ReportContent, ReportJob, MANUAL
 )
 from .renderers import (ContributionReportingRenderer,
                         ContentReportingRenderer,
@@ -25,23 +32,37 @@ from .csv_serializers import ContributionCSVSerializer, LineItemCSVSerializer
 from .serializers import (
     ContributorRoleSerializer, ContributionReportingSerializer, ContentReportingSerializer,
     FeatureTypeRateSerializer, FlatRateSerializer, FreelanceProfileSerializer,
-    HourlyRateSerializer, LineEntrySerializer, OverrideProfileSerializer
+    HourlyRateSerializer, LineEntrySerializer, OverrideProfileSerializer, ReportJobSerializer
 )
+from .jobs import get_or_create_job
+from .totals import get_totals
 from .utils import get_forced_payment_contributions
 
 
 class BaseReportViewSet(viewsets.GenericViewSet, mixins.ListModelMixin):
 
+    def use_gzip(self, request):
+        """CSV reports are compressed when asked for with `?gzip=true`."""
+        if self.request.QUERY_PARAMS.get('gzip') != 'true':
+            return False
+        return bool(re_accepts_gzip.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
+
     def list(self, request):
         if "csv" == self.request.QUERY_PARAMS.get('format'):
-            resp = StreamingHttpResponse(request.accepted_renderer.render(
+            content = request.accepted_renderer.render(
                 {'queryset': self.get_queryset(),
                  'serializer': self.get_serializer_class(),
-                 'context': self.get_serializer_context()}),
-                content_type="text/csv",
-            )
+                 'context': self.get_serializer_context()})
+            gzip = self.use_gzip(request)
+            if gzip:
+                content = compress_sequence(force_bytes(line) for line in content)
+
+            resp = StreamingHttpResponse(content, content_type="text/csv")
 
             resp['Content-Disposition'] = 'attachment; filename="{}.csv"'.format(self.csv_filename)
+            if gzip:
+                resp['Content-Encoding'] = 'gzip'
+                patch_vary_headers(resp, ('Accept-Encoding',))
 
             return resp
         else:
@@ -189,25 +210,15 @@ class LineItemReportingViewSet(BaseReportViewSet):
         if end:
             end = timezone.datetime.strptime(end, "%Y-%m-%d")
             end += timezone.timedelta(days=1)
-        return LineItem.objects.filter(payment_date__range=(start, end))
-
+        return LineItem.objects.filter(
+            payment_date__range=(start, end)
+        ).select_related("contributor__freelanceprofile")
 
-class ReportingViewSet(BaseReportViewSet):
 
-    renderer_classes = tuple(
-        api_settings.DEFAULT_RENDERER_CLASSES
-    ) + (ContributionReportingRenderer, )
-    filter_backends = (ESPublishedFilterBackend,)
-    paginate_by = 20
-    csv_filename = 'ContributionReport'
-
-    def get_serializer_class(self):
-        format = self.request.QUERY_PARAMS.get('format', None)
-        if format == 'csv':
-            return ContributionCSVSerializer
-        return ContributionReportingSerializer
+class ContributionSearchMixin(object):
+    """Filters a search of contributions by the reporting query parameters."""
 
-    def get_queryset(self):
+    def get_contribution_search(self):
         qs = Contribution.search_objects.search()
 
         feature_types = self.request.QUERY_PARAMS.getlist('feature_types')
@@ -233,11 +244,28 @@ class ReportingViewSet(BaseReportViewSet):
                 es_filter.Term(**{'contributor.is_freelance': is_freelance})
             )
 
-        qs = qs.sort('id')
-
         return ESPublishedFilterBackend().filter_queryset(self.request, qs, None)
 
 
+class ReportingViewSet(ContributionSearchMixin, BaseReportViewSet):
+
+    renderer_classes = tuple(
+        api_settings.DEFAULT_RENDERER_CLASSES
+    ) + (ContributionReportingRenderer, )
+    filter_backends = (ESPublishedFilterBackend,)
+    paginate_by = 20
+    csv_filename = 'ContributionReport'
+
+    def get_serializer_class(self):
+        format = self.request.QUERY_PARAMS.get('format', None)
+        if format == 'csv':
+            return ContributionCSVSerializer
+        return ContributionReportingSerializer
+
+    def get_queryset(self):
+        return self.get_contribution_search().sort('id')
+
+
 class FreelanceReportingViewSet(BaseReportViewSet):
 
     renderer_classes = tuple(api_settings.DEFAULT_RENDERER_CLASSES) + (FreelanceProfileRenderer, )
@@ -299,6 +327,72 @@ class FreelanceReportingViewSet(BaseReportViewSet):
         return qs
 
 
+class ReportJobViewSet(mixins.CreateModelMixin, mixins.RetrieveModelMixin, mixins.ListModelMixin,
+                       viewsets.GenericViewSet):
+    """
+    CSV reports generated in the background: POST a report and its filters (the query
+    parameters of the report endpoint), poll the job, then download its file once complete.
+    """
+
+    queryset = ReportJob.objects.all()
+    serializer_class = ReportJobSerializer
+    paginate_by = 20
+
+    def create(self, request, *args, **kwargs):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        user = request.user if request.user.is_authenticated() else None
+        job, created = get_or_create_job(
+            serializer.validated_data["report"],
+            serializer.validated_data.get("filters", {}),
+            user=user
+        )
+        job.refresh_from_db()
+        return Response(
+            self.get_serializer(job).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+    @detail_route(methods=["get"])
+    def download(self, request, pk=None):
+        job = self.get_object()
+        if job.status != ReportJob.COMPLETE:
+            raise Http404("Report is not complete.")
+        resp = StreamingHttpResponse(job.file.chunks(), content_type="text/csv")
+        resp['Content-Disposition'] = 'attachment; filename="{}"'.format(
+            os.path.basename(job.file.name)
+        )
+        return resp
+
+
+class BaseTotalsViewSet(ContributionSearchMixin, viewsets.ViewSet):
+    """Pay totals of the filtered contributions, grouped by `group` in a single search."""
+
+    group = None
+
+    def list(self, request):
+        return Response(get_totals(self.get_contribution_search(), self.group))
+
+
+class ContributorTotalsViewSet(BaseTotalsViewSet):
+
+    group = "contributor"
+
+
+class ContentTotalsViewSet(BaseTotalsViewSet):
+
+    group = "content"
+
+
+# Reports that can be generated by a `ReportJob`
+REPORT_VIEWSETS = {
+    ReportJob.CONTRIBUTION: ReportingViewSet,
+    ReportJob.CONTENT: ContentReportingViewSet,
+    ReportJob.FREELANCE: FreelanceReportingViewSet,
+    ReportJob.LINE_ITEM: LineItemReportingViewSet,
+}
+
+
 api_v1_router = routers.DefaultRouter()
 api_v1_router.register(r"line-items", LineItemViewSet, base_name="line-items")
 
@@ -321,3 +415,8 @@ api_v1_router.register(r"contentreporting", ContentReportingViewSet, base_name="
 api_v1_router.register(
     r"freelancereporting", FreelanceReportingViewSet, base_name="freelancereporting"
 )
+api_v1_router.register(
+    r"contributor-totals", ContributorTotalsViewSet, base_name="contributor-totals"
+)
+api_v1_router.register(r"content-totals", ContentTotalsViewSet, base_name="content-totals")
+api_v1_router.register(r"report-jobs", ReportJobViewSet, base_name="report-jobs")
@@ -0,0 +1 @@
+default_app_config = 'bulbs.feeds.apps.FeedsConfig'
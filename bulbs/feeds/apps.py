@@ -0,0 +1,10 @@
+from django.apps import AppConfig
+
+
+class FeedsConfig(AppConfig):
+    name = 'bulbs.feeds'
+
+    def ready(self):
+        # Recommended way to import signals in Django 1.7+
+        from bulbs.feeds.signals import connect_signals
+        connect_signals()
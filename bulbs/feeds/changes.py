@@ -0,0 +1,133 @@
+"""
+Incremental changes feed.
+
+Content is walked in `(position, id)` order, starting after an opaque cursor, where the position is
+when it last changed or went live (see `get_position`). Each page asks Elasticsearch for the
+documents sorting after the cursor (the same range that `search_after` expresses on newer
+Elasticsearch versions), so a page costs the same however far into the feed a consumer is. Deleted
+and trashed content no longer has a document; it is returned from `ContentTombstone` rows, merged
+into the same order.
+"""
+import base64
+import binascii
+import calendar
+
+from django.db.models import Q
+from django.utils import timezone
+
+from elasticsearch_dsl import filter as es_filter
+
+from bulbs.content.models import Content, ContentTombstone
+
+
+DEFAULT_LIMIT = 100
+MAX_LIMIT = 500
+
+EPOCH = timezone.datetime(1970, 1, 1, tzinfo=timezone.utc)
+
+
+def to_millis(value):
+    return calendar.timegm(value.utctimetuple()) * 1000 + value.microsecond // 1000
+
+
+def from_millis(millis):
+    return EPOCH + timezone.timedelta(milliseconds=millis)
+
+
+def encode_cursor(millis, pk):
+    cursor = "{}:{}".format(millis, pk).encode("utf-8")
+    return base64.urlsafe_b64encode(cursor).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Returns the `(last_modified millis, id)` of a cursor. Raises ValueError if malformed."""
+    try:
+        decoded = base64.urlsafe_b64decode(str(cursor + "=" * (-len(cursor) % 4)))
+        millis, pk = decoded.decode("utf-8").split(":")
+        return int(millis), int(pk)
+    except (TypeError, UnicodeDecodeError, binascii.Error):
+        raise ValueError("Invalid cursor: {}".format(cursor))
+
+
+def get_position(content, now):
+    """
+    Returns when content sorts in the feed: when it last changed or, if it is live, when it went
+    live if that is later. Scheduled content sorts (as not live) by its last change until its
+    publish time passes, then again at its publish time.
+    """
+    if content.published and content.published <= now:
+        return max(content.last_modified, content.published)
+    return content.last_modified
+
+
+def get_changed_content(field, cursor, limit, now):
+    """Returns up to `limit` documents in `(field, id)` order after `cursor`."""
+    search = Content.search_objects.search(published=False).sort(field, "id")
+    if cursor:
+        millis, pk = cursor
+        search = search.filter(es_filter.Bool(should=[
+            es_filter.Range(**{field: {"gt": millis}}),
+            es_filter.Bool(must=[
+                es_filter.Term(**{field: millis}),
+                es_filter.Range(id={"gt": pk}),
+            ]),
+        ]))
+    if field == "published":
+        search = search.filter(es_filter.Range(published={"lte": to_millis(now)}))
+    return list(search.extra(size=limit))
+
+
+def get_tombstones(cursor, limit):
+    tombstones = ContentTombstone.objects.order_by("last_modified", "content_id")
+    if cursor:
+        millis, pk = cursor
+        last_modified = from_millis(millis)
+        tombstones = tombstones.filter(
+            Q(last_modified__gt=last_modified) | Q(last_modified=last_modified, content_id__gt=pk)
+        )
+    return list(tombstones[:limit])
+
+
+def get_changes(cursor=None, limit=DEFAULT_LIMIT, now=None):
+    """
+    Returns up to `limit` changes after `cursor`, as `(cursor, content, deleted)` tuples.
+
+    `content` is a `Content` instance, or a `ContentTombstone` when `deleted` is True.
+
+    Content sorts by `get_position`, which Elasticsearch can't sort on, so it is read in both
+    `last_modified` and `published` order: every position after the cursor is after it in one
+    of them, and neither sorts content later than its position. Changes are only returned up to
+    the point that all of the pages read have reached.
+    """
+    now = now or timezone.now()
+    while True:
+        modified = get_changed_content("last_modified", cursor, limit, now)
+        # Without a cursor, all content is read in `last_modified` order already
+        published = get_changed_content("published", cursor, limit, now) if cursor else []
+        tombstones = get_tombstones(cursor, limit)
+
+        # Anything not read sorts after the end of every page that was cut off at `limit`
+        ends = []
+        if len(modified) == limit:
+            ends.append((to_millis(modified[-1].last_modified), modified[-1].id))
+        if len(published) == limit:
+            ends.append((to_millis(published[-1].published), published[-1].id))
+        if len(tombstones) == limit:
+            ends.append((to_millis(tombstones[-1].last_modified), tombstones[-1].content_id))
+        end = min(ends) if ends else None
+
+        changes = {}
+        for content in modified + published:
+            position = (to_millis(get_position(content, now)), content.id)
+            changes[("content", content.id)] = (position, content, False)
+        for tombstone in tombstones:
+            position = (to_millis(tombstone.last_modified), tombstone.content_id)
+            changes[("tombstone", tombstone.content_id)] = (position, tombstone, True)
+        changes = sorted(
+            (change for change in changes.values() if end is None or change[0] <= end),
+            key=lambda change: change[0]
+        )
+        if changes or end is None:
+            return changes[:limit]
+        # Everything read sorts past the pages' end: read on from there
+        cursor = end
@@ -1,5 +1,45 @@
+from django.db.models.query import prefetch_related_objects
+
+from djes.factory import shallow_class_factory
 from rest_framework import serializers
 
+from bulbs.content import TagCache
+
+
+def is_search_result(obj):
+    """
+    Search results are built from their document, with their tags already loaded. Their class is
+    the djes shallow class of their model, unlike `.only()`/`.defer()` instances, which are also
+    deferred.
+    """
+    return type(obj) is shallow_class_factory(type(obj))
+
+
+class GlanceContentListSerializer(serializers.ListSerializer):
+    """
+    Serializes a page of content at once: tags are fetched in one query for the whole page (and
+    their popularity in one Elasticsearch request), and links are joined to one absolute prefix.
+    """
+
+    def to_representation(self, data):
+        items = list(data.all() if hasattr(data, "all") else data)
+
+        from_db = [obj for obj in items if not is_search_result(obj)]
+        if from_db:
+            prefetch_related_objects(from_db, ["tags"])
+
+        tag_counts = TagCache.count_many(set(
+            tag.slug for obj in items for tag in obj.tags.all()
+        ))
+
+        self.child.context["tag_counts"] = tag_counts
+        self.child.context["link_prefix"] = self.context["request"].build_absolute_uri("/")[:-1]
+        try:
+            return [self.child.to_representation(obj) for obj in items]
+        finally:
+            del self.child.context["tag_counts"]
+            del self.child.context["link_prefix"]
+
 
 class GlanceContentSerializer(serializers.Serializer):
 
@@ -20,6 +60,16 @@ class GlanceContentSerializer(serializers.Serializer):
         child=serializers.ListField(
             child=serializers.CharField()))
 
+    class Meta:
+        list_serializer_class = GlanceContentListSerializer
+
+    def get_link(self, obj):
+        url = obj.get_absolute_url()
+        link_prefix = self.context.get("link_prefix")
+        if link_prefix is not None and url.startswith("/") and not url.startswith("//"):
+            return link_prefix + url
+        return self.context['request'].build_absolute_uri(url)
+
     def to_representation(self, obj):
         return {
             'type': 'post',
@@ -31,10 +81,10 @@ class GlanceContentSerializer(serializers.Serializer):
             'images': {
                 'post-16-9-thumbnail': obj.thumbnail.get_crop_url(ratio='16x9'),
             },
-            'link': self.context['request'].build_absolute_uri(obj.get_absolute_url()),
+            'link': self.get_link(obj),
             # mparent(2016-05-04) TODO: Optional author support
             'authors': ["America's Finest News Source"],
             'tags': {
-                'section': [tag.name for tag in obj.ordered_tags()],
+                'section': [tag.name for tag in obj.ordered_tags(self.context.get("tag_counts"))],
             },
         }
@@ -0,0 +1,26 @@
+from django.apps import apps
+from django.db.models.signals import post_delete, post_save
+
+from bulbs.content.models import Content
+from bulbs.special_coverage.models import SpecialCoverage
+
+from .utils import bump_feed_generation
+
+
+def on_content_change(sender, instance, *args, **kwargs):
+    """Invalidates rendered feeds when content or special coverage queries change."""
+    bump_feed_generation()
+
+
+def connect_signals():
+    """Connects `on_content_change` to content models and special coverage only."""
+    senders = [model for model in apps.get_models() if issubclass(model, Content)]
+    senders.append(SpecialCoverage)
+    for sender in senders:
+        for signal in (post_save, post_delete):
+            signal.connect(
+                on_content_change,
+                sender=sender,
+                dispatch_uid="bulbs.feeds.on_content_change.{}.{}".format(
+                    sender._meta.app_label, sender._meta.model_name)
+            )
@@ -1,7 +1,7 @@
 from django.conf.urls import url, patterns
 from django.views.decorators.cache import cache_control
 
-from .views import GlanceFeedViewSet, RSSView, SpecialCoverageRSSView
+from .views import ChangesFeedView, GlanceFeedViewSet, RSSView, SpecialCoverageRSSView
 
 
 urlpatterns = patterns(
@@ -12,4 +12,5 @@ urlpatterns = patterns(
         name="sc-rss-feed"),
     url(r"^glance.json$", cache_control(max_age=300)(GlanceFeedViewSet.as_view({'get': 'list'})),
         name="glance-feed"),
+    url(r"^changes.json$", ChangesFeedView.as_view(), name="changes-feed"),
 )
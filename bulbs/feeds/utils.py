@@ -0,0 +1,87 @@
+"""Common utilities for feed caching and conditional requests."""
+import calendar
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import http_date, parse_etags, parse_http_date_safe, quote_etag
+
+
+FEED_CACHE_KEY = "feeds-rendered-{}-{}-{}"
+FEED_GENERATION_CACHE_KEY = "feeds-content-generation"
+
+DEFAULT_FEED_CACHE_TIMEOUT = 60 * 5
+
+
+def get_feed_cache_timeout():
+    return getattr(settings, "FEEDS_CACHE_TIMEOUT", DEFAULT_FEED_CACHE_TIMEOUT)
+
+
+def get_feed_generation():
+    """
+    Returns the current content generation.
+
+    The generation changes whenever feed content is saved or deleted, so rendered feeds cached
+    under an older generation are never served again.
+    """
+    generation = cache.get(FEED_GENERATION_CACHE_KEY)
+    if generation is None:
+        generation = int(time.time())
+        cache.add(FEED_GENERATION_CACHE_KEY, generation, None)
+    return generation
+
+
+def bump_feed_generation():
+    try:
+        cache.incr(FEED_GENERATION_CACHE_KEY)
+    except ValueError:
+        cache.set(FEED_GENERATION_CACHE_KEY, int(time.time()), None)
+
+
+def get_feed_cache_key(view_name, url):
+    url_hash = hashlib.md5(url.encode("utf-8")).hexdigest()
+    return FEED_CACHE_KEY.format(view_name, url_hash, get_feed_generation())
+
+
+def get_feed_last_modified(object_list):
+    """
+    Returns the newest modification of any item in a feed, or `None` for an empty feed.
+
+    Publish dates count as modifications, since scheduled content enters feeds without being
+    saved again.
+    """
+    last_modified = None
+    for content in object_list:
+        for value in (content.last_modified, content.published):
+            if value and (last_modified is None or value > last_modified):
+                last_modified = value
+    return last_modified
+
+
+def get_feed_etag(object_list):
+    """Returns an ETag identifying the items of a feed and their versions."""
+    versions = u",".join(
+        u"{}:{}".format(content.id, content.last_modified.isoformat() if content.last_modified else "")
+        for content in object_list
+    )
+    return hashlib.md5(versions.encode("utf-8")).hexdigest()
+
+
+def set_conditional_headers(response, etag, last_modified):
+    response["ETag"] = quote_etag(etag)
+    if last_modified:
+        response["Last-Modified"] = http_date(calendar.timegm(last_modified.utctimetuple()))
+
+
+def is_not_modified(request, etag, last_modified):
+    """Returns True if a conditional request can be answered with `304 Not Modified`."""
+    if_none_match = request.META.get("HTTP_IF_NONE_MATCH")
+    if if_none_match:
+        etags = parse_etags(if_none_match)
+        return etag in etags or "*" in etags
+
+    if_modified_since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE"))
+    if if_modified_since and last_modified:
+        return calendar.timegm(last_modified.utctimetuple()) <= if_modified_since
+    return False
@@ -1,9 +1,14 @@
 from elasticsearch_dsl.filter import Not, Type, Term
-from rest_framework import viewsets
+from rest_framework import status, viewsets
 from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import AllowAny
+from rest_framework.response import Response
+from rest_framework.views import APIView
 
+from django.core.cache import cache
+from django.http import HttpResponse, HttpResponseNotModified
 from django.template import RequestContext
+from django.utils import timezone
 from django.utils.timezone import now
 
 from bulbs.content.filters import Published
@@ -12,7 +17,12 @@ from bulbs.content.views import ContentListView
 from bulbs.special_coverage.models import SpecialCoverage
 from bulbs.super_features.utils import get_superfeature_model
 
+from .changes import DEFAULT_LIMIT, MAX_LIMIT, decode_cursor, encode_cursor, get_changes
 from .serializers import GlanceContentSerializer
+from .utils import (
+    get_feed_cache_key, get_feed_cache_timeout, get_feed_etag, get_feed_last_modified,
+    is_not_modified, set_conditional_headers
+)
 
 
 class RSSView(ContentListView):
@@ -26,8 +36,26 @@ class RSSView(ContentListView):
         return ["feeds/rss.xml", "feeds/_rss.xml"]
 
     def get(self, request, *args, **kwargs):
-        response = super(RSSView, self).get(request, *args, **kwargs)
-        response["Content-Type"] = "application/rss+xml"
+        # Rendered feeds are cached per URL until any content changes (see `bulbs.feeds.signals`).
+        cache_key = get_feed_cache_key(self.__class__.__name__, request.build_absolute_uri())
+        cached = cache.get(cache_key)
+        if cached is None:
+            response = super(RSSView, self).get(request, *args, **kwargs)
+            response.render()
+            cached = {
+                "content": response.content,
+                "etag": self.feed_etag,
+                "last_modified": self.feed_last_modified,
+            }
+            cache.set(cache_key, cached, get_feed_cache_timeout())
+        else:
+            response = HttpResponse(cached["content"])
+
+        if is_not_modified(request, cached["etag"], cached["last_modified"]):
+            response = HttpResponseNotModified()
+        else:
+            response["Content-Type"] = "application/rss+xml"
+        set_conditional_headers(response, cached["etag"], cached["last_modified"])
         return response
 
     def get_queryset(self):
@@ -42,14 +70,17 @@ class RSSView(ContentListView):
         context = super(RSSView, self).get_context_data(*args, **kwargs)
         context["full"] = (self.request.GET.get("full", "false").lower() == "true")
         context["images"] = (self.request.GET.get("images", "false").lower() == "true")
-        context["build_date"] = now()
+        object_list = context["page_obj"].object_list
+        self.feed_etag = get_feed_etag(object_list)
+        self.feed_last_modified = get_feed_last_modified(object_list)
+        context["build_date"] = self.feed_last_modified or now()
         context["title"] = self.feed_title
         context["feed_url"] = self.request.build_absolute_uri()
         context["search_url"] = self.request.build_absolute_uri(
             u"/search?%s" % self.request.META["QUERY_STRING"])
 
         # OK, so this is kinda brutal. Stay with me here.
-        for content in context["page_obj"].object_list:
+        for content in object_list:
             feed_path = content.get_absolute_url() + "?" + self.utm_params
             content.feed_url = self.request.build_absolute_uri(feed_path)
 
@@ -79,8 +110,6 @@ class GlanceFeedViewSet(viewsets.ReadOnlyModelViewSet):
     model = Content
     serializer_class = GlanceContentSerializer
 
-    queryset = Content.search_objects.search().sort('-last_modified').filter(Published())
-
     permission_classes = (AllowAny,)
 
     class GlancePageNumberPagination(PageNumberPagination):
@@ -89,3 +118,54 @@ class GlanceFeedViewSet(viewsets.ReadOnlyModelViewSet):
         max_page_size = 500
 
     pagination_class = GlancePageNumberPagination
+
+    def get_queryset(self):
+        # Built per request, so `Published()` filters on the current time
+        return Content.search_objects.search().sort('-last_modified').filter(Published())
+
+
+class ChangesFeedView(APIView):
+    """
+    Content changed since a cursor, oldest first.
+
+    Pass the `next` cursor of each response to get the changes after it. Content that was
+    deleted, trashed or isn't published is returned as `{"id": ..., "deleted": true}`; scheduled
+    content is returned again once its publish time passes.
+    """
+
+    permission_classes = (AllowAny,)
+
+    def get(self, request, *args, **kwargs):
+        cursor = request.query_params.get("cursor")
+        try:
+            decoded_cursor = decode_cursor(cursor) if cursor else None
+            limit = min(int(request.query_params.get("limit", DEFAULT_LIMIT)), MAX_LIMIT)
+            if limit < 1:
+                raise ValueError("Invalid limit: {}".format(limit))
+        except ValueError as e:
+            return Response({"detail": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+        now = timezone.now()
+        changes = get_changes(decoded_cursor, limit, now)
+        live = [
+            content for _, content, deleted in changes
+            if not deleted and content.published and content.published <= now
+        ]
+        serialized = GlanceContentSerializer(live, many=True, context={"request": request}).data
+        serialized = dict((result["id"], result) for result in serialized)
+
+        results = []
+        for change_cursor, content, deleted in changes:
+            cursor = encode_cursor(*change_cursor)
+            result = None if deleted else serialized.get(content.id)
+            if result is None:
+                results.append({
+                    "id": change_cursor[1],
+                    "modified": content.last_modified.isoformat(),
+                    "deleted": True,
+                })
+            else:
+                result["deleted"] = False
+                results.append(result)
+
+        return Response({"next": cursor, "results": results})
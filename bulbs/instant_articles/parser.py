@@ -4,6 +4,16 @@ from bs4 import BeautifulSoup
 import six
 
 
+FACEBOOK_SRC_REGEX = re.compile('https?://www.facebook.com/plugins/')
+INSTAGRAM_ID_REGEX = re.compile('https?://www.instagram.com/p/([^/]+)/')
+INSTAGRAM_HTML_ID_REGEX = re.compile('instagram.com/p/([^/]+)/')
+SOUNDCLOUD_SRC_REGEX = re.compile('https?://w.soundcloud.com/player/')
+VIMEO_SRC_REGEX = re.compile('https?://player.vimeo.com/video/')
+YOUTUBE_SRC_REGEX = re.compile('https?://www.youtube.com/embed/(.+)')
+
+TEXT_TAGS = frozenset(['p', 'blockquote', 'ol', 'ul', 'h3', 'h4'])
+
+
 def has_attr(attr):
     """Useful wrapper for filtering w/ BeautifulSoup 'find' methods
 
@@ -43,14 +53,11 @@ def parse_facebook(tag):
         if iframe:
             # Identify by 'src' URL
             src = iframe.attrs.get('src', '')
-            if re.match('https?://www.facebook.com/plugins/', src):
+            if FACEBOOK_SRC_REGEX.match(src):
                 return {'facebook': {'iframe': prepare_iframe(iframe)}}
 
 
 def parse_instagram(tag):
-    INSTAGRAM_ID_REGEX = re.compile('https?://www.instagram.com/p/([^/]+)/')
-    INSTAGRAM_HTML_ID_REGEX = re.compile('instagram.com/p/([^/]+)/')
-
     if tag.name == 'div' and tag.attrs.get('data-type') == 'embed':
         # IFRAME
         iframe = tag.find('iframe', 'instagram-media', has_attr('src'))
@@ -77,7 +84,7 @@ def parse_instagram(tag):
 
 
 def parse_text(tag):
-    if tag.name in ['p', 'blockquote', 'ol', 'ul', 'h3', 'h4']:
+    if tag.name in TEXT_TAGS:
         return {'text': {'raw': six.text_type(tag)}}
 
 
@@ -100,7 +107,7 @@ def parse_youtube(tag):
         if tag.attrs.get('data-type') == 'embed':
             iframe = tag.find('iframe')
             if iframe and iframe.has_attr('src'):
-                m = re.match('https?://www.youtube.com/embed/(.+)', iframe.attrs['src'])
+                m = YOUTUBE_SRC_REGEX.match(iframe.attrs['src'])
                 if m:
                     return {'youtube': {'video_id': m.group(1)}}
 
@@ -118,7 +125,7 @@ def parse_vimeo(tag):
         if iframe:
             # Identify by 'src' URL
             src = iframe.attrs.get('src', '')
-            if re.match('https?://player.vimeo.com/video/', src):
+            if VIMEO_SRC_REGEX.match(src):
                 return {'vimeo': {'iframe': prepare_iframe(iframe)}}
 
 
@@ -128,7 +135,7 @@ def parse_soundcloud(tag):
         if iframe:
             # Identify by 'src' URL
             src = iframe.attrs.get('src', '')
-            if re.match('https?://w.soundcloud.com/player/', src):
+            if SOUNDCLOUD_SRC_REGEX.match(src):
                 return {'soundcloud': {'iframe': prepare_iframe(iframe)}}
 
 
@@ -154,10 +161,40 @@ PARSERS = [
     parse_text,
 ]
 
+# Parsers that can match a tag, keyed by `(tag.name, data-type)`, in `PARSERS` order. Every
+# parser except `parse_text` only matches DIVs with one of these data types, so other tags skip
+# straight to `parse_text` (or to their children).
+PARSERS_BY_TYPE = {
+    ('div', 'image'): [parse_betty],
+    ('div', 'embed'): [
+        parse_facebook,
+        parse_imgur,
+        parse_instagram,
+        parse_onion_video,
+        parse_soundcloud,
+        parse_twitter,
+        parse_vimeo,
+        parse_youtube,
+    ],
+    ('div', 'embed-instagram'): [parse_instagram],
+    ('div', 'youtube'): [parse_youtube],
+}
+TEXT_PARSERS = [parse_text]
+
+
+def get_parsers(tag):
+    """Returns the parsers that can match a tag, in order of precedence."""
+    if tag.name is None:
+        # Strings and comments never match
+        return []
+    if tag.name in TEXT_TAGS:
+        return TEXT_PARSERS
+    return PARSERS_BY_TYPE.get((tag.name, tag.attrs.get('data-type')), [])
+
 
 def parse_tag(tag):
-    """Check a single tag against all possible parsers. First match wins."""
-    for parser in PARSERS:
+    """Check a single tag against all relevant parsers. First match wins."""
+    for parser in get_parsers(tag):
         match = parser(tag)
         if match:
             return match
@@ -186,4 +223,4 @@ def parse_body(html):
          {'youtube': {'video_id': 'abcdefg'}}]
 
     """
-    return parse_children(BeautifulSoup(html))
+    return parse_children(BeautifulSoup(html, 'lxml'))
@@ -1,44 +1,57 @@
+from django.core.signals import setting_changed
+from django.dispatch import receiver
 from django.template import loader
 
 
+# Compiled templates, keyed by `(renderer class, template name)`
+_template_cache = {}
+
+
+@receiver(setting_changed)
+def clear_template_cache(setting, **kwargs):
+    if setting in ("TEMPLATES", "TEMPLATE_DIRS", "TEMPLATE_LOADERS"):
+        _template_cache.clear()
+
+
 class BaseRenderer:
 
+    # Template attribute used to render each component type. "text" components are raw HTML.
+    TEMPLATE_ATTRIBUTES = {
+        "betty": "BETTY_TEMPLATE",
+        "facebook": "FACEBOOK_TEMPLATE",
+        "imgur": "IMGUR_TEMPLATE",
+        "instagram": "INSTAGRAM_TEMPLATE",
+        "onion_video": "ONION_VIDEO_TEMPLATE",
+        "soundcloud": "SOUNDCLOUD_TEMPLATE",
+        "twitter": "TWITTER_TEMPLATE",
+        "vimeo": "VIMEO_TEMPLATE",
+        "youtube": "YOUTUBE_TEMPLATE",
+    }
+
     def generate_body(self, intermediate):
-        body = []
-        for item in intermediate:
-            for key, values in item.items():
-                body.append(self.render_item(key, values).strip())
-        return '\n'.join(body)
+        return '\n'.join(
+            self.render_item(key, values).strip()
+            for item in intermediate
+            for key, values in item.items()
+        )
 
     def render_item(self, key, body):
         if key == "text":
             return body["raw"]
-        elif key == "betty":
-            return self.render(self.BETTY_TEMPLATE, body)
-        elif key == "facebook":
-            return self.render(self.FACEBOOK_TEMPLATE, body)
-        elif key == "imgur":
-            return self.render(self.IMGUR_TEMPLATE, body)
-        elif key == "instagram":
-            return self.render(self.INSTAGRAM_TEMPLATE, body)
-        elif key == "onion_video":
-            return self.render(self.ONION_VIDEO_TEMPLATE, body)
-        elif key == "soundcloud":
-            return self.render(self.SOUNDCLOUD_TEMPLATE, body)
-        elif key == "twitter":
-            return self.render(self.TWITTER_TEMPLATE, body)
-        elif key == "vimeo":
-            return self.render(self.VIMEO_TEMPLATE, body)
-        elif key == "youtube":
-            return self.render(self.YOUTUBE_TEMPLATE, body)
-        else:
+        attribute = self.TEMPLATE_ATTRIBUTES.get(key)
+        if attribute is None:
             raise Exception("Key not implemented")
+        return self.render(getattr(self, attribute), body)
+
+    def get_template(self, template):
+        cache_key = (self.__class__, template)
+        compiled = _template_cache.get(cache_key)
+        if compiled is None:
+            compiled = _template_cache[cache_key] = loader.get_template(template)
+        return compiled
 
     def render(self, template, body):
-        return loader.render_to_string(
-            template,
-            body
-        )
+        return self.get_template(template).render(body)
 
 
 class InstantArticleRenderer(BaseRenderer):
@@ -0,0 +1,94 @@
+"""
+Cached Instant Article rendering.
+
+Transforming a body (a full parse plus one template render per embed) and rendering the
+Instant Article page only depend on the content revision, so both are cached under
+`(content id, revision, renderer class, template version)`. The revision is a counter kept in the
+cache, bumped whenever the content is saved or its authors change, which moves it to a new key;
+bumping `INSTANT_ARTICLE_TEMPLATE_VERSION` invalidates everything after a template or renderer
+change.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.template import loader
+from django.template.base import TemplateDoesNotExist
+
+from .renderer import InstantArticleRenderer
+from .transform import transform
+
+
+TRANSFORMED_BODY_CACHE_KEY = "instant-article-body-{}-{}-{}-{}"
+INSTANT_ARTICLE_CACHE_KEY = "instant-article-html-{}-{}-{}-{}"
+REVISION_CACHE_KEY = "instant-article-revision-{}"
+
+DEFAULT_TEMPLATE_VERSION = 1
+DEFAULT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def get_initial_revision():
+    # Taken from the clock, so a counter evicted from the cache never reuses a revision
+    return int(time.time() * 1000)
+
+
+def get_revision(content_id):
+    """Returns the current revision of a piece of content."""
+    key = REVISION_CACHE_KEY.format(content_id)
+    revision = cache.get(key)
+    if revision is None:
+        cache.add(key, get_initial_revision(), get_cache_timeout())
+        revision = cache.get(key)
+    return revision
+
+
+def bump_revision(content_id):
+    """Moves a piece of content to a new revision, so its cached renders are no longer used."""
+    key = REVISION_CACHE_KEY.format(content_id)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, get_initial_revision(), get_cache_timeout())
+
+
+def get_cache_key(key, content, renderer):
+    return key.format(
+        content.id,
+        get_revision(content.id),
+        renderer.__class__.__name__,
+        getattr(settings, "INSTANT_ARTICLE_TEMPLATE_VERSION", DEFAULT_TEMPLATE_VERSION)
+    )
+
+
+def get_cache_timeout():
+    return getattr(settings, "INSTANT_ARTICLE_CACHE_TIMEOUT", DEFAULT_CACHE_TIMEOUT)
+
+
+def get_transformed_body(content, renderer=None):
+    """Returns the transformed body of a piece of content, rendering it on a cache miss."""
+    renderer = renderer or InstantArticleRenderer()
+    cache_key = get_cache_key(TRANSFORMED_BODY_CACHE_KEY, content, renderer)
+    transformed_body = cache.get(cache_key)
+    if transformed_body is None:
+        transformed_body = transform(getattr(content, "body", ""), renderer)
+        cache.set(cache_key, transformed_body, get_cache_timeout())
+    return transformed_body
+
+
+def render_instant_article(content, renderer=None):
+    """Returns the full Instant Article page for a piece of content, rendering it on a cache miss."""
+    renderer = renderer or InstantArticleRenderer()
+    cache_key = get_cache_key(INSTANT_ARTICLE_CACHE_KEY, content, renderer)
+    html = cache.get(cache_key)
+    if html is None:
+        context = {
+            "content": content,
+            "absolute_uri": getattr(settings, "WWW_URL"),
+            "transformed_body": get_transformed_body(content, renderer=renderer)
+        }
+        try:
+            html = loader.render_to_string("instant_article/_instant_article.html", context)
+        except TemplateDoesNotExist:
+            html = loader.render_to_string("instant_article/base_instant_article.html", context)
+        cache.set(cache_key, html, get_cache_timeout())
+    return html
@@ -1,14 +1,12 @@
 from django.conf import settings
-from django.template import RequestContext, loader
-from django.template.base import TemplateDoesNotExist
+from django.template import RequestContext
 from django.views.decorators.cache import cache_control
 
 from bulbs.content.models import Content
 from bulbs.content.views import BaseContentDetailView
 from bulbs.feeds.views import RSSView
 
-from bulbs.instant_articles.renderer import InstantArticleRenderer
-from bulbs.instant_articles.transform import transform
+from bulbs.instant_articles.utils import get_transformed_body, render_instant_article
 
 
 class InstantArticleRSSView(RSSView):
@@ -32,20 +30,7 @@ class InstantArticleRSSView(RSSView):
 
         for content in context["page_obj"].object_list:
             content.feed_url = self.request.build_absolute_uri(content.get_absolute_url())
-            body = getattr(content, 'body', "")
-            content_ctx = {
-                "content": content,
-                "absolute_uri": getattr(settings, 'WWW_URL'),
-                "transformed_body": transform(body, InstantArticleRenderer())
-            }
-            try:
-                content.instant_article_html = loader.render_to_string(
-                    "instant_article/_instant_article.html", content_ctx
-                )
-            except TemplateDoesNotExist:
-                content.instant_article_html = loader.render_to_string(
-                    "instant_article/base_instant_article.html", content_ctx
-                )
+            content.instant_article_html = render_instant_article(content)
 
         return RequestContext(self.request, context)
 
@@ -63,8 +48,7 @@ class InstantArticleContentView(BaseContentDetailView):
     def get_context_data(self, *args, **kwargs):
         context = super(InstantArticleContentView, self).get_context_data(*args, **kwargs)
         targeting = self.object.get_targeting()
-        body = getattr(self.object, 'body', "")
-        context["transformed_body"] = transform(body, InstantArticleRenderer())
+        context["transformed_body"] = get_transformed_body(self.object)
         context["targeting"] = targeting
         context["absolute_uri"] = getattr(settings, "WWW_URL")
         return context
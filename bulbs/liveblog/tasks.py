@@ -1,8 +1,9 @@
 from celery import shared_task
-import requests
 
 from django.conf import settings
 
+from bulbs.utils import http
+
 from .models import LiveBlogEntry
 
 
@@ -32,11 +33,11 @@ def firebase_update_entry(entry_id):
         url = endpoint.format(liveblog_id=entry.liveblog.id,
                               entry_id=entry.id)
         if entry.published:
-            resp = requests.patch(url, json={
+            resp = http.patch('firebase', url, json={
                 'published': entry.published.isoformat(),
             })
         else:
-            resp = requests.delete(url)
+            resp = http.delete('firebase', url)
 
         resp.raise_for_status()
 
@@ -48,6 +49,6 @@ def firebase_delete_entry(entry_id):
         entry = LiveBlogEntry.objects.get(id=entry_id)
         url = endpoint.format(liveblog_id=entry.liveblog.id,
                               entry_id=entry.id)
-        resp = requests.delete(url)
+        resp = http.delete('firebase', url)
 
         resp.raise_for_status()
@@ -1,13 +1,12 @@
 import logging
 import pytz
-import requests
 
 from django.conf import settings
 from django.db import models
 
 from djbetty import ImageField
 
-from bulbs.utils import vault
+from bulbs.utils import http, vault
 from bulbs.poll.sodahead import (
     SodaheadResponseError, SodaheadResponseFailure, BLANK_ANSWER, DEFAULT_ANSWER_1,
     DEFAULT_ANSWER_2, SODAHEAD_DATE_FORMAT, SODAHEAD_POLL_ENDPOINT, SODAHEAD_POLLS_ENDPOINT,
@@ -34,7 +33,7 @@ class PollMixin(models.Model):
         abstract = True
 
     def get_sodahead_data(self):
-        response = requests.get(SODAHEAD_POLL_ENDPOINT.format(self.sodahead_id))
+        response = http.get('sodahead', SODAHEAD_POLL_ENDPOINT.format(self.sodahead_id))
 
         if not response.ok:
             logger.error(
@@ -94,7 +93,7 @@ class PollMixin(models.Model):
 
     def save(self, *args, **kwargs):
         if not self.sodahead_id:
-            response = requests.post(SODAHEAD_POLLS_ENDPOINT, self.sodahead_payload())
+            response = http.post('sodahead', SODAHEAD_POLLS_ENDPOINT, self.sodahead_payload())
 
             if response.ok:
                 self.sodahead_id = response.json()['poll']['id']
@@ -108,7 +107,8 @@ class PollMixin(models.Model):
         super(PollMixin, self).save(*args, **kwargs)
 
     def delete(self, *args, **kwargs):
-        response = requests.delete(
+        response = http.delete(
+            'sodahead',
             SODAHEAD_DELETE_POLL_ENDPOINT.format(
                 self.sodahead_id,
                 self.get_sodahead_token(),
@@ -121,7 +121,8 @@ class PollMixin(models.Model):
         super(PollMixin, self).delete(*args, **kwargs)
 
     def sync_sodahead(self):
-        response = requests.post(
+        response = http.post(
+            'sodahead',
             SODAHEAD_POLL_ENDPOINT.format(self.sodahead_id),
             self.sodahead_payload()
         )
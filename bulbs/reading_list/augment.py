@@ -0,0 +1,142 @@
+"""
+Precomputed pools of content used to augment reading lists.
+
+Augmenting with a randomly scored Elasticsearch query makes ES score every eligible document on
+each article view. Instead, the eligible ids for each augment type are stored in the cache and
+refreshed in the background, and each reading list samples from them in Python.
+"""
+import logging
+import random
+import time
+
+from django.core.cache import cache
+
+from elasticsearch import TransportError
+
+from bulbs.content.models import Content
+from .tasks import refresh_augment_pool as refresh_augment_pool_task
+from .utils import (
+    exclude_doc_types, get_excluded_doc_types, get_reading_list_config, search_references
+)
+
+
+logger = logging.getLogger(__name__)
+
+AUGMENT_POOL_CACHE_KEY = "reading-list-augment-pool-{}"
+AUGMENT_POOL_LOCK_KEY = "reading-list-augment-pool-lock-{}"
+
+SPONSORED = "sponsored"
+VIDEO = "video"
+# Reading list augmentation hierarchy: the first pool with a candidate is used.
+AUGMENT_TYPES = (SPONSORED, VIDEO)
+
+DEFAULT_POOL_SIZE = 200
+DEFAULT_REFRESH_INTERVAL = 60 * 5
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def is_augment_pool_enabled():
+    """
+    Augmenting Elasticsearch backed reading lists from the pools is enabled through
+    `READING_LIST_CONFIG["augment_pool"]`.
+    """
+    return bool(get_reading_list_config().get("augment_pool", False))
+
+
+def get_augment_pool_query(augment_type):
+    """Returns the search of all content eligible for an augment type."""
+    if augment_type == SPONSORED:
+        search = Content.search_objects.sponsored()
+    elif augment_type == VIDEO:
+        excluded_channel_ids = get_reading_list_config().get("excluded_channel_ids", [])
+        search = Content.search_objects.evergreen_video(excluded_channel_ids=excluded_channel_ids)
+    else:
+        raise ValueError("Unknown augment type: {}".format(augment_type))
+    return exclude_doc_types(search)
+
+
+def refresh_augment_pool(augment_type):
+    """Rebuild and store the pool of references for an augment type."""
+    config = get_reading_list_config()
+    try:
+        references = search_references(
+            get_augment_pool_query(augment_type),
+            config.get("augment_pool_size", DEFAULT_POOL_SIZE)
+        )
+    except TransportError:
+        logger.exception("Failed to build augment pool %s", augment_type)
+        return None
+    finally:
+        cache.delete(AUGMENT_POOL_LOCK_KEY.format(augment_type))
+    pool = {"references": references, "timestamp": time.time()}
+    cache.set(
+        AUGMENT_POOL_CACHE_KEY.format(augment_type),
+        pool,
+        config.get("augment_pool_timeout", DEFAULT_TIMEOUT)
+    )
+    return pool
+
+
+def get_augment_pool(augment_type):
+    """
+    Returns the cached pool for an augment type, or `None` if it could not be built.
+
+    Cold pools are built synchronously. Pools past their refresh interval are returned as-is
+    while a single background refresh is queued.
+    """
+    config = get_reading_list_config()
+    pool = cache.get(AUGMENT_POOL_CACHE_KEY.format(augment_type))
+    if pool is None:
+        return refresh_augment_pool(augment_type)
+
+    refresh_interval = config.get("augment_pool_refresh_interval", DEFAULT_REFRESH_INTERVAL)
+    if time.time() - pool["timestamp"] > refresh_interval:
+        if cache.add(AUGMENT_POOL_LOCK_KEY.format(augment_type), True, refresh_interval):
+            refresh_augment_pool_task.delay(augment_type)
+    return pool
+
+
+def get_augment_type():
+    """Returns the first augment type with eligible content, if any."""
+    for augment_type in AUGMENT_TYPES:
+        pool = get_augment_pool(augment_type)
+        if pool and pool["references"]:
+            return augment_type
+    return None
+
+
+def sample_augment(augment_type, excluded_ids=None, seed=None):
+    """
+    Returns a random `[doc_type, id]` reference from an augment pool, or `None`.
+
+    The sample is seeded with `seed` and the pool's build time, so a given article keeps the same
+    augment until the pool is refreshed.
+    """
+    pool = get_augment_pool(augment_type)
+    if not pool:
+        return None
+    excluded_ids = set(excluded_ids or [])
+    excluded_doc_types = get_excluded_doc_types()
+    candidates = [
+        reference for reference in pool["references"]
+        if reference[1] not in excluded_ids and reference[0] not in excluded_doc_types
+    ]
+    if not candidates:
+        return None
+    if seed is None:
+        rng = random.Random()
+    else:
+        rng = random.Random("{}-{}".format(seed, int(pool["timestamp"])))
+    return rng.choice(candidates)
+
+
+def sample_first_augment(augment_type, excluded_ids=None, seed=None):
+    """
+    Returns a sample from `augment_type`, or from the next augment type down the hierarchy with
+    candidates left once `excluded_ids` are excluded, or `None`.
+    """
+    for fallback_type in AUGMENT_TYPES[AUGMENT_TYPES.index(augment_type):]:
+        augment = sample_augment(fallback_type, excluded_ids=excluded_ids, seed=seed)
+        if augment is not None:
+            return augment
+    return None
@@ -0,0 +1,205 @@
+"""
+Materialized reading lists.
+
+Resolving a reading list through Elasticsearch costs several queries per article view (counts to
+validate the augment query, the primary search and the randomized augment search). Reading lists
+are shared by every article with the same identifier (`specialcoverage.N`, `section.N`, `popular`
+or `recent`), so the resolved sequence is stored in the cache as an ordered list of
+`[doc_type, id]` references and refreshed in the background. Article views then only filter out
+their own id and excluded doc types in Python and hydrate the remainder with a single mget.
+"""
+import logging
+import time
+
+from django.core.cache import cache
+
+from djes.apps import indexable_registry
+from elasticsearch import TransportError
+
+from bulbs.content.filters import NegateQueryFilter, SponsoredBoost
+from bulbs.content.models import Content
+from bulbs.sections.models import Section
+from bulbs.special_coverage.models import SpecialCoverage
+from .augment import get_augment_pool_query, get_augment_type, sample_first_augment
+from .popular import popular_content
+from .tasks import refresh_materialized_reading_list as refresh_materialized_reading_list_task
+from .utils import (
+    exclude_doc_types, get_excluded_doc_types, get_reading_list_config, search_references
+)
+
+
+logger = logging.getLogger(__name__)
+
+MATERIALIZED_CACHE_KEY = "reading-list-materialized-{}"
+MATERIALIZED_LOCK_KEY = "reading-list-materialized-lock-{}"
+
+# Number of entries materialized per list. Padded so there is room to drop the current article
+# and excluded doc types while still filling a `FirstSlotSlicer` sized list.
+DEFAULT_LIMIT = 30
+DEFAULT_PADDING = 10
+
+# Entries older than the refresh interval are served while a background refresh runs. Entries
+# older than the timeout are evicted by the cache itself and rebuilt on demand.
+DEFAULT_REFRESH_INTERVAL = 60 * 5
+DEFAULT_TIMEOUT = 60 * 60
+
+
+def is_materialized():
+    """Materialized reading lists are enabled through `READING_LIST_CONFIG["materialized"]`."""
+    return bool(get_reading_list_config().get("materialized", False))
+
+
+def get_reading_list_query(identifier):
+    """
+    Returns the `(primary_query, augment_type)` pair for a reading list identifier.
+
+    `augment_type` is `None` when the reading list is not augmented.
+    """
+    augment_type = None
+    reverse_negate = False
+
+    if identifier == "popular":
+        primary_query = popular_content()
+    elif identifier.startswith("specialcoverage"):
+        special_coverage = SpecialCoverage.objects.get_by_identifier(identifier)
+        primary_query = special_coverage.get_content().query(
+            SponsoredBoost(field_name="tunic_campaign_id")
+        ).sort("_score", "-published")
+        # We do not augment sponsored special coverage lists.
+        if not special_coverage.tunic_campaign_id:
+            augment_type = get_augment_type()
+    elif identifier.startswith("section"):
+        section = Section.objects.get_by_identifier(identifier)
+        primary_query = section.get_content()
+        augment_type = get_augment_type()
+    else:
+        primary_query = Content.search_objects.search()
+        augment_type = get_augment_type()
+        # We use this for cases like recent where queries are vague.
+        reverse_negate = True
+
+    primary_query = exclude_doc_types(primary_query)
+    if augment_type is not None and reverse_negate:
+        primary_query = primary_query.filter(
+            NegateQueryFilter(get_augment_pool_query(augment_type))
+        )
+
+    return primary_query, augment_type
+
+
+def build_materialized_reading_list(identifier, limit=DEFAULT_LIMIT):
+    """Resolve a reading list through Elasticsearch into its cached representation."""
+    primary_query, augment_type = get_reading_list_query(identifier)
+    return {
+        "primary": search_references(primary_query, limit + DEFAULT_PADDING),
+        "augment_type": augment_type,
+        "timestamp": time.time(),
+    }
+
+
+def refresh_materialized_reading_list(identifier):
+    """Rebuild and store the materialized reading list for an identifier."""
+    config = get_reading_list_config()
+    try:
+        materialized = build_materialized_reading_list(identifier)
+    except TransportError:
+        logger.exception("Failed to materialize reading list %s", identifier)
+        return None
+    finally:
+        cache.delete(MATERIALIZED_LOCK_KEY.format(identifier))
+    cache.set(
+        MATERIALIZED_CACHE_KEY.format(identifier),
+        materialized,
+        config.get("materialized_timeout", DEFAULT_TIMEOUT)
+    )
+    return materialized
+
+
+def get_materialized_reading_list(identifier):
+    """
+    Returns the cached materialized reading list for an identifier.
+
+    Cold entries are built synchronously. Entries past their refresh interval are returned as-is
+    while a single background refresh is queued.
+    """
+    config = get_reading_list_config()
+    materialized = cache.get(MATERIALIZED_CACHE_KEY.format(identifier))
+    if materialized is None:
+        return refresh_materialized_reading_list(identifier)
+
+    refresh_interval = config.get("materialized_refresh_interval", DEFAULT_REFRESH_INTERVAL)
+    if time.time() - materialized["timestamp"] > refresh_interval:
+        # `cache.add` only succeeds for the first caller, so one refresh is queued at a time.
+        if cache.add(MATERIALIZED_LOCK_KEY.format(identifier), True, refresh_interval):
+            refresh_materialized_reading_list_task.delay(identifier)
+    return materialized
+
+
+class MaterializedReadingList(object):
+    """
+    Iterable reading list backed by a materialized list of references.
+
+    The first slot is sampled from the augment pool (when the list is augmented), followed by the
+    primary list. The content objects are loaded with a single mget on first iteration.
+    """
+
+    def __init__(self, materialized, excluded_ids=None, limit=DEFAULT_LIMIT, seed=None):
+        self.materialized = materialized
+        self.excluded_ids = set(excluded_ids or [])
+        self.limit = limit
+        self.seed = seed
+        self._results = None
+
+    def __iter__(self):
+        return iter(self.results)
+
+    def __len__(self):
+        return len(self.results)
+
+    def __getitem__(self, n):
+        return self.results[n]
+
+    def _is_valid(self, reference):
+        doc_type, pk = reference
+        return pk not in self.excluded_ids and doc_type not in get_excluded_doc_types()
+
+    @property
+    def references(self):
+        primary = [ref for ref in self.materialized["primary"] if self._is_valid(ref)]
+        augment_type = self.materialized.get("augment_type")
+        if augment_type:
+            augment = sample_first_augment(
+                augment_type,
+                excluded_ids=self.excluded_ids | set(pk for _, pk in self.materialized["primary"]),
+                seed=self.seed
+            )
+            if augment:
+                primary.insert(0, augment)
+        return primary[:self.limit]
+
+    @property
+    def results(self):
+        if self._results is None:
+            self._results = self.get_results()
+        return self._results
+
+    def get_results(self):
+        references = self.references
+        if not references:
+            return []
+        try:
+            response = Content.search_objects.client.mget(
+                index=Content.search_objects.mapping.index,
+                body={"docs": [{"_type": doc_type, "_id": pk} for doc_type, pk in references]}
+            )
+        except TransportError:
+            logger.exception("Failed to load materialized reading list")
+            return []
+
+        results = []
+        for doc in response["docs"]:
+            if not doc.get("found"):
+                continue
+            model = indexable_registry.all_models[doc["_type"]]
+            results.append(model.search_objects.from_es(doc))
+        return results
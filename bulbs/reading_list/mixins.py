@@ -10,8 +10,14 @@ from bulbs.content.models import Content
 from bulbs.content.search import randomize_es
 from bulbs.sections.models import Section
 from bulbs.special_coverage.models import SpecialCoverage
+from .augment import get_augment_pool_query, get_augment_type, is_augment_pool_enabled
+from .materialized import (
+    DEFAULT_LIMIT as MATERIALIZED_LIMIT, DEFAULT_PADDING as MATERIALIZED_PADDING,
+    MaterializedReadingList, get_materialized_reading_list, is_materialized
+)
 from .popular import get_popular_ids, popular_content
 from .slicers import FirstSlotSlicer
+from .utils import search_references
 
 
 class ReadingListMixin(object):
@@ -25,8 +31,8 @@ class ReadingListMixin(object):
             return results[0]
 
         # 2."Popular" i.e., the content is one of the 25 most popular items.
-        popular_ids = get_popular_ids()
-        if popular_ids and self.id in popular_ids:
+        popular_ids = set(get_popular_ids() or [])
+        if self.id in popular_ids:
             return "popular"
 
         # 3. Any unsponsored special coverage reading list that contains this item.
@@ -82,8 +88,39 @@ class ReadingListMixin(object):
 
         return augment_query
 
+    def augment_reading_list_from_pool(self, primary_query, reverse_negate=False):
+        """
+        Augment a reading list with content sampled from the precomputed augment pools.
+
+        The primary list is resolved to references and augmented in Python exactly like a
+        materialized reading list, so the augment is never content already in the list.
+        """
+        primary_query = self.validate_query(primary_query)
+        augment_type = get_augment_type()
+        if augment_type is None:
+            return FirstSlotSlicer(primary_query, None)
+
+        # We use this for cases like recent where queries are vague.
+        if reverse_negate:
+            primary_query = primary_query.filter(
+                NegateQueryFilter(get_augment_pool_query(augment_type))
+            )
+
+        try:
+            primary = search_references(primary_query, MATERIALIZED_LIMIT + MATERIALIZED_PADDING)
+        except TransportError:
+            return FirstSlotSlicer(primary_query, None)
+        return MaterializedReadingList(
+            {"primary": primary, "augment_type": augment_type},
+            excluded_ids=[self.id],
+            seed=self.id
+        )
+
     def augment_reading_list(self, primary_query, augment_query=None, reverse_negate=False):
         """Apply injected logic for slicing reading lists with additional content."""
+        if augment_query is None and is_augment_pool_enabled():
+            return self.augment_reading_list_from_pool(primary_query, reverse_negate=reverse_negate)
+
         primary_query = self.validate_query(primary_query)
         augment_query = self.get_validated_augment_query(augment_query=augment_query)
 
@@ -130,8 +167,49 @@ class ReadingListMixin(object):
 
         return reading_list
 
+    def get_materialized_reading_list_context(self, materialized):
+        """Returns the context dictionary for a reading list backed by a materialized list."""
+        context = {
+            "name": "Recent News",
+            "content": MaterializedReadingList(
+                materialized, excluded_ids=[self.id], seed=self.id
+            ),
+            "targeting": {},
+            "videos": []
+        }
+
+        if self.reading_list_identifier == "popular":
+            context.update({"name": self.reading_list_identifier})
+
+        elif self.reading_list_identifier.startswith("specialcoverage"):
+            special_coverage = SpecialCoverage.objects.get_by_identifier(
+                self.reading_list_identifier
+            )
+            context["targeting"]["dfp_specialcoverage"] = special_coverage.slug
+            if special_coverage.tunic_campaign_id:
+                context["tunic_campaign_id"] = special_coverage.tunic_campaign_id
+                context["targeting"].update({
+                    "dfp_campaign_id": special_coverage.tunic_campaign_id
+                })
+            context.update({
+                "name": special_coverage.name,
+                "videos": special_coverage.videos
+            })
+
+        elif self.reading_list_identifier.startswith("section"):
+            section = Section.objects.get_by_identifier(self.reading_list_identifier)
+            context.update({"name": section.name})
+
+        return context
+
     def get_reading_list_context(self, **kwargs):
         """Returns the context dictionary for a given reading list."""
+        if is_materialized():
+            materialized = get_materialized_reading_list(self.reading_list_identifier)
+            # Fall back to querying Elasticsearch directly if the list could not be built.
+            if materialized is not None:
+                return self.get_materialized_reading_list_context(materialized)
+
         reading_list = None
         context = {
             "name": "",
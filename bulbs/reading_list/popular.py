@@ -1,25 +1,102 @@
+import time
+
 from requests import ConnectionError
 
 from django.conf import settings
+from django.core.cache import cache
 
 from elasticsearch_dsl import filter as es_filter
 from pageview_client.clients import TrendingClient
 
 from bulbs.content.models import Content
+from bulbs.utils import metrics
+from .tasks import refresh_popular_ids as refresh_popular_ids_task
 
 
 DEFAULT_LIMIT = 10
 
+POPULAR_IDS_CACHE_KEY = "reading-list-popular-ids-{}"
+POPULAR_IDS_LOCK_KEY = "reading-list-popular-ids-lock-{}"
+CIRCUIT_FAILURES_KEY = "reading-list-popular-circuit-failures"
+CIRCUIT_OPEN_KEY = "reading-list-popular-circuit-open"
+
+# Popular ids are refreshed once they are older than the TTL, and the last good list is kept
+# for the stale timeout so it can be served while the trending service is unavailable.
+DEFAULT_CACHE_TTL = 60
+DEFAULT_STALE_TIMEOUT = 60 * 60 * 24
+# Consecutive connection failures before the trending service is left alone for the timeout.
+DEFAULT_CIRCUIT_BREAKER_THRESHOLD = 3
+DEFAULT_CIRCUIT_BREAKER_TIMEOUT = 60
+
 
 trending_client = TrendingClient(settings.DIGEST_HOSTNAME, settings.DIGEST_ENDPOINT)
 
 
-def get_popular_ids(limit=DEFAULT_LIMIT):
+def _record_failure():
+    threshold = getattr(
+        settings, "DIGEST_CIRCUIT_BREAKER_THRESHOLD", DEFAULT_CIRCUIT_BREAKER_THRESHOLD
+    )
+    timeout = getattr(settings, "DIGEST_CIRCUIT_BREAKER_TIMEOUT", DEFAULT_CIRCUIT_BREAKER_TIMEOUT)
+    cache.add(CIRCUIT_FAILURES_KEY, 0, timeout)
+    try:
+        failures = cache.incr(CIRCUIT_FAILURES_KEY)
+    except ValueError:
+        # Backends without persistence (i.e. the dummy cache) can't count failures.
+        return
+    if failures >= threshold:
+        cache.set(CIRCUIT_OPEN_KEY, True, timeout)
+        cache.delete(CIRCUIT_FAILURES_KEY)
+
+
+def fetch_popular_ids(limit=DEFAULT_LIMIT):
+    """Fetch popular ids from the trending service, unless the circuit breaker is open."""
+    if cache.get(CIRCUIT_OPEN_KEY):
+        return None
     try:
-        ids = trending_client.get(settings.DIGEST_SITE, offset=settings.DIGEST_OFFSET, limit=limit)
-        return list(ids)[:limit]
+        with metrics.timer("reading_list.popular.fetch"):
+            ids = trending_client.get(
+                settings.DIGEST_SITE, offset=settings.DIGEST_OFFSET, limit=limit
+            )
+        ids = list(ids)[:limit]
     except ConnectionError:
+        _record_failure()
         return None
+    cache.delete(CIRCUIT_FAILURES_KEY)
+    return ids
+
+
+def refresh_popular_ids(limit=DEFAULT_LIMIT):
+    """Fetch popular ids and store them as the last good list."""
+    try:
+        ids = fetch_popular_ids(limit=limit)
+    finally:
+        cache.delete(POPULAR_IDS_LOCK_KEY.format(limit))
+    if ids is None:
+        return None
+    cache.set(
+        POPULAR_IDS_CACHE_KEY.format(limit),
+        {"ids": ids, "timestamp": time.time()},
+        getattr(settings, "DIGEST_CACHE_STALE_TIMEOUT", DEFAULT_STALE_TIMEOUT)
+    )
+    return ids
+
+
+def get_popular_ids(limit=DEFAULT_LIMIT):
+    """
+    Returns the cached popular ids.
+
+    Ids older than `DIGEST_CACHE_TTL` are served while a single background refresh runs, and
+    remain in place if the refresh fails.
+    """
+    cached = cache.get(POPULAR_IDS_CACHE_KEY.format(limit))
+    if cached is None:
+        return refresh_popular_ids(limit=limit)
+
+    ttl = getattr(settings, "DIGEST_CACHE_TTL", DEFAULT_CACHE_TTL)
+    if time.time() - cached["timestamp"] > ttl:
+        if cache.add(POPULAR_IDS_LOCK_KEY.format(limit), True, ttl):
+            refresh_popular_ids_task.delay(limit)
+    return cached["ids"]
 
 
 def popular_content(**kwargs):
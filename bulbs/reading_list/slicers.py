@@ -2,6 +2,10 @@ from collections import OrderedDict
 
 from django.conf import settings
 
+from djes.search import FullResponse, ShallowResponse
+from elasticsearch import TransportError
+from elasticsearch_dsl.connections import connections
+
 
 class SearchSlicer(object):
     """We want to search things like a seesaw. take that mike parent.
@@ -53,15 +57,137 @@ class SearchSlicer(object):
             )
 
 
+def get_response(queryset, response):
+    """Wrap a raw search response the same way `queryset.execute()` would."""
+    if getattr(queryset, "_full", False):
+        return FullResponse(response)
+    return ShallowResponse(response, callbacks=queryset._doc_type_map)
+
+
+class PrefetchedQueryset(object):
+    """Buffered iteration over a queryset, fed one page at a time."""
+
+    def __init__(self, queryset, page_size):
+        self.queryset = queryset
+        self.page_size = max(page_size, 1)
+        self.results = []
+        self.position = 0
+        self.exhausted = False
+
+    def __iter__(self):
+        return self
+
+    def next(self):
+        if self.position >= len(self.results) and not self.exhausted:
+            self.add_page(self.get_page().execute())
+        if self.position >= len(self.results):
+            raise StopIteration
+        result = self.results[self.position]
+        self.position += 1
+        return result
+
+    def __next__(self):
+        return self.next()
+
+    def get_page(self):
+        """Returns the queryset for the next page of results."""
+        return self.queryset.extra(from_=len(self.results), size=self.page_size)
+
+    def add_page(self, response):
+        hits = list(response)
+        self.results.extend(hits)
+        # A short page means there is nothing left to fetch.
+        if len(hits) < self.page_size:
+            self.exhausted = True
+
+
+class PrefetchingSearchSlicer(SearchSlicer):
+    """
+    SearchSlicer that fetches the first page of every registered queryset in one `_msearch` round
+    trip.
+
+    Each page is sized to the number of slots the validators assign to the queryset within
+    `limit`, so a fully stocked reading list costs a single request. Further pages are requested
+    only when a queryset runs dry before the reading list is filled.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(PrefetchingSearchSlicer, self).__init__(*args, **kwargs)
+        self.default_source = None
+        self.sources = None
+
+    def next(self):
+        if self.index >= self.limit:
+            raise StopIteration
+        if self.sources is None:
+            self.prefetch()
+        for validator, source in self.sources.items():
+            if validator(self.index):
+                try:
+                    result = source.next()
+                    self.index += 1
+                    return result
+                except StopIteration:
+                    pass
+        result = self.default_source.next()
+        self.index += 1
+        return result
+
+    def get_page_sizes(self):
+        """Returns the number of slots each validator claims within `limit`, and the remainder."""
+        page_sizes = OrderedDict((validator, 0) for validator in self.querysets)
+        default_page_size = 0
+        for index in range(self.limit):
+            for validator in self.querysets:
+                if validator(index):
+                    page_sizes[validator] += 1
+                    break
+            else:
+                default_page_size += 1
+        return page_sizes, default_page_size
+
+    def prefetch(self):
+        """Fetch the first page of every queryset with one multi search request."""
+        page_sizes, default_page_size = self.get_page_sizes()
+        self.sources = OrderedDict(
+            (validator, PrefetchedQueryset(self.querysets[validator], page_size))
+            for validator, page_size in page_sizes.items()
+        )
+        self.default_source = PrefetchedQueryset(self.default_queryset, default_page_size)
+
+        sources = [self.default_source] + [
+            source for validator, source in self.sources.items() if page_sizes[validator]
+        ]
+        body = []
+        for source in sources:
+            page = source.get_page()
+            body.append({"index": page._index, "type": page._doc_type})
+            body.append(page.to_dict())
+
+        try:
+            es = connections.get_connection(self.default_queryset._using)
+            responses = es.msearch(body=body)["responses"]
+        except TransportError:
+            # Every source will fetch its own pages on demand.
+            return
+
+        for source, response in zip(sources, responses):
+            # Failed searches are retried individually on first use.
+            if "error" not in response:
+                source.add_page(get_response(source.queryset, response))
+
+
 def FirstSlotSlicer(primary_query, secondary_query, limit=30):  # noqa
     """
     Inject the first object from a queryset into the first position of a reading list.
 
     :param primary_queryset: djes.LazySearch object. Default queryset for reading list.
     :param secondary_queryset: djes.LazySearch object. first result leads the reading_list.
+        May be `None`, in which case the reading list is not augmented.
     :return list: mixed reading list.
     """
-    reading_list = SearchSlicer(limit=limit)
+    reading_list = PrefetchingSearchSlicer(limit=limit)
     reading_list.register_queryset(primary_query)
-    reading_list.register_queryset(secondary_query, validator=lambda x: bool(x == 0))
+    if secondary_query is not None:
+        reading_list.register_queryset(secondary_query, validator=lambda x: bool(x == 0))
     return reading_list
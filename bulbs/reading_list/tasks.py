@@ -0,0 +1,20 @@
+"""celery tasks for reading lists."""
+from celery import shared_task
+
+
+@shared_task(default_retry_delay=5)
+def refresh_materialized_reading_list(identifier):
+    from .materialized import refresh_materialized_reading_list
+    refresh_materialized_reading_list(identifier)
+
+
+@shared_task(default_retry_delay=5)
+def refresh_popular_ids(limit):
+    from .popular import refresh_popular_ids
+    refresh_popular_ids(limit=limit)
+
+
+@shared_task(default_retry_delay=5)
+def refresh_augment_pool(augment_type):
+    from .augment import refresh_augment_pool
+    refresh_augment_pool(augment_type)
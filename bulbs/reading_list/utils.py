@@ -0,0 +1,32 @@
+"""Common utilities for reading list behaviors."""
+from django.conf import settings
+
+from elasticsearch_dsl import filter as es_filter
+from elasticsearch_dsl.connections import connections
+
+
+def get_reading_list_config():
+    return getattr(settings, "READING_LIST_CONFIG", {})
+
+
+def get_excluded_doc_types():
+    return get_reading_list_config().get("excluded_doc_types", [])
+
+
+def exclude_doc_types(search):
+    """Remove the configured `excluded_doc_types` from a search."""
+    for doc_type in get_excluded_doc_types():
+        search = search.filter(~es_filter.Type(value=doc_type))
+    return search
+
+
+def search_references(search, size):
+    """Execute a search returning only `[doc_type, id]` references for its hits."""
+    es = connections.get_connection(search._using)
+    results = es.search(
+        index=search._index,
+        doc_type=search._doc_type,
+        body=search.fields([]).to_dict(size=size),
+        **search._params
+    )
+    return [[hit["_type"], int(hit["_id"])] for hit in results["hits"]["hits"]]
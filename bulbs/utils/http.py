@@ -0,0 +1,122 @@
+"""
+Shared HTTP client for outbound integrations.
+
+Requests go through one pooled `requests.Session` per host, so connections are kept alive
+between calls, with default connect/read timeouts and retries with backoff for idempotent
+methods. Each call is counted in `bulbs.utils.metrics` under `http.<integration>`:
+
+    from bulbs.utils import http
+
+    response = http.get("tunic", url, headers=headers)
+
+    metrics.get_metrics()["http.tunic"]["errors"]
+"""
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+from requests.packages.urllib3.util.retry import Retry
+from six.moves.urllib.parse import urlparse
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from bulbs.utils import metrics
+
+
+# (connect, read) timeouts, in seconds
+DEFAULT_TIMEOUT = (3.05, 10)
+DEFAULT_RETRIES = 2
+DEFAULT_RETRY_BACKOFF = 0.3
+DEFAULT_POOL_MAXSIZE = 10
+
+# Only methods that are safe to repeat are retried, and only on these gateway errors
+RETRY_METHODS = frozenset(["DELETE", "GET", "HEAD", "OPTIONS", "PUT", "TRACE"])
+RETRY_STATUSES = frozenset([502, 503, 504])
+
+_sessions = {}
+_lock = threading.Lock()
+
+
+def get_retry():
+    kwargs = dict(
+        total=getattr(settings, "HTTP_RETRIES", DEFAULT_RETRIES),
+        backoff_factor=getattr(settings, "HTTP_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF),
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    try:
+        return Retry(allowed_methods=RETRY_METHODS, **kwargs)
+    except TypeError:
+        # urllib3 < 1.26
+        return Retry(method_whitelist=RETRY_METHODS, **kwargs)
+
+
+def build_session():
+    adapter = HTTPAdapter(
+        pool_connections=1,
+        pool_maxsize=getattr(settings, "HTTP_POOL_MAXSIZE", DEFAULT_POOL_MAXSIZE),
+        max_retries=get_retry()
+    )
+    session = requests.Session()
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+
+def get_session(url):
+    """Returns the pooled session for the host of `url`."""
+    parsed = urlparse(url)
+    key = (parsed.scheme, parsed.netloc)
+    session = _sessions.get(key)
+    if session is None:
+        with _lock:
+            session = _sessions.get(key)
+            if session is None:
+                session = _sessions[key] = build_session()
+    return session
+
+
+def close_sessions():
+    with _lock:
+        for session in _sessions.values():
+            session.close()
+        _sessions.clear()
+
+
+@receiver(setting_changed)
+def reset_sessions(setting, **kwargs):
+    if setting in ("HTTP_RETRIES", "HTTP_RETRY_BACKOFF", "HTTP_POOL_MAXSIZE"):
+        close_sessions()
+
+
+def request(integration, method, url, **kwargs):
+    """Send a request through the pooled session for its host, recording `http.<integration>`."""
+    kwargs.setdefault("timeout", getattr(settings, "HTTP_TIMEOUT", DEFAULT_TIMEOUT))
+    name = "http.{}".format(integration)
+    start = time.time()
+    try:
+        response = get_session(url).request(method, url, **kwargs)
+    except requests.RequestException:
+        metrics.record(name, time.time() - start, error=True)
+        raise
+    metrics.record(name, time.time() - start, error=response.status_code >= 500)
+    return response
+
+
+def get(integration, url, **kwargs):
+    return request(integration, "GET", url, **kwargs)
+
+
+def post(integration, url, data=None, **kwargs):
+    return request(integration, "POST", url, data=data, **kwargs)
+
+
+def patch(integration, url, data=None, **kwargs):
+    return request(integration, "PATCH", url, data=data, **kwargs)
+
+
+def delete(integration, url, **kwargs):
+    return request(integration, "DELETE", url, **kwargs)
@@ -0,0 +1,57 @@
+"""
+In-process latency and error counters for outbound integrations.
+
+    from bulbs.utils import metrics
+
+    with metrics.timer("reading_list.popular.fetch"):
+        ...
+
+    metrics.get_metrics()["reading_list.popular.fetch"]["count"]
+"""
+from contextlib import contextmanager
+import threading
+import time
+
+log = __import__('logging').getLogger(__name__)
+
+_lock = threading.Lock()
+_metrics = {}
+
+
+def _empty_metric():
+    return {"count": 0, "errors": 0, "total_time": 0.0, "max_time": 0.0}
+
+
+def record(name, elapsed, error=False):
+    """Record one call to `name` that took `elapsed` seconds."""
+    with _lock:
+        metric = _metrics.setdefault(name, _empty_metric())
+        metric["count"] += 1
+        metric["total_time"] += elapsed
+        metric["max_time"] = max(metric["max_time"], elapsed)
+        if error:
+            metric["errors"] += 1
+    log.debug("%s took %.1f ms%s", name, elapsed * 1000, " (error)" if error else "")
+
+
+@contextmanager
+def timer(name):
+    """Time the wrapped block, counting any exception raised as an error."""
+    start = time.time()
+    try:
+        yield
+    except Exception:
+        record(name, time.time() - start, error=True)
+        raise
+    record(name, time.time() - start)
+
+
+def get_metrics():
+    """Returns a snapshot of all metrics, keyed by name."""
+    with _lock:
+        return dict((name, dict(metric)) for name, metric in _metrics.items())
+
+
+def reset_metrics():
+    with _lock:
+        _metrics.clear()
@@ -0,0 +1,44 @@
+"""
+Token bucket rate limiting for calls to rate limited services.
+
+    bucket = TokenBucket(rate=2, capacity=5)  # 2 calls/sec, bursts of up to 5
+    for item in items:
+        bucket.wait()
+        ...
+"""
+import threading
+import time
+
+
+class TokenBucket(object):
+    """Allows `rate` calls per second on average, and bursts of up to `capacity` calls."""
+
+    def __init__(self, rate, capacity=None, clock=time.time, sleep=time.sleep):
+        if rate <= 0:
+            raise ValueError('rate must be positive, got {0}'.format(rate))
+        self.rate = float(rate)
+        self.capacity = float(capacity if capacity is not None else max(rate, 1))
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def consume(self, tokens=1):
+        """Takes `tokens` if they are available. Returns False without waiting otherwise."""
+        with self._lock:
+            self._refill()
+            if self.tokens >= tokens:
+                self.tokens -= tokens
+                return True
+            return False
+
+    def wait(self, tokens=1):
+        """Blocks until `tokens` are available, then takes them."""
+        while not self.consume(tokens):
+            self.sleep((tokens - self.tokens) / self.rate)
@@ -0,0 +1,98 @@
+import json
+import threading
+
+from django.test.utils import override_settings
+
+import contextdecorator
+from six.moves.BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+from six.moves.urllib.parse import parse_qs, urlparse
+
+
+class FacebookStubHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, *args):
+        pass
+
+    def respond(self, status_code, data):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        stub = self.server.stub
+        stub.requests.append(("POST", self.path))
+        length = int(self.headers.get("Content-Length", 0))
+        self.rfile.read(length)
+        if urlparse(self.path).path.endswith("/instant_articles"):
+            self.respond(200, {"id": stub.import_status_id})
+        else:
+            self.respond(404, {})
+
+    def do_GET(self):
+        stub = self.server.stub
+        stub.requests.append(("GET", self.path))
+        url = urlparse(self.path)
+        query = parse_qs(url.query)
+        if url.path.strip("/") == str(stub.import_status_id):
+            # Import status, following the scripted statuses and repeating the last one
+            status = stub.statuses[min(stub.status_checks, len(stub.statuses) - 1)]
+            stub.status_checks += 1
+            self.respond(200, {"id": stub.import_status_id, "status": status})
+        elif "id" in query:
+            # Canonical URL lookup
+            self.respond(200, {
+                "id": query["id"][0],
+                "instant_article": {"id": str(stub.instant_article_id)}
+            })
+        else:
+            self.respond(404, {})
+
+    def do_DELETE(self):
+        stub = self.server.stub
+        stub.requests.append(("DELETE", self.path))
+        self.respond(200, {"success": True})
+
+
+class stub_facebook_api(contextdecorator.ContextDecorator):
+    """Decorator + context manager serving a local stand-in for the Instant Articles API.
+
+    `FACEBOOK_API_BASE_URL` points at the stub for the duration. Import status checks return
+    `statuses` in order, repeating the last one.
+
+    Usage:
+            def test_publish(self):
+                with stub_facebook_api(statuses=["IN_PROGRESS", "SUCCESS"]) as stub:
+                    ...
+                    self.assertEqual(stub.status_checks, 2)
+    """
+
+    def __init__(self, statuses=None, import_status_id=456, instant_article_id=420):
+        super(stub_facebook_api, self).__init__()
+        self.statuses = statuses or ["SUCCESS"]
+        self.import_status_id = import_status_id
+        self.instant_article_id = instant_article_id
+
+    def __enter__(self):
+        self.requests = []
+        self.status_checks = 0
+        self.server = HTTPServer(("127.0.0.1", 0), FacebookStubHandler)
+        self.server.stub = self
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+
+        self.settings = override_settings(
+            FACEBOOK_API_BASE_URL="http://127.0.0.1:{}".format(self.server.server_port)
+        )
+        self.settings.enable()
+        return self
+
+    def __exit__(self, *args):
+        self.settings.disable()
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        return False
@@ -5,6 +5,8 @@ from six.moves.urllib.parse import urljoin, urlencode
 
 from django.conf import settings
 
+from bulbs.utils import http
+
 
 class RequestFailure(requests.exceptions.RequestException):
     """The request failed."""
@@ -20,7 +22,7 @@ class TunicClient(object):
             url = path
         else:
             url = self.handle_protocol_relative_paths(path)
-        resp = requests.get(url, headers=headers)
+        resp = http.get('tunic', url, headers=headers)
         if not resp.ok:
             raise RequestFailure(response=resp)
         return resp
@@ -5,23 +5,114 @@
 #   import vault
 #   vault.read(...)
 #
-import requests
+# Secrets are cached in-process for `VAULT_CACHE_TTL` seconds (or a per-path TTL from
+# `VAULT_CACHE_TTLS`), renewed in the background shortly before they expire, and served stale
+# for up to `VAULT_CACHE_STALE_GRACE` seconds past expiry while Vault is failing.
+#
+import threading
+import time
 
 from django.conf import settings
 
+from bulbs.utils import http
+
 log = __import__('logging').getLogger(__name__)
 
+DEFAULT_CACHE_TTL = 60 * 5
+DEFAULT_CACHE_RENEW_BEFORE = 30
+DEFAULT_CACHE_STALE_GRACE = 60 * 60
 
-def read(path):
-    """Read a secret from Vault REST endpoint"""
+
+def fetch(path):
+    """Read a secret from Vault REST endpoint, bypassing the cache"""
     url = '{}/{}/{}'.format(settings.VAULT_BASE_URL.rstrip('/'),
                             settings.VAULT_BASE_SECRET_PATH.strip('/'),
                             path.lstrip('/'))
 
     headers = {'X-Vault-Token': settings.VAULT_ACCESS_TOKEN}
-    resp = requests.get(url, headers=headers)
+    resp = http.get('vault', url, headers=headers)
     if resp.ok:
         return resp.json()['data']
     else:
         log.error('Failed VAULT GET request: %s %s', resp.status_code, resp.text)
         raise Exception('Failed Vault GET request: {} {}'.format(resp.status_code, resp.text))
+
+
+def get_ttl(path):
+    ttls = getattr(settings, 'VAULT_CACHE_TTLS', {})
+    return ttls.get(path, getattr(settings, 'VAULT_CACHE_TTL', DEFAULT_CACHE_TTL))
+
+
+class SecretCache(object):
+    """Per-path secret cache. Only one request per path is ever in flight."""
+
+    def __init__(self):
+        self._entries = {}  # path -> (secret, fetched_at)
+        self._locks = {}
+        self._lock = threading.Lock()
+
+    def _path_lock(self, path):
+        with self._lock:
+            return self._locks.setdefault(path, threading.Lock())
+
+    def _refresh(self, path):
+        secret = fetch(path)
+        self._entries[path] = (secret, time.time())
+        return secret
+
+    def _renew(self, path, lock):
+        try:
+            self._refresh(path)
+        except Exception:
+            log.exception('Failed to renew Vault secret %s', path)
+        finally:
+            lock.release()
+
+    def get(self, path):
+        ttl = get_ttl(path)
+        if not ttl:
+            return fetch(path)
+
+        entry = self._entries.get(path)
+        if entry is not None:
+            secret, fetched_at = entry
+            age = time.time() - fetched_at
+            if age < ttl:
+                renew_before = getattr(
+                    settings, 'VAULT_CACHE_RENEW_BEFORE', DEFAULT_CACHE_RENEW_BEFORE)
+                lock = self._path_lock(path)
+                # Renew in the background, unless a request for this path is already in flight
+                if age >= ttl - renew_before and lock.acquire(False):
+                    thread = threading.Thread(target=self._renew, args=(path, lock))
+                    thread.daemon = True
+                    thread.start()
+                return secret
+
+        with self._path_lock(path):
+            # Another caller may have refreshed the secret while we waited
+            current = self._entries.get(path)
+            if current is not None and current is not entry:
+                return current[0]
+            try:
+                return self._refresh(path)
+            except Exception:
+                grace = getattr(settings, 'VAULT_CACHE_STALE_GRACE', DEFAULT_CACHE_STALE_GRACE)
+                if entry is not None and time.time() - entry[1] < ttl + grace:
+                    log.warning('Serving stale Vault secret %s', path, exc_info=True)
+                    return entry[0]
+                raise
+
+    def clear(self):
+        self._entries.clear()
+
+
+_cache = SecretCache()
+
+
+def read(path):
+    """Read a secret from Vault, through the in-process cache"""
+    return _cache.get(path)
+
+
+def clear_cache():
+    _cache.clear()
@@ -8,10 +8,10 @@ from django.template.defaultfilters import slugify
 
 from djbetty.fields import ImageField
 
-import requests
-
 import six
 
+from bulbs.utils import http
+
 
 class VideohubVideo(Indexable):
     """A reference to a video on the onion videohub."""
@@ -108,7 +108,7 @@ class VideohubVideo(Indexable):
             assert isinstance(page, (six.string_types, int))
             payload["page"] = page
         # send request
-        res = requests.post(url, data=json.dumps(payload), headers=headers)
+        res = http.post('videohub', url, data=json.dumps(payload), headers=headers)
         # raise if not 200
         if res.status_code != 200:
             res.raise_for_status()
@@ -1,4 +1,5 @@
 import os
+from datetime import timedelta
 
 MODULE_ROOT = os.path.dirname(os.path.realpath(__file__))
 VAULT_BASE_URL = 'http://192.168.220.222:8200/v1/'
@@ -92,6 +93,14 @@ CELERY_ALWAYS_EAGER = True
 
 CELERY_EAGER_PROPAGATES_EXCEPTIONS = True
 
+# Sweeps outbox events whose dispatch ran before their transaction committed
+CELERYBEAT_SCHEDULE = {
+    'dispatch-content-outbox': {
+        'task': 'bulbs.content.tasks.dispatch_outbox',
+        'schedule': timedelta(minutes=1),
+    },
+}
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
         'rest_framework.authentication.SessionAuthentication',
@@ -33,6 +33,7 @@ requires = [
     "djes>=0.1.109",
     "drf-nested-routers==0.11.1",
     "firebase-token-generator==1.3.2",
+    "lxml>=3.6.0",
     "python-dateutil==2.1",
     "pytz==2012h",
     "requests>=1.1.0",
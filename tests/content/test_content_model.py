@@ -4,8 +4,10 @@ from django.utils import timezone
 from django.utils.html import strip_tags
 
 import elasticsearch
+import mock
 
-from bulbs.content.models import Content, FeatureType
+from bulbs.content import TagCache
+from bulbs.content.models import Content, FeatureType, Tag
 from bulbs.utils.test import make_content, BaseIndexableTestCase
 
 from example.testcontent.models import TestContentObj
@@ -94,3 +96,23 @@ class SerializerTestCase(BaseIndexableTestCase):
         content.thumbnail_override = 666
 
         self.assertNotEqual(content.first_image, content.thumbnail_override)
+
+    def test_ordered_tags_count_many(self):
+        popular, rare, unused = [Tag.objects.create(name=name)
+                                 for name in ["Popular", "Rare", "Unused"]]
+        for content in make_content(TestContentObj, published=timezone.now(), _quantity=3):
+            content.tags.add(popular)
+            if not rare.content_set.exists():
+                content.tags.add(rare)
+            content.save()
+        Content.search_objects.refresh()
+
+        with mock.patch.dict(TagCache._cache, clear=True):
+            counts = TagCache.count_many([popular.slug, rare.slug, unused.slug])
+            self.assertEqual({popular.slug: 3, rare.slug: 1, unused.slug: 0}, counts)
+            # Cached, and the same as counting one at a time
+            self.assertEqual(counts, dict((tag.slug, tag.count()) for tag in [popular, rare, unused]))
+
+            content = rare.content_set.get()
+            self.assertEqual([popular, rare], content.ordered_tags(counts))
+            self.assertEqual([popular, rare], content.ordered_tags())
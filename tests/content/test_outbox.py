@@ -0,0 +1,152 @@
+import mock
+import requests_mock
+
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from elasticsearch import TransportError
+
+from bulbs.content.models import Content, OutboxEvent
+from bulbs.content.outbox import claim_pending_events, dispatch_events
+from bulbs.utils.test import BaseIndexableTestCase, make_content
+from bulbs.utils.test.mock_vault import mock_vault
+
+from example.testcontent.models import TestContentObj
+
+
+class OutboxTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(OutboxTestCase, self).setUp()
+        self.content = make_content(TestContentObj, published=self.now, _quantity=3)
+        Content.search_objects.refresh()
+
+    def test_dispatched_after_delete(self):
+        self.content[0].delete()
+        Content.search_objects.refresh()
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(Content.search_objects.search().count(), 2)
+
+    def test_bulk_es_deletes(self):
+        with mock.patch("bulbs.content.models.schedule_outbox_dispatch"):
+            for content in self.content:
+                content.delete()
+        self.assertEqual(OutboxEvent.objects.filter(action=OutboxEvent.ES_DELETE).count(), 3)
+
+        client = Content.search_objects.client
+        with mock.patch.object(client, "bulk", wraps=client.bulk) as bulk:
+            self.assertEqual(dispatch_events(), 3)
+            self.assertEqual(bulk.call_count, 1)
+
+        Content.search_objects.refresh()
+        self.assertFalse(OutboxEvent.objects.exists())
+        self.assertEqual(Content.search_objects.search().count(), 0)
+
+    def test_claim_pending_events(self):
+        with mock.patch("bulbs.content.models.schedule_outbox_dispatch"):
+            for content in self.content:
+                content.delete()
+
+        claimed = claim_pending_events(2)
+        self.assertEqual(len(claimed), 2)
+        # A concurrent dispatch only gets what is left
+        self.assertEqual(
+            [event.id for event in claim_pending_events(10)],
+            [event.id for event in OutboxEvent.objects.exclude(
+                id__in=[event.id for event in claimed])]
+        )
+        self.assertEqual(claim_pending_events(10), [])
+
+    @override_settings(CONTENT_OUTBOX_MAX_ATTEMPTS=2)
+    def test_retry_and_dead_letter(self):
+        with mock.patch("bulbs.content.models.schedule_outbox_dispatch"):
+            self.content[0].delete()
+
+        client = Content.search_objects.client
+        with mock.patch.object(client, "bulk", side_effect=TransportError(500, "")):
+            self.assertEqual(dispatch_events(), 0)
+            event = OutboxEvent.objects.get()
+            self.assertEqual(event.attempts, 1)
+            self.assertFalse(event.dead)
+            self.assertGreater(event.available_at, timezone.now())
+
+            # Not retried before the backoff has passed
+            self.assertEqual(dispatch_events(), 0)
+            self.assertEqual(OutboxEvent.objects.get().attempts, 1)
+
+            OutboxEvent.objects.update(available_at=timezone.now())
+            dispatch_events()
+            event = OutboxEvent.objects.get()
+            self.assertEqual(event.attempts, 2)
+            self.assertTrue(event.dead)
+
+    def test_next_dispatch_scheduled(self):
+        with mock.patch("bulbs.content.models.schedule_outbox_dispatch"):
+            for content in self.content:
+                content.delete()
+
+        with mock.patch("bulbs.content.outbox.schedule_outbox_dispatch") as schedule, \
+                mock.patch("bulbs.content.outbox.dispatch_outbox_task") as task:
+            # Events left over after a partial batch are dispatched next
+            self.assertEqual(dispatch_events(batch_size=2), 2)
+            self.assertEqual(schedule.call_count, 1)
+
+            # Failed events are dispatched again once their backoff has passed
+            client = Content.search_objects.client
+            with mock.patch.object(client, "bulk", side_effect=TransportError(500, "")):
+                self.assertEqual(dispatch_events(), 0)
+            self.assertEqual(task.apply_async.call_count, 1)
+            self.assertGreater(task.apply_async.call_args[1]["countdown"], 0)
+
+            # Nothing is claimed, so nothing more is scheduled
+            self.assertEqual(dispatch_events(), 0)
+            self.assertEqual(schedule.call_count, 1)
+            self.assertEqual(task.apply_async.call_count, 1)
+
+    @override_settings(FACEBOOK_POST_TO_IA=True)
+    @mock_vault({'facebook/onion_token': {'authtoken': 'TOKEN'}})
+    def test_ia_delete(self):
+        Content.objects.filter(pk=self.content[0].pk).update(instant_article_id=420)
+        content = Content.objects.get(pk=self.content[0].pk)
+
+        with mock.patch("bulbs.content.models.schedule_outbox_dispatch"):
+            content.delete()
+        self.assertTrue(OutboxEvent.objects.filter(action=OutboxEvent.IA_DELETE).exists())
+
+        with requests_mock.mock() as mocker:
+            mocker.delete(
+                "https://graph.facebook.com/v2.6/420?access_token=TOKEN",
+                status_code=500)
+            dispatch_events()
+            self.assertEqual(mocker.call_count, 1)
+            self.assertEqual(
+                OutboxEvent.objects.get(action=OutboxEvent.IA_DELETE).attempts, 1)
+
+            mocker.delete(
+                "https://graph.facebook.com/v2.6/420?access_token=TOKEN",
+                status_code=200,
+                json={"success": True})
+            OutboxEvent.objects.update(available_at=timezone.now())
+            dispatch_events()
+            self.assertFalse(OutboxEvent.objects.exists())
+
+    @override_settings(FACEBOOK_POST_TO_IA=True)
+    @mock_vault({'facebook/onion_token': {'authtoken': 'TOKEN'}})
+    def test_ia_delete_unexpected_error(self):
+        Content.objects.filter(pk=self.content[0].pk).update(instant_article_id=420)
+        content = Content.objects.get(pk=self.content[0].pk)
+
+        with mock.patch("bulbs.content.models.schedule_outbox_dispatch"):
+            content.delete()
+
+        with requests_mock.mock() as mocker:
+            mocker.delete(
+                "https://graph.facebook.com/v2.6/420?access_token=TOKEN",
+                status_code=200,
+                text="<html>Bad Gateway</html>")
+            dispatch_events()
+
+        # The Elasticsearch delete went through, the Instant Article delete is retried
+        self.assertEqual(OutboxEvent.objects.get().action, OutboxEvent.IA_DELETE)
+        self.assertEqual(OutboxEvent.objects.get().attempts, 1)
+        self.assertTrue(OutboxEvent.objects.get().last_error)
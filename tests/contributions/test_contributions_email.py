@@ -1,13 +1,16 @@
 """Tests for bulbs.contributions.email."""
+from smtplib import SMTPException
 import mock
 import random
 
 from django.contrib.auth import get_user_model
+from django.core import mail
 from django.core.urlresolvers import reverse
-from django.test.utils import override_settings
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from django.utils import timezone
 
-from bulbs.contributions.email import ContributorReport, EmailReport
+from bulbs.contributions.email import ContributorReport, EmailReport, EMAIL_SETTINGS
 from bulbs.contributions.models import Contribution, ContributorRole, FreelanceProfile, LineItem
 from bulbs.utils.test import make_content, BaseAPITestCase
 
@@ -150,14 +153,59 @@ class EmailReportTestCase(BaseAPITestCase):
             report.send()
             self.assertFalse(mock_send.called)
 
-    @override_settings(EMAIL_BACKEND='django.core.mail.backends.smtp.EmailBackend')
     def test_email_api(self):
-        with mock.patch("django.core.mail.EmailMultiAlternatives.send") as mock_send:
-            mock_send.return_value = None
-            data = {
-                "deadline": self.now + timezone.timedelta(days=5),
-                "start": timezone.datetime(day=1, month=self.last_month, year=self.now.year)
-            }
-            resp = self.api_client.post(self.endpoint, data=data)
-            self.assertEqual(resp.status_code, 200)
-            self.assertTrue(mock_send.called)
+        data = {
+            "deadline": self.now + timezone.timedelta(days=5),
+            "start": timezone.datetime(day=1, month=self.last_month, year=self.now.year)
+        }
+        resp = self.api_client.post(self.endpoint, data=data)
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(len(mail.outbox), 1)
+
+    def test_send_mass_contributor_emails(self):
+        FreelanceProfile.objects.create(contributor=self.buddy_sarpino, is_freelance=True)
+
+        with CaptureQueriesContext(connection) as queries:
+            failed = EmailReport(month=self.last_month).send_mass_contributor_emails()
+        self.assertEqual([], failed)
+        # Queries don't grow with the number of contributions
+        self.assertLess(len(queries), 25)
+
+        self.assertEqual(len(mail.outbox), 2)
+        bodies = [message.alternatives[0][0] for message in mail.outbox]
+        self.assertIn("Tony", bodies[0])
+        self.assertIn("$1500.00", bodies[0])
+        self.assertIn("Buddy", bodies[1])
+
+    def test_send_mass_contributor_emails_resume(self):
+        FreelanceProfile.objects.create(contributor=self.buddy_sarpino, is_freelance=True)
+        send_messages = "django.core.mail.backends.locmem.EmailBackend.send_messages"
+
+        with mock.patch.dict(EMAIL_SETTINGS, {"BATCH_SIZE": 1}):
+            with mock.patch(send_messages, side_effect=[SMTPException(), 1]) as mock_send:
+                failed = EmailReport(month=self.last_month).send_mass_contributor_emails()
+        self.assertEqual(mock_send.call_count, 2)
+        self.assertEqual([self.tony_sarpino.pk], failed)
+
+        EmailReport(month=self.last_month, contributor_ids=failed).send_mass_contributor_emails()
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertIn("Tony", mail.outbox[0].alternatives[0][0])
+
+    def test_send_mass_contributor_emails_partial_batch(self):
+        FreelanceProfile.objects.create(contributor=self.buddy_sarpino, is_freelance=True)
+        send_messages = "django.core.mail.backends.locmem.EmailBackend.send_messages"
+
+        # Only the message that failed is retried, not the whole batch
+        with mock.patch.dict(EMAIL_SETTINGS, {"BATCH_SIZE": 2}):
+            with mock.patch(send_messages, side_effect=[1, SMTPException()]):
+                failed = EmailReport(month=self.last_month).send_mass_contributor_emails()
+        self.assertEqual([self.buddy_sarpino.pk], failed)
+
+    def test_send_mass_contributor_emails_connection_error(self):
+        FreelanceProfile.objects.create(contributor=self.buddy_sarpino, is_freelance=True)
+        open_connection = "django.core.mail.backends.locmem.EmailBackend.open"
+
+        with mock.patch(open_connection, side_effect=SMTPException()):
+            failed = EmailReport(month=self.last_month).send_mass_contributor_emails()
+        self.assertEqual([self.tony_sarpino.pk, self.buddy_sarpino.pk], failed)
+        self.assertEqual(len(mail.outbox), 0)
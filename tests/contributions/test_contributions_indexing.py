@@ -0,0 +1,83 @@
+import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from bulbs.content.models import Content, FeatureType
+from bulbs.content.tasks import index_content_contributions
+from bulbs.contributions.indexing import bulk_index, index_chunk
+from bulbs.contributions.models import (
+    Contribution, ContributorRole, FeatureTypeRate, FreelanceProfile, FEATURETYPE
+)
+from bulbs.contributions.signals import *  # NOQA
+from bulbs.utils.test import BaseIndexableTestCase
+
+
+User = get_user_model()
+
+
+class ContributionIndexingTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(ContributionIndexingTestCase, self).setUp()
+        contributor = User.objects.create(username="jarvis")
+        FreelanceProfile.objects.create(contributor=contributor, payroll_name="J. Monster")
+        self.feature_type = FeatureType.objects.create(name="TV Club")
+        self.role = ContributorRole.objects.create(name="Writer", payment_type=FEATURETYPE)
+        self.content = Content.objects.create(title="Content", feature_type=self.feature_type)
+        for _ in range(5):
+            Contribution.objects.create(
+                contributor=contributor, role=self.role, content=self.content
+            )
+        self.es_client = Contribution.search_objects.client
+
+    def get_indexed(self, field):
+        Contribution.search_objects.refresh()
+        mapping = Contribution.search_objects.mapping
+        return [
+            self.es_client.get(
+                index=mapping.index, doc_type=mapping.doc_type, id=pk
+            )["_source"][field]
+            for pk in Contribution.objects.order_by("pk").values_list("pk", flat=True)
+        ]
+
+    def test_bulk_index(self):
+        Contribution.objects.update(notes="Reindexed")
+        with mock.patch.object(self.es_client, "bulk", wraps=self.es_client.bulk) as bulk:
+            self.assertEqual(5, bulk_index(Contribution.objects.all(), chunk_size=2))
+        self.assertEqual(3, bulk.call_count)
+        self.assertEqual(["Reindexed"] * 5, self.get_indexed("notes"))
+
+    def test_index_chunk_queries(self):
+        pks = list(Contribution.objects.order_by("pk").values_list("pk", flat=True))
+
+        with CaptureQueriesContext(connection) as small_chunk:
+            index_chunk(Contribution, pks[:2])
+        with CaptureQueriesContext(connection) as large_chunk:
+            index_chunk(Contribution, pks)
+        self.assertEqual(len(small_chunk), len(large_chunk))
+        self.assertEqual(
+            ["J. Monster"] * 5, [doc["payroll_name"] for doc in self.get_indexed("contributor")]
+        )
+
+    def test_index_content_contributions(self):
+        rate = FeatureTypeRate.objects.get(role=self.role, feature_type=self.feature_type)
+        FeatureTypeRate.objects.filter(pk=rate.pk).update(rate=40)
+
+        with mock.patch.object(self.es_client, "bulk", wraps=self.es_client.bulk) as bulk:
+            index_content_contributions(self.content.pk)
+        self.assertEqual(1, bulk.call_count)
+        self.assertEqual([40] * 5, self.get_indexed("pay"))
+
+    def test_index_contributions_command(self):
+        Contribution.objects.update(notes="Reindexed")
+        call_command("index_contributions", chunk_size=2)
+        self.assertEqual(["Reindexed"] * 5, self.get_indexed("notes"))
+
+        Contribution.objects.update(notes="Reindexed in parallel")
+        with mock.patch.object(self.es_client, "bulk", wraps=self.es_client.bulk) as bulk:
+            call_command("index_contributions", chunk_size=2, parallel=True)
+        self.assertEqual(["Reindexed in parallel"] * 5, self.get_indexed("notes"))
+        self.assertGreaterEqual(bulk.call_count, 3)
@@ -0,0 +1,110 @@
+import datetime
+import shutil
+import tempfile
+
+from django.contrib.auth import get_user_model
+from django.core.urlresolvers import reverse
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from bulbs.contributions.models import Contribution, ContributorRole, ReportJob
+from bulbs.contributions.signals import *  # NOQA
+from bulbs.utils.test import BaseAPITestCase, make_content
+
+
+User = get_user_model()
+
+
+class ReportJobTestCase(BaseAPITestCase):
+
+    def setUp(self):
+        super(ReportJobTestCase, self).setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.settings_override = override_settings(MEDIA_ROOT=self.media_root)
+        self.settings_override.enable()
+
+        self.contributor = User.objects.create(
+            username="jarvis", first_name="Jarvis", last_name="Monster"
+        )
+        role = ContributorRole.objects.create(name="Editor", payment_type=0)
+        role.flat_rates.create(rate=60)
+        for days in (1, 2, 30):
+            Contribution.objects.create(
+                content=make_content(
+                    authors=[], published=timezone.now() - datetime.timedelta(days=days)
+                ),
+                contributor=self.contributor,
+                role=role
+            )
+        Contribution.search_objects.refresh()
+        self.start = (timezone.now() - datetime.timedelta(days=4)).strftime("%Y-%m-%d")
+        self.endpoint = reverse("report-jobs-list")
+
+    def tearDown(self):
+        self.settings_override.disable()
+        shutil.rmtree(self.media_root)
+        super(ReportJobTestCase, self).tearDown()
+
+    def create_job(self, filters):
+        return self.api_client.post(
+            self.endpoint, {"report": "contribution", "filters": filters}, format="json"
+        )
+
+    def test_create_and_download(self):
+        response = self.create_job({"start": self.start, "contributors": ["jarvis"]})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(ReportJob.COMPLETE, response.data["status"])
+        self.assertEqual((2, 2), (response.data["rows"], response.data["total"]))
+
+        job = ReportJob.objects.get(pk=response.data["id"])
+        self.assertEqual(self.admin, job.created_by)
+        self.assertEqual({"start": [self.start], "contributors": ["jarvis"]}, job.filters)
+
+        response = self.api_client.get(reverse("report-jobs-detail", kwargs={"pk": job.pk}))
+        self.assertTrue(response.data["download_url"].endswith(
+            reverse("report-jobs-download", kwargs={"pk": job.pk})
+        ))
+
+        response = self.api_client.get(reverse("report-jobs-download", kwargs={"pk": job.pk}))
+        self.assertEqual(response.status_code, 200)
+        lines = b"".join(response.streaming_content).decode("utf-8").splitlines()
+        self.assertEqual(3, len(lines))
+        self.assertTrue(lines[0].startswith("Publish Date,First Name"))
+        self.assertIn("Jarvis,Monster", lines[1])
+
+    def test_deduplicate(self):
+        job_id = self.create_job({"start": self.start}).data["id"]
+
+        # The same filters, however they are given, share the job
+        response = self.create_job({"start": [self.start], "format": "csv"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(job_id, response.data["id"])
+
+        # Other filters don't
+        response = self.create_job({})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(3, response.data["rows"])
+
+        # Nor do failed jobs...
+        ReportJob.objects.filter(pk=job_id).update(status=ReportJob.FAILED)
+        response = self.create_job({"start": self.start})
+        self.assertEqual(response.status_code, 201)
+        self.assertNotEqual(job_id, response.data["id"])
+
+        # ...or jobs outside of the window
+        with override_settings(CONTRIBUTION_REPORT_JOB_WINDOW=0):
+            response = self.create_job({"start": self.start})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(4, ReportJob.objects.count())
+
+    def test_download_incomplete(self):
+        job = ReportJob.objects.create(report="content", filters_hash="pending")
+        response = self.api_client.get(reverse("report-jobs-download", kwargs={"pk": job.pk}))
+        self.assertEqual(response.status_code, 404)
+        response = self.api_client.get(reverse("report-jobs-detail", kwargs={"pk": job.pk}))
+        self.assertIsNone(response.data["download_url"])
+
+    def test_invalid_report(self):
+        response = self.api_client.post(self.endpoint, {"report": "payroll"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(0, ReportJob.objects.count())
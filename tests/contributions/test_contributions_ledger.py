@@ -0,0 +1,177 @@
+import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+
+from bulbs.content.models import Content, FeatureType
+from bulbs.contributions.ledger import update_pay
+from bulbs.contributions.models import (
+    Contribution, ContributionOverride, ContributorRole, FeatureTypeRate, FlatRate,
+    FlatRateOverride, HourlyRate, OverrideProfile, FEATURETYPE, FLAT_RATE, HOURLY
+)
+from bulbs.contributions.pay import PayCalculator
+from bulbs.contributions.signals import *  # NOQA
+from bulbs.utils.test import BaseIndexableTestCase
+
+
+User = get_user_model()
+
+
+class ContributionLedgerTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(ContributionLedgerTestCase, self).setUp()
+        self.contributor = User.objects.create(username="jarvis")
+        self.feature_type = FeatureType.objects.create(name="TV Club")
+        self.content = Content.objects.create(title="Good Content", feature_type=self.feature_type)
+        self.flat_role = ContributorRole.objects.create(name="Flat", payment_type=FLAT_RATE)
+        FlatRate.objects.create(role=self.flat_role, rate=200)
+        self.hourly_role = ContributorRole.objects.create(name="Hourly", payment_type=HOURLY)
+        HourlyRate.objects.create(role=self.hourly_role, rate=60)
+
+        self.flat = Contribution.objects.create(
+            contributor=self.contributor, role=self.flat_role, content=self.content
+        )
+        self.hourly = Contribution.objects.create(
+            contributor=self.contributor, role=self.hourly_role, content=self.content,
+            minutes_worked=30
+        )
+
+    def get_stored(self, contribution):
+        contribution = Contribution.objects.get(pk=contribution.pk)
+        return contribution.stored_pay, contribution.pay_version, contribution.role.rate_version
+
+    def get_indexed_pay(self, contribution):
+        Contribution.search_objects.refresh()
+        mapping = Contribution.search_objects.mapping
+        doc = Contribution.search_objects.client.get(
+            index=mapping.index, doc_type=mapping.doc_type, id=contribution.pk
+        )
+        return doc["_source"]["pay"]
+
+    def test_save(self):
+        stored_pay, pay_version, rate_version = self.get_stored(self.flat)
+        self.assertEqual((200, rate_version), (stored_pay, pay_version))
+        self.assertEqual(200, Contribution.objects.get(pk=self.flat.pk).pay)
+        self.assertEqual(30.0, Contribution.objects.get(pk=self.hourly.pk).pay)
+        self.assertEqual(200, self.get_indexed_pay(self.flat))
+
+        self.hourly.minutes_worked = 60
+        self.hourly.save()
+        self.assertEqual(60, self.get_stored(self.hourly)[0])
+
+    def test_role_rate_change(self):
+        _, pay_version, _ = self.get_stored(self.flat)
+        FlatRate.objects.create(role=self.flat_role, rate=300)
+
+        stored_pay, new_pay_version, rate_version = self.get_stored(self.flat)
+        self.assertEqual(300, stored_pay)
+        self.assertEqual(new_pay_version, rate_version)
+        self.assertGreater(new_pay_version, pay_version)
+        self.assertEqual(300, self.get_indexed_pay(self.flat))
+        # Other roles are untouched
+        self.assertEqual(30, self.get_stored(self.hourly)[0])
+
+        self.flat_role.payment_type = HOURLY
+        self.flat_role.save()
+        self.assertIsNone(self.get_stored(self.flat)[0])
+
+    def test_stale_until_recomputed(self):
+        # Changes are visible before their recompute runs, or if it never does
+        with mock.patch("bulbs.contributions.signals.update_role_rates"):
+            FlatRate.objects.create(role=self.flat_role, rate=300)
+        stored_pay, pay_version, rate_version = self.get_stored(self.flat)
+        self.assertEqual(200, stored_pay)
+        self.assertGreater(rate_version, pay_version)
+        self.assertEqual(300, Contribution.objects.get(pk=self.flat.pk).pay)
+        self.assertEqual(300, PayCalculator([self.flat], stored=True).get_pay(self.flat))
+
+        with mock.patch("bulbs.contributions.signals.update_override_profile_pay"):
+            OverrideProfile.objects.create(contributor=self.contributor, role=self.hourly_role)
+        self.assertIsNone(self.get_stored(self.hourly)[1])
+
+    def test_role_save(self):
+        stale = ContributorRole.objects.get(pk=self.flat_role.pk)
+        FlatRate.objects.create(role=self.flat_role, rate=300)
+        rate_version = self.get_stored(self.flat)[2]
+
+        # Renaming a role neither writes back its old version nor reprices its contributions
+        stale.name = "Renamed"
+        with mock.patch("bulbs.contributions.models.ContributorRole.update_rates") as update:
+            stale.save()
+        self.assertEqual(
+            rate_version, ContributorRole.objects.get(pk=self.flat_role.pk).rate_version
+        )
+        update.assert_called_once_with(False)
+
+        stale.payment_type = HOURLY
+        stale.save()
+        self.assertEqual(
+            rate_version + 1, ContributorRole.objects.get(pk=self.flat_role.pk).rate_version
+        )
+
+    def test_override_changes(self):
+        profile = OverrideProfile.objects.create(contributor=self.contributor, role=self.flat_role)
+        override = FlatRateOverride.objects.create(profile=profile, rate=80)
+        self.assertEqual(80, self.get_stored(self.flat)[0])
+        self.assertEqual(80, self.get_indexed_pay(self.flat))
+
+        ContributionOverride.objects.create(contribution=self.flat, rate=44)
+        self.assertEqual(44, self.get_stored(self.flat)[0])
+
+        ContributionOverride.objects.filter(contribution=self.flat).delete()
+        override.delete()
+        self.assertEqual(200, self.get_stored(self.flat)[0])
+
+        FlatRateOverride.objects.create(profile=profile, rate=90)
+        profile.delete()
+        self.assertEqual(200, self.get_stored(self.flat)[0])
+
+    def test_feature_type_rate_change(self):
+        role = ContributorRole.objects.create(name="Writer", payment_type=FEATURETYPE)
+        contribution = Contribution.objects.create(
+            contributor=self.contributor, role=role, content=self.content
+        )
+        self.assertEqual(0, self.get_stored(contribution)[0])
+
+        rate = FeatureTypeRate.objects.get(role=role, feature_type=self.feature_type)
+        rate.rate = 70
+        rate.save()
+        self.assertEqual(70, self.get_stored(contribution)[0])
+
+    def test_stored_pay(self):
+        # Stored pay is used while current...
+        Contribution.objects.filter(pk=self.flat.pk).update(stored_pay=1)
+        self.assertEqual(1, PayCalculator([self.flat], stored=True).get_pay(self.flat))
+        self.assertEqual(200, PayCalculator([self.flat]).get_pay(self.flat))
+
+        # ...and ignored once the role's rates change
+        ContributorRole.objects.filter(pk=self.flat_role.pk).update(rate_version=100)
+        self.assertEqual(200, PayCalculator([self.flat], stored=True).get_pay(self.flat))
+
+        call_command("update_contribution_pay")
+        self.assertEqual((200, 100, 100), self.get_stored(self.flat))
+
+    def test_update_pay_batches(self):
+        for _ in range(4):
+            Contribution.objects.create(
+                contributor=self.contributor, role=self.flat_role, content=self.content
+            )
+        Contribution.objects.update(stored_pay=None, pay_version=None)
+
+        client = Contribution.search_objects.client
+        with mock.patch.object(client, "bulk", wraps=client.bulk) as bulk:
+            update_pay(Contribution.objects.all(), batch_size=3)
+        self.assertEqual(2, bulk.call_count)
+        self.assertEqual(
+            [200] * 5 + [30],
+            sorted(Contribution.objects.values_list("stored_pay", flat=True), reverse=True)
+        )
+
+    def test_delete(self):
+        ContributionOverride.objects.create(contribution=self.flat, rate=44)
+        self.flat.delete()
+        Contribution.search_objects.refresh()
+        self.assertEqual(
+            [self.hourly.pk], [c.pk for c in Contribution.search_objects.search()]
+        )
@@ -1,14 +1,18 @@
 import csv
 import datetime
+import gzip
+import mock
 
 from django.contrib.auth import get_user_model
 from django.core.urlresolvers import reverse
+from django.db import connection
 from django.test.client import Client
-from django.test.utils import override_settings
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.utils import timezone
 from django.contrib.auth.models import User
 
-from six import StringIO
+from elasticsearch_dsl.connections import connections
+from six import BytesIO, StringIO
 
 from bulbs.content.models import Content, FeatureType
 from bulbs.content.serializers import DefaultUserSerializer
@@ -20,6 +24,7 @@ from bulbs.contributions.models import (
     ContributionOverride, FeatureTypeOverride, HourlyOverride, HourlyRate, ManualRate,
     OverrideProfile
 )
+from bulbs.contributions.pay import PayCalculator
 from bulbs.contributions.signals import *  # NOQA
 from bulbs.contributions.utils import get_forced_payment_contributions
 
@@ -274,6 +279,143 @@ class ContributionReportingTestCase(BaseAPITestCase):
         response = client.get(endpoint, data={"start": start_date.strftime("%Y-%m-%d")})
         self.assertEqual(response.status_code, 200)
 
+    def test_contribution_reporting_csv_export(self):
+        contents = [
+            make_content(authors=[], published=timezone.now() - datetime.timedelta(days=1))
+            for _ in range(5)
+        ]
+        for content in contents:
+            Contribution.objects.create(
+                content=content, contributor=self.chris, role=self.roles["editor"]
+            )
+        Contribution.search_objects.refresh()
+
+        endpoint = reverse("contributionreporting-list")
+        es = connections.get_connection()
+        with override_settings(CONTRIBUTION_REPORT_BATCH_SIZE=2):
+            with mock.patch.object(es, "scroll", wraps=es.scroll) as scroll:
+                response = self.api_client.get(endpoint, data={"format": "csv"})
+                rows = list(csv.reader(StringIO(''.join(
+                    v.decode('utf-8') for v in response.streaming_content
+                ))))
+        # Two more pages of two and one, and the empty page ending the scroll
+        self.assertEqual(3, scroll.call_count)
+        self.assertEqual("Content ID", rows[0][3])
+        self.assertEqual(
+            [(str(content.pk), "60") for content in contents],
+            [(row[3], row[6]) for row in rows[1:]]
+        )
+
+        response = self.api_client.get(
+            endpoint, data={"format": "csv", "gzip": "true"}, HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual("gzip", response["Content-Encoding"])
+        lines = gzip.GzipFile(
+            fileobj=BytesIO(b''.join(response.streaming_content))
+        ).read().decode('utf-8').splitlines()
+        self.assertEqual(6, len(lines))
+
+    def test_search_results_hydrated(self):
+        def parse_page(size):
+            with CaptureQueriesContext(connection) as queries:
+                page = list(Contribution.search_objects.search().sort("id").extra(size=size))
+            return page, len(queries)
+
+        contents = [Content.objects.create(title="Content {}".format(i)) for i in range(6)]
+        for i, content in enumerate(contents):
+            Contribution.objects.create(
+                content=content, contributor=(self.chris, self.mike)[i % 2],
+                role=self.roles["editor"]
+            )
+        Contribution.search_objects.refresh()
+
+        _, small_page_queries = parse_page(2)
+        page, queries = parse_page(6)
+        # One query per model, however long the page
+        self.assertEqual(small_page_queries, queries)
+        self.assertEqual(
+            [(content.pk, content.title) for content in contents],
+            [(contribution.content.pk, contribution.content.title) for contribution in page]
+        )
+        self.assertEqual(
+            ["csinchok", "mwnuk"] * 3,
+            [contribution.contributor.username for contribution in page]
+        )
+
+        # Single documents are still parsed on their own
+        contribution = Contribution.search_objects.get(id=page[0].pk)
+        self.assertEqual(contents[0].pk, contribution.content.pk)
+
+    def create_totals_contributions(self):
+        FreelanceProfile.objects.create(contributor=self.mike, is_freelance=True)
+        recent = make_content(
+            authors=[], feature_type=self.tvclub,
+            published=timezone.now() - datetime.timedelta(days=1)
+        )
+        older = make_content(
+            authors=[], feature_type=self.tvclub,
+            published=timezone.now() - datetime.timedelta(days=10)
+        )
+        for content in recent, older:
+            Contribution.objects.create(
+                content=content, contributor=self.chris, role=self.roles["editor"]
+            )
+            Contribution.objects.create(
+                content=content, contributor=self.mike, role=self.roles["writer"]
+            )
+        Contribution.objects.create(
+            content=recent, contributor=self.mike, role=self.roles["editor"]
+        )
+        Contribution.search_objects.refresh()
+        return recent, older
+
+    def test_contributor_totals(self):
+        self.create_totals_contributions()
+        endpoint = reverse("contributor-totals-list")
+
+        response = self.api_client.get(endpoint)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data["pay"], 320)
+        self.assertEqual(response.data["contributions"], 5)
+        mike, chris = response.data["results"]
+        self.assertEqual((mike["id"], mike["username"]), (self.mike.pk, "mwnuk"))
+        self.assertEqual((mike["pay"], mike["contributions"]), (200, 3))
+        self.assertEqual(
+            [("Writer", 140, 2), ("Editor", 60, 1)],
+            sorted(
+                [(role["name"], role["pay"], role["contributions"]) for role in mike["roles"]],
+                reverse=True
+            )
+        )
+        self.assertEqual(
+            [{"slug": "tv-club", "pay": 200, "contributions": 3}], mike["feature_types"]
+        )
+        self.assertEqual((chris["id"], chris["pay"]), (self.chris.pk, 120))
+
+        # Reporting filters apply
+        start_date = timezone.now() - datetime.timedelta(days=4)
+        response = self.api_client.get(endpoint, data={
+            "start": start_date.strftime("%Y-%m-%d"), "staff": "freelance"
+        })
+        self.assertEqual(response.data["pay"], 130)
+        self.assertEqual([self.mike.pk], [row["id"] for row in response.data["results"]])
+
+        response = self.api_client.get(endpoint, data={"contributors": ["csinchok"]})
+        self.assertEqual([self.chris.pk], [row["id"] for row in response.data["results"]])
+
+    def test_content_totals(self):
+        recent, older = self.create_totals_contributions()
+
+        response = self.api_client.get(reverse("content-totals-list"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(2, response.data["count"])
+        first, second = response.data["results"]
+        self.assertEqual(
+            (recent.pk, recent.title, 190, 3),
+            (first["id"], first["title"], first["pay"], first["contributions"])
+        )
+        self.assertEqual((older.pk, 130), (second["id"], second["pay"]))
+
 
 class RatePayTestCase(BaseIndexableTestCase):
 
@@ -548,6 +690,51 @@ class RatePayTestCase(BaseIndexableTestCase):
         contribution = self.contributions['manual']
         self.assertEqual(contribution.get_pay, 1000)
 
+    def test_pay_calculator(self):
+        FeatureTypeOverride.objects.create(
+            profile=self.overrides['jarvis']['featuretype'],
+            feature_type=self.feature_types['news'],
+            rate=22
+        )
+        HourlyOverride.objects.create(profile=self.overrides['jarvis']['hourly'], rate=16)
+        contributions = Contribution.objects.all()
+        expected = {
+            self.contributions['featuretype']['tvclub'].pk: 30,
+            self.contributions['featuretype']['news'].pk: 22,
+            self.contributions['flatrate'].pk: 200,
+            self.contributions['hourly'].pk: 8,
+            self.contributions['manual'].pk: 1000,
+        }
+
+        for scope in (contributions, list(contributions)):
+            calculator = PayCalculator(scope)
+            self.assertEqual(
+                expected,
+                dict((c.pk, calculator.get_pay(c)) for c in contributions)
+            )
+            # Same as pricing each contribution on its own
+            self.assertEqual(
+                dict((c.pk, c.get_pay) for c in contributions),
+                dict((c.pk, calculator.get_pay(c)) for c in contributions)
+            )
+
+    def test_pay_calculator_queries(self):
+        for i in range(10):
+            content = Content.objects.create(
+                title='Content #{}'.format(i), feature_type=self.feature_types['news']
+            )
+            for role in self.roles.values():
+                Contribution.objects.create(
+                    contributor=self.contributors['jarvis'], role=role, content=content
+                )
+        contributions = list(Contribution.objects.all())
+
+        # One query per rate table, however many contributions
+        with self.assertNumQueries(11):
+            calculator = PayCalculator(Contribution.objects.all())
+            for contribution in contributions:
+                calculator.get_pay(contribution)
+
     def test_force_payment(self):
         content = Content.objects.create(title='Hello my friend')
         contribution = Contribution.objects.create(
@@ -1,11 +1,19 @@
 from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test.utils import override_settings
+from django.utils import timezone
 
 from bulbs.content.models import Content, FeatureType
 from bulbs.contributions.models import (
     Contribution, ContributorRole, FeatureTypeRate, FeatureTypeOverride, FlatRate,
     FlatRateOverride, HourlyRate, HourlyOverride, OverrideProfile
 )
-from bulbs.contributions.utils import merge_roles
+from bulbs.contributions.signals import *  # NOQA
+from bulbs.contributions.utils import (
+    create_author_contributions, create_feature_type_rates, get_default_role,
+    get_default_role_id, get_missing_author_contributions, merge_roles
+)
 
 from bulbs.utils.test import BaseIndexableTestCase
 
@@ -112,3 +120,98 @@ class MergeRoleTestCase(BaseIndexableTestCase):
         )
         self.assertTrue(self.dominant.overrides.first().override_flatrate.exists())
         self.assertTrue(self.dominant.overrides.first().override_hourly.exists())
+
+    def test_merge_dry_run(self):
+        summary = merge_roles(self.dominant.name, self.deprecated.name, dry_run=True)
+        self.assertEqual(50, summary["contributions"])
+        self.assertEqual(len(self.feature_types), summary["feature_type_rates"])
+        self.assertEqual(len(self.feature_types), summary["replaced_feature_type_rates"])
+        self.assertEqual(1, summary["overrides"])
+        self.assertEqual(50, self.deprecated.contribution_set.count())
+        self.assertFalse(self.dominant.overrides.exists())
+
+        self.assertEqual(summary, merge_roles(self.dominant.name, self.deprecated.name))
+        self.assertEqual(0, self.deprecated.contribution_set.count())
+
+    def test_merge_missing_role(self):
+        self.assertIsNone(merge_roles(self.dominant.name, "Nobody"))
+
+
+class FeatureTypeRateTestCase(BaseIndexableTestCase):
+
+    def test_create_feature_type_rates(self):
+        roles = [ContributorRole.objects.create(name=name) for name in ("Writer", "Editor")]
+        feature_type = FeatureType.objects.create(name="surf")
+        rates = FeatureTypeRate.objects.filter(feature_type=feature_type, role__in=roles)
+        self.assertEqual(2, rates.count())
+
+        rates.filter(role=roles[0]).delete()
+        roles = ContributorRole.objects.filter(pk__in=[role.pk for role in roles])
+        feature_types = FeatureType.objects.filter(pk=feature_type.pk)
+        self.assertEqual(1, create_feature_type_rates(roles, feature_types))
+        self.assertEqual(0, create_feature_type_rates(roles, feature_types))
+        self.assertEqual([0, 0], [rate.rate for rate in rates])
+
+
+@override_settings(
+    DEFAULT_CONTRIBUTOR_ROLE="Draft Writer",
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+)
+class AuthorContributionsTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(AuthorContributionsTestCase, self).setUp()
+        cache.clear()
+        user_cls = get_user_model()
+        self.authors = [
+            user_cls.objects.create(username="author{}".format(i)) for i in range(3)
+        ]
+        self.content = [
+            Content.objects.create(title="Content {}".format(i), published=timezone.now())
+            for i in range(4)
+        ]
+
+    def get_pairs(self):
+        return sorted(Contribution.objects.values_list("content_id", "contributor_id"))
+
+    def test_authors_added(self):
+        self.content[0].authors.add(*self.authors[:2])
+        self.content[0].authors.add(self.authors[2])
+        self.authors[0].content_set.add(self.content[1])
+        expected = [(self.content[0].pk, author.pk) for author in self.authors]
+        expected.append((self.content[1].pk, self.authors[0].pk))
+        self.assertEqual(sorted(expected), self.get_pairs())
+        role = get_default_role()
+        self.assertEqual("Draft Writer", role.name)
+        self.assertEqual(4, Contribution.objects.filter(role=role, stored_pay__isnull=False).count())
+
+        Contribution.search_objects.refresh()
+        self.assertEqual(4, Contribution.search_objects.search().count())
+
+    def test_default_role_cached(self):
+        role_id = get_default_role_id()
+        with self.assertNumQueries(0):
+            self.assertEqual(role_id, get_default_role_id())
+        self.assertEqual("Draft Writer", ContributorRole.objects.get(pk=role_id).name)
+
+        # Deleting the role clears the shared cache, so no process keeps pointing at it
+        ContributorRole.objects.filter(pk=role_id).delete()
+        new_role_id = get_default_role_id()
+        self.assertNotEqual(role_id, new_role_id)
+        self.assertEqual("Draft Writer", ContributorRole.objects.get(pk=new_role_id).name)
+
+    def test_backfill(self):
+        for i, content in enumerate(self.content):
+            content.authors.add(*self.authors[:i])
+        self.assertEqual([], get_missing_author_contributions([c.pk for c in self.content]))
+        expected = self.get_pairs()
+        Contribution.objects.filter(contributor=self.authors[0]).delete()
+        self.assertEqual(
+            [(content.pk, self.authors[0].pk) for content in self.content[1:]],
+            sorted(get_missing_author_contributions([c.pk for c in self.content]))
+        )
+
+        call_command("backfill_contributions", batch_size=2)
+        self.assertEqual(expected, self.get_pairs())
+        # Nothing left to create
+        self.assertEqual(0, create_author_contributions([c.pk for c in self.content]))
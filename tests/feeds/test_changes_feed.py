@@ -0,0 +1,100 @@
+import json
+
+from freezegun import freeze_time
+
+from django.core.urlresolvers import reverse
+from django.test.client import Client
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from bulbs.content.models import Content
+from bulbs.utils.test import BaseIndexableTestCase, make_content
+
+from example.testcontent.models import TestContentObj
+
+
+@override_settings(BETTY_IMAGE_URL='//images.onionstatic.com/onion')
+class ChangesFeedTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(ChangesFeedTestCase, self).setUp()
+        self.content = []
+        start = timezone.now() - timezone.timedelta(hours=10)
+        for hours in range(5):
+            with freeze_time(start + timezone.timedelta(hours=hours)):
+                self.content.append(make_content(
+                    TestContentObj, published=start - timezone.timedelta(days=1)
+                ))
+
+    def get_changes(self, status_code=200, **params):
+        Content.search_objects.refresh()
+        resp = Client().get(reverse('changes-feed'), params, SERVER_NAME='www.theonion.com')
+        self.assertEqual(status_code, resp.status_code)
+        return json.loads(resp.content.decode('utf-8'))
+
+    def sync(self, cursor=None, limit=2):
+        """Walks the feed to the end, returning the changes and the final cursor."""
+        changes = []
+        while True:
+            params = {'limit': limit}
+            if cursor:
+                params['cursor'] = cursor
+            resp = self.get_changes(**params)
+            changes.extend(resp['results'])
+            if not resp['results']:
+                return changes, cursor
+            cursor = resp['next']
+
+    def test_walk(self):
+        changes, cursor = self.sync()
+        self.assertEqual([c.id for c in self.content], [c['id'] for c in changes])
+        self.assertFalse(any(c['deleted'] for c in changes))
+
+        # Nothing more until something changes
+        resp = self.get_changes(cursor=cursor)
+        self.assertEqual(resp, {'next': cursor, 'results': []})
+
+    def test_changed_since_cursor(self):
+        _, cursor = self.sync()
+        self.content[1].title = 'Updated'
+        self.content[1].save()
+
+        changes, _ = self.sync(cursor)
+        self.assertEqual([(self.content[1].id, 'Updated')],
+                         [(c['id'], c['title']) for c in changes])
+
+    def test_tombstones(self):
+        _, cursor = self.sync()
+        deleted_id = self.content[0].id
+        self.content[0].delete()
+        self.content[2].indexed = False
+        self.content[2].save()
+
+        changes, _ = self.sync(cursor)
+        self.assertEqual([(deleted_id, True), (self.content[2].id, True)],
+                         [(c['id'], c['deleted']) for c in changes])
+
+    def test_unpublished(self):
+        _, cursor = self.sync()
+        self.content[3].published = None
+        self.content[3].save()
+
+        changes, _ = self.sync(cursor)
+        self.assertEqual([(self.content[3].id, True)], [(c['id'], c['deleted']) for c in changes])
+
+    def test_scheduled(self):
+        publish_at = timezone.now() + timezone.timedelta(hours=1)
+        self.content[3].published = publish_at
+        self.content[3].save()
+
+        changes, cursor = self.sync()
+        self.assertEqual((self.content[3].id, True), (changes[-1]['id'], changes[-1]['deleted']))
+
+        # Going live isn't a change to the content, but shows up after the cursor all the same
+        with freeze_time(publish_at + timezone.timedelta(minutes=1)):
+            changes, _ = self.sync(cursor)
+        self.assertEqual([(self.content[3].id, False)], [(c['id'], c['deleted']) for c in changes])
+
+    def test_invalid_cursor(self):
+        self.get_changes(status_code=400, cursor='not-a-cursor')
+        self.get_changes(status_code=400, limit='many')
@@ -2,13 +2,16 @@ from datetime import datetime
 import json
 
 from freezegun import freeze_time
+import mock
 
 from django.core.urlresolvers import reverse
 from django.test.client import Client
 from django.test.utils import override_settings
 from django.utils import timezone
 
+from bulbs.content import TagCache
 from bulbs.content.models import Tag
+from bulbs.feeds.serializers import is_search_result
 from bulbs.utils.test import BaseIndexableTestCase, make_content
 
 from example.testcontent.models import TestContentObj
@@ -111,3 +114,34 @@ class GlanceFeedTestCase(BaseIndexableTestCase):
         content.published = timezone.now() - timezone.timedelta(hours=1)
         content.save()
         self.assertEqual(1, self.get_feed()['count'])
+
+    def test_filter_published_per_request(self):
+        # Published after the feed was first imported
+        with freeze_time(timezone.now() + timezone.timedelta(days=1)):
+            make_content(TestContentObj, published=timezone.now() - timezone.timedelta(hours=1))
+            self.assertEqual(1, self.get_feed()['count'])
+
+    def test_tags_ordered_by_popularity(self):
+        published = timezone.now() - timezone.timedelta(hours=1)
+        rare, popular = [Tag.objects.create(name=name) for name in ['Rare', 'Popular']]
+        content = make_content(TestContentObj, published=published, _quantity=3)
+        for c in content:
+            c.tags.add(popular)
+            c.save()
+        content[0].tags.add(rare)
+        content[0].save()
+
+        with mock.patch.dict(TagCache._cache, clear=True):
+            results = self.get_feed()['results']
+        self.assertEqual(3, len(results))
+        for result in results:
+            expected = ['Popular', 'Rare'] if result['id'] == content[0].id else ['Popular']
+            self.assertEqual(expected, result['tags']['section'])
+
+    def test_is_search_result(self):
+        content = make_content(TestContentObj, published=timezone.now())
+        TestContentObj.search_objects.refresh()
+        self.assertTrue(is_search_result(TestContentObj.search_objects.search()[0]))
+        self.assertFalse(is_search_result(content))
+        # Deferred fields alone don't make an instance a search result
+        self.assertFalse(is_search_result(TestContentObj.objects.only('id').get(id=content.id)))
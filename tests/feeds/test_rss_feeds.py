@@ -1,9 +1,13 @@
 from datetime import timedelta
 
+from django.core.cache import cache
 from django.core.urlresolvers import reverse
+from django.test import override_settings
 from django.test.client import Client
 from django.utils import timezone
 
+from bulbs.content.models import FeatureType
+from bulbs.feeds.utils import get_feed_generation
 from bulbs.special_coverage.models import SpecialCoverage
 from bulbs.super_features.models import BaseSuperFeature, GUIDE_TO_HOMEPAGE
 from bulbs.utils.test import BaseIndexableTestCase, make_content
@@ -125,3 +129,70 @@ class RSSTestCase(BaseIndexableTestCase):
         # verify nothing is returned
         object_list = response.context["page_obj"].object_list
         self.assertEqual(len(object_list), 0)
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class CachedRSSTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(CachedRSSTestCase, self).setUp()
+        cache.clear()
+        self.content = make_content(
+            TestContentObj, published=timezone.now() - timedelta(hours=2), _quantity=5
+        )
+        TestContentObj.search_objects.refresh()
+
+    def test_conditional_headers(self):
+        response = Client().get(reverse("rss-feed"))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/rss+xml")
+        self.assertIn("ETag", response)
+        self.assertIn("Last-Modified", response)
+
+    def test_if_none_match(self):
+        client = Client()
+        response = client.get(reverse("rss-feed"))
+        response = client.get(reverse("rss-feed"), HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+
+        response = client.get(reverse("rss-feed"), HTTP_IF_NONE_MATCH='"stale"')
+        self.assertEqual(response.status_code, 200)
+
+    def test_if_modified_since(self):
+        client = Client()
+        response = client.get(reverse("rss-feed"))
+        response = client.get(
+            reverse("rss-feed"), HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(response.status_code, 304)
+
+    def test_cached_render(self):
+        client = Client()
+        first = client.get(reverse("rss-feed"))
+        second = client.get(reverse("rss-feed"))
+        # Served from the cache without running the query or rendering the template.
+        self.assertIsNone(second.context)
+        self.assertEqual(first.content, second.content)
+        self.assertEqual(first["ETag"], second["ETag"])
+
+    def test_invalidated_on_save(self):
+        client = Client()
+        first = client.get(reverse("rss-feed"))
+
+        self.content[0].title = "Updated"
+        self.content[0].save()
+        TestContentObj.search_objects.refresh()
+
+        second = client.get(reverse("rss-feed"), HTTP_IF_NONE_MATCH=first["ETag"])
+        self.assertEqual(second.status_code, 200)
+        self.assertNotEqual(first["ETag"], second["ETag"])
+        self.assertIn("Updated", second.content.decode("utf-8"))
+
+    def test_unrelated_save(self):
+        generation = get_feed_generation()
+        FeatureType.objects.create(name="Unrelated")
+        self.assertEqual(generation, get_feed_generation())
+
+        self.content[0].save()
+        self.assertNotEqual(generation, get_feed_generation())
@@ -1,4 +1,14 @@
+import os
+import shutil
+import tempfile
+
+from mock import patch
+import six
+
 from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test.utils import override_settings
+from django.utils import timezone
 
 from bulbs.content.models import FeatureType
 from bulbs.utils.test import make_content, BaseIndexableTestCase
@@ -24,3 +34,76 @@ class MigrateIAFeatureTypeTestCase(BaseIndexableTestCase):
         call_command("migrate_ia_featuretype", "--slug", self.featuretype.slug)
         TestContentObj.search_objects.refresh()
         self.assertEqual(TestContentObj.search_objects.instant_articles().count(), 50)
+
+
+@override_settings(FACEBOOK_POST_TO_IA=True)
+class MigrateToIATestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(MigrateToIATestCase, self).setUp()
+        self.featuretype = FeatureType.objects.create(name="News in Brief", instant_article=True)
+        self.content = make_content(
+            TestContentObj,
+            published=self.now - timezone.timedelta(hours=1),
+            feature_type=self.featuretype,
+            _quantity=5
+        )
+        self.content[0].instant_article_id = 1234
+        self.content[0].save()
+        self.checkpoint = os.path.join(tempfile.mkdtemp(), "checkpoint")
+        self.addCleanup(shutil.rmtree, os.path.dirname(self.checkpoint))
+
+    def call_command(self, *args, **kwargs):
+        with patch(
+                "bulbs.content.management.commands.migrate_to_ia.post_to_instant_articles_api"
+        ) as task:
+            task.delay.side_effect = kwargs.get("post")
+            call_command(
+                "migrate_to_ia", self.featuretype.slug, "--bulk",
+                "--rate", kwargs.get("rate", "1000"),
+                "--in-flight-timeout", "0", "--checkpoint", self.checkpoint, *args,
+                stdout=six.StringIO()
+            )
+            return [c[0][0] for c in task.delay.call_args_list]
+
+    def test_bulk(self):
+        queued = self.call_command()
+        # Already migrated content is skipped
+        self.assertEqual(queued, sorted(c.id for c in self.content[1:]))
+
+    def test_resume_from_checkpoint(self):
+        pks = sorted(c.id for c in self.content[1:])
+        with open(self.checkpoint, "w") as f:
+            f.write(str(pks[1]))
+        self.assertEqual(self.call_command(), pks[2:])
+
+    def test_checkpoint_finished_only(self):
+        pks = sorted(c.id for c in self.content[1:])
+
+        def post(pk):
+            # Every import but the second one finishes
+            if pk != pks[1]:
+                TestContentObj.objects.filter(pk=pk).update(instant_article_id=pk)
+
+        self.assertEqual(self.call_command(post=post), pks)
+        with open(self.checkpoint) as f:
+            self.assertEqual(int(f.read()), pks[0])
+        # The unfinished import is queued again
+        self.assertEqual(self.call_command(), [pks[1]])
+
+    def test_dry_run(self):
+        self.assertEqual(self.call_command("--dry-run"), [])
+        self.assertFalse(os.path.exists(self.checkpoint))
+
+    def test_invalid_rate(self):
+        with self.assertRaises(CommandError):
+            self.call_command(rate="0")
+        with self.assertRaises(CommandError):
+            self.call_command(rate="-1")
+
+    def test_posting_disabled(self):
+        with self.settings(FACEBOOK_POST_TO_IA=False):
+            with self.assertRaises(CommandError):
+                self.call_command()
+            # Nothing is posted by a dry run either way
+            self.assertEqual(self.call_command("--dry-run"), [])
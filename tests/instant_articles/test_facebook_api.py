@@ -4,7 +4,9 @@ from django.utils import timezone
 from django.test.utils import override_settings
 
 from bulbs.content.models import FeatureType, Content
+from bulbs.content.tasks import get_import_status_countdown
 from bulbs.utils.test import BaseIndexableTestCase
+from bulbs.utils.test.facebook_stub import stub_facebook_api
 from bulbs.utils.test.mock_vault import mock_vault
 
 from example.testcontent.models import TestContentObjThree
@@ -173,3 +175,51 @@ class FacebookAPITestCase(BaseIndexableTestCase):
             content.delete()
 
             self.assertEqual(mocker.call_count, 4)
+
+
+@override_settings(FACEBOOK_POST_TO_IA=True)
+class FacebookImportStatusTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(FacebookImportStatusTestCase, self).setUp()
+        self.ft = FeatureType.objects.create(name="NIP", instant_article=True)
+        self.content = TestContentObjThree.objects.create(
+            body="<p>This is the body</p>",
+            feature_type=self.ft)
+
+    def publish(self):
+        self.content.published = timezone.now()
+        self.content.save()
+        return Content.objects.get(id=self.content.id)
+
+    @mock_vault({'facebook/onion_token': {'authtoken': 'TOKEN'}})
+    def test_success_after_processing(self):
+        with stub_facebook_api(statuses=["IN_PROGRESS", "IN_PROGRESS", "SUCCESS"]) as stub:
+            content = self.publish()
+            self.assertEqual(stub.status_checks, 3)
+            self.assertEqual(content.instant_article_id, 420)
+            # Post, three status checks and the canonical URL lookup
+            self.assertEqual(len(stub.requests), 5)
+
+    @override_settings(FACEBOOK_IMPORT_STATUS_MAX_ATTEMPTS=3)
+    @mock_vault({'facebook/onion_token': {'authtoken': 'TOKEN'}})
+    def test_gives_up(self):
+        with stub_facebook_api(statuses=["IN_PROGRESS"]) as stub:
+            content = self.publish()
+            self.assertEqual(stub.status_checks, 3)
+            self.assertIsNone(content.instant_article_id)
+
+    @mock_vault({'facebook/onion_token': {'authtoken': 'TOKEN'}})
+    def test_import_error(self):
+        with stub_facebook_api(statuses=["ERROR"]) as stub:
+            content = self.publish()
+            self.assertEqual(stub.status_checks, 1)
+            self.assertEqual(len(stub.requests), 2)
+            self.assertIsNone(content.instant_article_id)
+
+    @override_settings(FACEBOOK_IMPORT_STATUS_BACKOFF=2, FACEBOOK_IMPORT_STATUS_MAX_BACKOFF=30)
+    def test_backoff(self):
+        self.assertEqual(
+            [get_import_status_countdown(attempt) for attempt in range(6)],
+            [2, 4, 8, 16, 30, 30]
+        )
@@ -5,7 +5,8 @@ import unittest
 
 from bs4 import BeautifulSoup
 
-from bulbs.instant_articles.parser import (parse_betty,
+from bulbs.instant_articles.parser import (PARSERS,
+                                           parse_betty,
                                            parse_body,
                                            parse_facebook,
                                            parse_imgur,
@@ -20,7 +21,22 @@ from bulbs.instant_articles.parser import (parse_betty,
 
 
 def parse_raw_tag(html):
-    return [c for c in BeautifulSoup(html.strip()).children][0]
+    return [c for c in BeautifulSoup(html.strip(), 'html.parser').children][0]
+
+
+def parse_children_exhaustively(parent):
+    """Reference implementation, trying every parser on every tag."""
+    components = []
+    for tag in parent.children:
+        for parser in PARSERS:
+            matched = parser(tag)
+            if matched:
+                components.append(matched)
+                break
+        else:
+            if hasattr(tag, 'contents'):
+                components += parse_children_exhaustively(tag)
+    return components
 
 
 def read_data(name):
@@ -48,6 +64,17 @@ class ParseBodyTest(unittest.TestCase):
                           {'text': {'raw': '<p>Third paragraph.</p>'}}],
                          parse_body(read_data('body-multiple')))
 
+    def test_matches_exhaustive_parse(self):
+        here = os.path.dirname(os.path.realpath(__file__))
+        for filename in os.listdir(os.path.join(here, 'test_data', 'input')):
+            html = read_data(os.path.splitext(filename)[0])
+            for features in ['lxml', 'html.parser']:
+                self.assertEqual(
+                    parse_children_exhaustively(BeautifulSoup(html, features)),
+                    parse_body(html),
+                    filename
+                )
+
 
 class ParseBettyTest(unittest.TestCase):
 
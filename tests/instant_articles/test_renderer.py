@@ -2,6 +2,7 @@
 
 from mock import patch
 
+from django.template import loader
 from django.test import TestCase
 
 from bulbs.instant_articles.renderer import InstantArticleRenderer
@@ -142,3 +143,23 @@ class InstantArticleRendererTests(TestCase):
             output.replace('\n', ''),
             '<figure class="op-interactive"><iframe width="560" height="315" src="https://www.youtube.com/embed/2vnd49" frameborder="0" allowfullscreen></iframe></figure>'
         )
+
+    def test_render_unknown(self):
+        with self.assertRaises(Exception):
+            self.renderer.render_item("unknown", {})
+
+    def test_template_cache(self):
+        with patch('bulbs.instant_articles.renderer._template_cache', {}):
+            with patch('django.template.loader.get_template',
+                       wraps=loader.get_template) as get_template:
+                body = self.renderer.generate_body([
+                    {"youtube": {"video_id": "2vnd49"}},
+                    {"text": {"raw": "<p>Text</p>"}},
+                    {"youtube": {"video_id": "abc123"}},
+                ])
+                self.assertEqual(get_template.call_count, 1)
+
+        parts = body.split('\n')
+        self.assertIn('2vnd49', parts[0])
+        self.assertEqual(parts[1], '<p>Text</p>')
+        self.assertIn('abc123', parts[-1])
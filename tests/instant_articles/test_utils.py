@@ -0,0 +1,75 @@
+from mock import patch
+
+from elasticsearch_dsl import filter as es_filter
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from bulbs.content.models import Content, FeatureType
+from bulbs.instant_articles.utils import get_transformed_body, render_instant_article
+from bulbs.utils.test import BaseIndexableTestCase
+
+from example.testcontent.models import TestContentObjThree
+
+
+@override_settings(CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}})
+class InstantArticleCacheTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(InstantArticleCacheTestCase, self).setUp()
+        cache.clear()
+        self.feature_type = FeatureType.objects.create(name="NIP", instant_article=True)
+        self.content = TestContentObjThree.objects.create(
+            body="<p>This is the body</p>",
+            feature_type=self.feature_type
+        )
+
+    def test_transformed_body_cached(self):
+        with patch("bulbs.instant_articles.utils.transform") as transform:
+            transform.return_value = "<p>Transformed</p>"
+            self.assertEqual(get_transformed_body(self.content), "<p>Transformed</p>")
+            self.assertEqual(get_transformed_body(self.content), "<p>Transformed</p>")
+            self.assertEqual(transform.call_count, 1)
+
+    def test_keyed_by_revision(self):
+        get_transformed_body(self.content)
+        # Saved again within the same second
+        self.content.body = "<p>This is the new body</p>"
+        self.content.save()
+        self.assertIn("new body", get_transformed_body(self.content))
+
+    def test_authors_change_revision(self):
+        self.assertNotIn("Jarvis", render_instant_article(self.content))
+        author = get_user_model().objects.create(
+            username="jarvis", first_name="Jarvis", last_name="Monster"
+        )
+        self.content.authors.add(author)
+        self.assertIn("Jarvis Monster", render_instant_article(self.content))
+
+        author.content_set.clear()
+        self.assertNotIn("Jarvis", render_instant_article(self.content))
+
+    def test_template_version(self):
+        with patch("bulbs.instant_articles.utils.transform") as transform:
+            transform.return_value = "<p>Transformed</p>"
+            get_transformed_body(self.content)
+            with override_settings(INSTANT_ARTICLE_TEMPLATE_VERSION=2):
+                get_transformed_body(self.content)
+            self.assertEqual(transform.call_count, 2)
+
+    def test_precomputed_on_save(self):
+        self.content.published = timezone.now()
+        with patch("bulbs.instant_articles.utils.transform") as transform:
+            transform.return_value = "<p>Transformed</p>"
+            self.content.save()
+            self.assertEqual(transform.call_count, 1)
+
+            # Content hydrated from Elasticsearch shares the cached render.
+            Content.search_objects.refresh()
+            content = Content.search_objects.search().filter(
+                es_filter.Ids(values=[self.content.id])
+            )[0]
+            self.assertIn("Transformed", render_instant_article(content))
+            self.assertEqual(transform.call_count, 1)
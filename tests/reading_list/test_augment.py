@@ -0,0 +1,128 @@
+import time
+
+import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+from bulbs.content.models import Content
+from bulbs.reading_list.augment import (
+    AUGMENT_POOL_CACHE_KEY, SPONSORED, VIDEO, get_augment_pool, get_augment_type,
+    sample_augment, sample_first_augment
+)
+from bulbs.utils.test import make_content
+
+from example.testcontent.models import TestReadingListObj, AnotherTestReadingListObj
+from .test_mixins import BaseReadingListTestCase
+
+
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    READING_LIST_CONFIG={"augment_pool": True}
+)
+class AugmentPoolTestCase(BaseReadingListTestCase):
+
+    def setUp(self):
+        super(AugmentPoolTestCase, self).setUp()
+        cache.clear()
+        self.sponsored_content = make_content(
+            TestReadingListObj,
+            published=self.now - timezone.timedelta(hours=9),
+            tunic_campaign_id=1,
+            _quantity=10
+        )
+        Content.search_objects.refresh()
+
+    def test_pool(self):
+        pool = get_augment_pool(SPONSORED)
+        self.assertEqual(
+            sorted(pk for _, pk in pool["references"]),
+            sorted(obj.id for obj in self.sponsored_content)
+        )
+        self.assertEqual(get_augment_type(), SPONSORED)
+
+    @override_settings(READING_LIST_CONFIG={
+        "excluded_doc_types": [TestReadingListObj.search_objects.mapping.doc_type]
+    })
+    def test_pool_excluded_doc_types(self):
+        sponsored_content = make_content(
+            AnotherTestReadingListObj,
+            published=self.now - timezone.timedelta(hours=9),
+            tunic_campaign_id=1,
+            _quantity=2
+        )
+        Content.search_objects.refresh()
+        pool = get_augment_pool(SPONSORED)
+        self.assertEqual(
+            sorted(pk for _, pk in pool["references"]),
+            sorted(obj.id for obj in sponsored_content)
+        )
+
+    def test_sample_seeded(self):
+        excluded = self.sponsored_content[0].id
+        sample = sample_augment(SPONSORED, excluded_ids=[excluded], seed=1)
+        self.assertNotEqual(sample[1], excluded)
+        for _ in range(5):
+            self.assertEqual(sample_augment(SPONSORED, excluded_ids=[excluded], seed=1), sample)
+
+    def test_sample_no_candidates(self):
+        excluded_ids = [obj.id for obj in self.sponsored_content]
+        self.assertIsNone(sample_augment(SPONSORED, excluded_ids=excluded_ids))
+
+    def test_sample_falls_through(self):
+        cache.set(
+            AUGMENT_POOL_CACHE_KEY.format(VIDEO),
+            {"references": [["video", 1234]], "timestamp": time.time()}
+        )
+        excluded_ids = [obj.id for obj in self.sponsored_content]
+        # Sponsored content is eligible, but every item of it is excluded
+        self.assertEqual(get_augment_type(), SPONSORED)
+        self.assertEqual(sample_first_augment(SPONSORED, excluded_ids=excluded_ids), ["video", 1234])
+        self.assertIsNone(sample_first_augment(VIDEO, excluded_ids=[1234]))
+
+    def test_pool_disabled(self):
+        self.add_section_identifiers()
+        with self.settings(READING_LIST_CONFIG={}):
+            reading_list = self.query_content[0].get_reading_list_context()["content"]
+        self.assertEqual(reading_list.default_queryset.count(), 4)
+
+    def test_stale_pool_refresh(self):
+        pool = get_augment_pool(SPONSORED)
+        pool["timestamp"] = time.time() - 60 * 60
+        cache.set(AUGMENT_POOL_CACHE_KEY.format(SPONSORED), pool)
+        with mock.patch("bulbs.reading_list.tasks.refresh_augment_pool.delay") as delay:
+            self.assertEqual(get_augment_pool(SPONSORED), pool)
+            self.assertEqual(get_augment_pool(SPONSORED), pool)
+            delay.assert_called_once_with(SPONSORED)
+
+    def test_augmentation_without_es_scoring(self):
+        self.add_section_identifiers()
+        example = self.query_content[0]
+        # Warm the pools.
+        get_augment_type()
+        client = Content.search_objects.client
+        with mock.patch.object(client, "search", wraps=client.search) as search:
+            with mock.patch.object(client, "count", wraps=client.count) as count:
+                reading_list = example.get_reading_list_context()["content"]
+                results = [obj for obj in reading_list]
+        # Only the ids of the primary list are searched for, without random scoring
+        self.assertEqual(search.call_count, 1)
+        self.assertNotIn("random_score", str(search.call_args))
+        self.assertEqual(count.call_count, 0)
+        self.assertIn(results[0].id, [obj.id for obj in self.sponsored_content])
+        self.assertNotIn(results[0].id, [obj.id for obj in results[1:]])
+
+    def test_augment_not_in_primary_list(self):
+        # Every sponsored item but one is already in the section's reading list
+        self.section.query = {"included_ids": [obj.id for obj in self.query_content] + [
+            obj.id for obj in self.sponsored_content[:-1]
+        ]}
+        self.section.save()
+        Content.search_objects.refresh()
+
+        example = self.query_content[0]
+        self.assertEqual(example.reading_list_identifier, self.section.es_id)
+        results = [obj for obj in example.get_reading_list_context()["content"]]
+        self.assertEqual(results[0].id, self.sponsored_content[-1].id)
+        self.assertEqual(len(results), len(set(obj.id for obj in results)))
@@ -0,0 +1,116 @@
+import time
+
+import mock
+
+from django.core.cache import cache
+from django.test import override_settings
+from django.utils import timezone
+
+from elasticsearch import TransportError
+
+from bulbs.content.models import Content
+from bulbs.reading_list.materialized import (
+    MATERIALIZED_CACHE_KEY, MaterializedReadingList, get_materialized_reading_list
+)
+from bulbs.utils.test import make_content
+
+from example.testcontent.models import TestReadingListObj, AnotherTestReadingListObj
+from .test_mixins import BaseReadingListTestCase
+
+
+MATERIALIZED_SETTINGS = {
+    "CACHES": {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    "READING_LIST_CONFIG": {"materialized": True},
+}
+
+
+@override_settings(**MATERIALIZED_SETTINGS)
+class MaterializedReadingListTestCase(BaseReadingListTestCase):
+
+    def setUp(self):
+        super(MaterializedReadingListTestCase, self).setUp()
+        cache.clear()
+
+    def test_recent(self):
+        example = self.query_content[0]
+        context = example.get_reading_list_context()
+        self.assertEqual(context["name"], "Recent News")
+        self.assertIsInstance(context["content"], MaterializedReadingList)
+
+        # The current object is filtered out in Python.
+        reading_list = sorted([example.id] + [obj.id for obj in context["content"]])
+        self.assertEqual(reading_list, sorted([obj.id for obj in self.query_content]))
+
+        # Materialized once for every article sharing the identifier.
+        materialized = cache.get(MATERIALIZED_CACHE_KEY.format("recent"))
+        self.assertEqual(len(materialized["primary"]), len(self.query_content))
+
+    def test_section(self):
+        self.add_section_identifiers()
+        example = self.query_content[0]
+        context = example.get_reading_list_context()
+        self.assertEqual(context["name"], self.section.name)
+        self.assertNotIn(example.id, [obj.id for obj in context["content"]])
+        self.assertIsNotNone(cache.get(MATERIALIZED_CACHE_KEY.format(self.section.es_id)))
+
+    def test_sponsored_special_coverage(self):
+        self.add_section_identifiers()
+        self.add_unsponsored_special_coverage_identifiers()
+        self.add_sponsored_special_coverage_identifiers()
+        example = self.query_content[0]
+        context = example.get_reading_list_context()
+        self.assertEqual(context["name"], self.sponsored_special_coverage.name)
+        self.assertEqual(
+            context["targeting"]["dfp_campaign_id"],
+            self.sponsored_special_coverage.tunic_campaign_id
+        )
+        materialized = cache.get(
+            MATERIALIZED_CACHE_KEY.format(self.sponsored_special_coverage.identifier)
+        )
+        self.assertIsNone(materialized["augment_type"])
+
+    def test_augmented(self):
+        sponsored_content = make_content(
+            TestReadingListObj,
+            published=self.now - timezone.timedelta(hours=9),
+            tunic_campaign_id=1,
+            _quantity=5
+        )
+        Content.search_objects.refresh()
+        example = Content.objects.last()
+        results = list(example.get_reading_list_context()["content"])
+        self.assertIn(results[0].id, [obj.id for obj in sponsored_content])
+
+    def test_excluded_doc_types(self):
+        make_content(AnotherTestReadingListObj, published=self.now, _quantity=5)
+        Content.search_objects.refresh()
+        example = self.query_content[0]
+        materialized = get_materialized_reading_list("recent")
+        excluded_doc_type = AnotherTestReadingListObj.search_objects.mapping.doc_type
+        self.assertIn(excluded_doc_type, [doc_type for doc_type, _ in materialized["primary"]])
+
+        with override_settings(READING_LIST_CONFIG={
+                "materialized": True, "excluded_doc_types": [excluded_doc_type]}):
+            reading_list = MaterializedReadingList(materialized, excluded_ids=[example.id])
+            self.assertEqual(
+                sorted([example.id] + [obj.id for obj in reading_list]),
+                sorted([obj.id for obj in self.query_content])
+            )
+
+    def test_stale_refresh(self):
+        get_materialized_reading_list("recent")
+        materialized = cache.get(MATERIALIZED_CACHE_KEY.format("recent"))
+        materialized["timestamp"] = time.time() - 60 * 60
+        cache.set(MATERIALIZED_CACHE_KEY.format("recent"), materialized)
+
+        with mock.patch("bulbs.reading_list.tasks.refresh_materialized_reading_list.delay") as delay:
+            # Stale lists are served while a single refresh is queued.
+            self.assertEqual(get_materialized_reading_list("recent"), materialized)
+            self.assertEqual(get_materialized_reading_list("recent"), materialized)
+            delay.assert_called_once_with("recent")
+
+    def test_transport_error_fallback(self):
+        with mock.patch("bulbs.reading_list.materialized.search_references") as search:
+            search.side_effect = TransportError(500, "")
+            context = self.query_content[0].get_reading_list_context()
+            self.assertIsNotNone(context["content"].default_queryset)
@@ -1,9 +1,17 @@
+import time
+
 import mock
+from requests import ConnectionError
 
+from django.core.cache import cache
+from django.test import override_settings
 from django.utils import timezone
 
 from bulbs.content.models import Content
-from bulbs.reading_list.popular import get_popular_ids, popular_content
+from bulbs.reading_list.popular import (
+    CIRCUIT_OPEN_KEY, POPULAR_IDS_CACHE_KEY, get_popular_ids, popular_content
+)
+from bulbs.utils import metrics
 from bulbs.utils.test import make_content, BaseIndexableTestCase
 
 
@@ -57,6 +65,53 @@ class PopularContentTestCase(BaseIndexableTestCase):
             )
 
 
+@override_settings(
+    CACHES={"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}},
+    DIGEST_CIRCUIT_BREAKER_THRESHOLD=2
+)
+class CachedPopularIdsTestCase(BaseIndexableTestCase):
+
+    def setUp(self):
+        super(CachedPopularIdsTestCase, self).setUp()
+        cache.clear()
+        metrics.reset_metrics()
+        self.ids = [1, 2, 3]
+
+    def test_cached(self):
+        with mock.patch("pageview_client.clients.TrendingClient.get") as mock_get:
+            mock_get.return_value = self.ids
+            self.assertEqual(get_popular_ids(), self.ids)
+            self.assertEqual(get_popular_ids(), self.ids)
+            self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(metrics.get_metrics()["reading_list.popular.fetch"]["count"], 1)
+
+    def test_stale_while_revalidate(self):
+        cache.set(POPULAR_IDS_CACHE_KEY.format(10), {"ids": self.ids, "timestamp": time.time() - 600})
+        with mock.patch("bulbs.reading_list.tasks.refresh_popular_ids.delay") as delay:
+            self.assertEqual(get_popular_ids(), self.ids)
+            self.assertEqual(get_popular_ids(), self.ids)
+            delay.assert_called_once_with(10)
+
+    def test_stale_refresh_failure_keeps_last_good(self):
+        cache.set(POPULAR_IDS_CACHE_KEY.format(10), {"ids": self.ids, "timestamp": time.time() - 600})
+        with mock.patch("pageview_client.clients.TrendingClient.get") as mock_get:
+            mock_get.side_effect = ConnectionError
+            # Celery runs the refresh eagerly in tests.
+            self.assertEqual(get_popular_ids(), self.ids)
+        self.assertEqual(get_popular_ids(), self.ids)
+
+    def test_circuit_breaker(self):
+        with mock.patch("pageview_client.clients.TrendingClient.get") as mock_get:
+            mock_get.side_effect = ConnectionError
+            self.assertIsNone(get_popular_ids())
+            self.assertIsNone(get_popular_ids())
+            self.assertTrue(cache.get(CIRCUIT_OPEN_KEY))
+            # Open circuit skips the trending service entirely.
+            self.assertIsNone(get_popular_ids())
+            self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(metrics.get_metrics()["reading_list.popular.fetch"]["errors"], 2)
+
+
 class SpecialCoverageTestCase(BaseIndexableTestCase):
 
     def setUp(self):
@@ -1,5 +1,7 @@
 from datetime import timedelta
 
+import mock
+
 from django.utils import timezone
 
 from elasticsearch_dsl import filter as es_filter
@@ -7,12 +9,14 @@ from elasticsearch_dsl import filter as es_filter
 from bulbs.content.models import Content, FeatureType, Tag
 from bulbs.special_coverage.models import SpecialCoverage
 from bulbs.special_coverage.search import SearchParty
-from bulbs.reading_list.slicers import SearchSlicer
+from bulbs.reading_list.slicers import FirstSlotSlicer, PrefetchingSearchSlicer, SearchSlicer
 from bulbs.utils.test import BaseIndexableTestCase, make_content
 
 
 class SearchSlicerTestCase(BaseIndexableTestCase):
 
+    slicer_class = SearchSlicer
+
     def setUp(self):
         super(SearchSlicerTestCase, self).setUp()
         self.now = timezone.now()
@@ -35,7 +39,7 @@ class SearchSlicerTestCase(BaseIndexableTestCase):
         queryset = Content.search_objects.search(
             feature_types=[self.feature_type1.slug]
         ).sort("id")
-        reading_list = SearchSlicer()
+        reading_list = self.slicer_class()
         # First queryset should be default until explicitly state otherwise.
         reading_list.register_queryset(queryset)
         self.assertEqual(reading_list.default_queryset, queryset)
@@ -46,7 +50,7 @@ class SearchSlicerTestCase(BaseIndexableTestCase):
     def test_register_queryset_set_default(self):
         queryset1 = Content.search_objects.search(feature_types=[self.feature_type1.slug])
         queryset2 = Content.search_objects.search(feature_types=[self.feature_type2.slug])
-        reading_list = SearchSlicer()
+        reading_list = self.slicer_class()
         reading_list.register_queryset(queryset1)
         reading_list.register_queryset(queryset2, default=True)
         self.assertEqual(reading_list.default_queryset, queryset2)
@@ -54,7 +58,7 @@ class SearchSlicerTestCase(BaseIndexableTestCase):
     def test_validator(self):
         queryset1 = Content.search_objects.search(feature_types=[self.feature_type1.slug])
         queryset2 = Content.search_objects.search(feature_types=[self.feature_type2.slug])
-        reading_list = SearchSlicer()
+        reading_list = self.slicer_class()
         reading_list.register_queryset(queryset1)
 
         def even_validator(index):
@@ -73,7 +77,7 @@ class SearchSlicerTestCase(BaseIndexableTestCase):
         queryset1 = Content.search_objects.search(feature_types=[self.feature_type1.slug])
         queryset2 = Content.search_objects.search(feature_types=[self.feature_type2.slug])
         queryset2 = queryset2.filter(es_filter.Terms(**{"id": [queryset2[0].id]}))
-        reading_list = SearchSlicer()
+        reading_list = self.slicer_class()
         reading_list.register_queryset(queryset1)
 
         def even_validator(index):
@@ -88,6 +92,51 @@ class SearchSlicerTestCase(BaseIndexableTestCase):
             self.assertTrue(bool(index % 2 == 0))
 
 
+class PrefetchingSearchSlicerTestCase(SearchSlicerTestCase):
+
+    slicer_class = PrefetchingSearchSlicer
+
+    def test_page_sizes(self):
+        reading_list = PrefetchingSearchSlicer(limit=10)
+        reading_list.register_queryset(Content.search_objects.search())
+        reading_list.register_queryset(
+            Content.search_objects.search(), validator=lambda index: index % 3 == 0
+        )
+        page_sizes, default_page_size = reading_list.get_page_sizes()
+        self.assertEqual(list(page_sizes.values()), [4])
+        self.assertEqual(default_page_size, 6)
+
+    def test_single_round_trip(self):
+        queryset1 = Content.search_objects.search(feature_types=[self.feature_type1.slug])
+        queryset2 = Content.search_objects.search(feature_types=[self.feature_type2.slug])
+        reading_list = FirstSlotSlicer(queryset1, queryset2, limit=15)
+        client = Content.search_objects.client
+        with mock.patch.object(client, "search", wraps=client.search) as search:
+            with mock.patch.object(client, "msearch", wraps=client.msearch) as msearch:
+                out = [obj for obj in reading_list]
+        self.assertEqual(msearch.call_count, 1)
+        self.assertEqual(search.call_count, 0)
+        self.assertEqual(len(out), 15)
+        self.assertIn(out[0], [obj for obj in queryset2[:20]])
+        self.assertEqual(out[1:], [obj for obj in queryset1[:14]])
+
+    def test_dry_source_fetches_more_pages(self):
+        queryset1 = Content.search_objects.search(feature_types=[self.feature_type1.slug])
+        queryset2 = Content.search_objects.search(feature_types=[self.feature_type2.slug])
+        queryset2 = queryset2.filter(es_filter.Terms(**{"id": [queryset2[0].id]}))
+        reading_list = PrefetchingSearchSlicer(limit=30)
+        reading_list.register_queryset(queryset1)
+        reading_list.register_queryset(queryset2, validator=lambda index: index % 2 == 0)
+        client = Content.search_objects.client
+        with mock.patch.object(client, "search", wraps=client.search) as search:
+            out = [obj for obj in reading_list]
+        # The augment query only had one result, so the default queryset fills in.
+        self.assertEqual(search.call_count, 1)
+        self.assertEqual(len(out), 21)
+        for obj in queryset1[:20]:
+            self.assertIn(obj, out)
+
+
 class SpecialCoverageSearchTests(BaseIndexableTestCase):
     """TestCase for custom special coverage test cases."""
     def setUp(self):
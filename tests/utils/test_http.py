@@ -0,0 +1,51 @@
+import requests
+import requests_mock
+
+from django.test import SimpleTestCase, override_settings
+
+from bulbs.utils import http, metrics
+
+
+class HTTPTestCase(SimpleTestCase):
+
+    def setUp(self):
+        http.close_sessions()
+        metrics.reset_metrics()
+
+    def test_session_per_host(self):
+        session = http.get_session("http://onion.local/api/v1/campaign/")
+        self.assertIs(session, http.get_session("http://onion.local/api/v1/other/"))
+        self.assertIsNot(session, http.get_session("http://sodahead.local/api/polls/"))
+        self.assertIsNot(session, http.get_session("https://onion.local/api/v1/campaign/"))
+
+    @override_settings(HTTP_TIMEOUT=(1, 2))
+    def test_default_timeout(self):
+        with requests_mock.mock() as mocker:
+            mocker.get("http://onion.local/", status_code=200)
+            http.get("tunic", "http://onion.local/")
+            http.get("tunic", "http://onion.local/", timeout=5)
+            self.assertEqual(mocker.request_history[0].timeout, (1, 2))
+            self.assertEqual(mocker.request_history[1].timeout, 5)
+
+    def test_metrics(self):
+        with requests_mock.mock() as mocker:
+            mocker.get("http://onion.local/ok", status_code=200)
+            mocker.get("http://onion.local/error", status_code=500)
+            mocker.get("http://onion.local/down", exc=requests.exceptions.ConnectTimeout)
+
+            http.get("tunic", "http://onion.local/ok")
+            http.get("tunic", "http://onion.local/error")
+            with self.assertRaises(requests.exceptions.ConnectTimeout):
+                http.get("tunic", "http://onion.local/down")
+
+        metric = metrics.get_metrics()["http.tunic"]
+        self.assertEqual(metric["count"], 3)
+        self.assertEqual(metric["errors"], 2)
+
+    @override_settings(HTTP_RETRIES=4)
+    def test_retry(self):
+        retry = http.get_session("http://onion.local/").get_adapter("http://onion.local/").max_retries
+        self.assertEqual(retry.total, 4)
+        self.assertEqual(set(retry.status_forcelist), set([502, 503, 504]))
+        self.assertTrue(retry.is_retry("GET", 503))
+        self.assertFalse(retry.is_retry("POST", 503))
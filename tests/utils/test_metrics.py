@@ -0,0 +1,32 @@
+from unittest import TestCase
+
+from bulbs.utils import metrics
+
+
+class MetricsTests(TestCase):
+
+    def setUp(self):
+        metrics.reset_metrics()
+
+    def test_timer(self):
+        with metrics.timer("test.call"):
+            pass
+        with metrics.timer("test.call"):
+            pass
+        metric = metrics.get_metrics()["test.call"]
+        self.assertEqual(metric["count"], 2)
+        self.assertEqual(metric["errors"], 0)
+        self.assertGreaterEqual(metric["max_time"], 0)
+
+    def test_timer_error(self):
+        with self.assertRaises(ValueError):
+            with metrics.timer("test.error"):
+                raise ValueError
+        metric = metrics.get_metrics()["test.error"]
+        self.assertEqual(metric["count"], 1)
+        self.assertEqual(metric["errors"], 1)
+
+    def test_reset(self):
+        metrics.record("test.reset", 0.1)
+        metrics.reset_metrics()
+        self.assertEqual(metrics.get_metrics(), {})
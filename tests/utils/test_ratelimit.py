@@ -0,0 +1,52 @@
+from django.test import SimpleTestCase
+
+from bulbs.utils.ratelimit import TokenBucket
+
+
+class FakeClock(object):
+
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+class TokenBucketTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.bucket = TokenBucket(rate=2, capacity=4, clock=self.clock, sleep=self.clock.sleep)
+
+    def test_burst(self):
+        for _ in range(4):
+            self.assertTrue(self.bucket.consume())
+        self.assertFalse(self.bucket.consume())
+
+    def test_refill(self):
+        for _ in range(4):
+            self.bucket.consume()
+        self.clock.now += 0.5
+        self.assertTrue(self.bucket.consume())
+        self.assertFalse(self.bucket.consume())
+
+        # Never refills past capacity
+        self.clock.now += 60
+        for _ in range(4):
+            self.assertTrue(self.bucket.consume())
+        self.assertFalse(self.bucket.consume())
+
+    def test_wait(self):
+        for _ in range(10):
+            self.bucket.wait()
+        # The first 4 calls are a burst, the remaining 6 are spread at 2 per second.
+        self.assertAlmostEqual(self.clock.now, 3.0)
+
+    def test_invalid_rate(self):
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=0)
+        with self.assertRaises(ValueError):
+            TokenBucket(rate=-1)
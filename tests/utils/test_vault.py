@@ -0,0 +1,81 @@
+import threading
+import time
+
+from mock import patch
+
+from django.test import SimpleTestCase, override_settings
+
+from bulbs.utils import vault
+
+
+@override_settings(VAULT_CACHE_TTL=60, VAULT_CACHE_RENEW_BEFORE=10, VAULT_CACHE_STALE_GRACE=60)
+class SecretCacheTestCase(SimpleTestCase):
+
+    def setUp(self):
+        self.cache = vault.SecretCache()
+        patcher = patch("bulbs.utils.vault.fetch", return_value={"authtoken": "TOKEN"})
+        self.fetch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def age(self, path, seconds):
+        secret, fetched_at = self.cache._entries[path]
+        self.cache._entries[path] = (secret, fetched_at - seconds)
+
+    def test_cached(self):
+        self.assertEqual(self.cache.get("facebook/token"), {"authtoken": "TOKEN"})
+        self.assertEqual(self.cache.get("facebook/token"), {"authtoken": "TOKEN"})
+        self.assertEqual(self.fetch.call_count, 1)
+
+    @override_settings(VAULT_CACHE_TTLS={"facebook/token": 0})
+    def test_per_path_ttl(self):
+        self.cache.get("facebook/token")
+        self.cache.get("facebook/token")
+        self.cache.get("sodahead/token")
+        self.cache.get("sodahead/token")
+        self.assertEqual(self.fetch.call_count, 3)
+
+    def test_expired(self):
+        self.cache.get("facebook/token")
+        self.age("facebook/token", 61)
+        self.fetch.return_value = {"authtoken": "NEW"}
+        self.assertEqual(self.cache.get("facebook/token"), {"authtoken": "NEW"})
+
+    def test_background_renewal(self):
+        self.cache.get("facebook/token")
+        self.age("facebook/token", 55)
+        self.fetch.return_value = {"authtoken": "NEW"}
+        # The current secret is served while it is renewed.
+        self.assertEqual(self.cache.get("facebook/token"), {"authtoken": "TOKEN"})
+        for _ in range(100):
+            if self.cache._entries["facebook/token"][0] == {"authtoken": "NEW"}:
+                break
+            time.sleep(0.01)
+        self.assertEqual(self.cache.get("facebook/token"), {"authtoken": "NEW"})
+        self.assertEqual(self.fetch.call_count, 2)
+
+    def test_stale_on_error(self):
+        self.cache.get("facebook/token")
+        self.fetch.side_effect = Exception("Vault is down")
+
+        self.age("facebook/token", 90)
+        self.assertEqual(self.cache.get("facebook/token"), {"authtoken": "TOKEN"})
+
+        # Past the grace period
+        self.age("facebook/token", 60)
+        with self.assertRaises(Exception):
+            self.cache.get("facebook/token")
+
+    def test_single_flight(self):
+        def slow_fetch(path):
+            time.sleep(0.1)
+            return {"authtoken": "TOKEN"}
+        self.fetch.side_effect = slow_fetch
+
+        threads = [
+            threading.Thread(target=self.cache.get, args=("facebook/token",)) for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.fetch.call_count, 1)